@@ -8,6 +8,7 @@ from app.api.v1.auth import get_current_user
 from app.core.database import get_db
 from app.models.ai_credential import AICredential
 from app.models.user import User
+from app.services.ai_credentials import invalidate_ai_headers_cache
 from app.schemas.ai_credential import (
     ActivateAICredentialResponse,
     AICredentialResponse,
@@ -144,6 +145,7 @@ def save_api_key(
 
     db.add(credential)
     db.commit()
+    invalidate_ai_headers_cache(current_user.id)
     db.refresh(credential)
 
     return {
@@ -229,6 +231,7 @@ def update_current_model(
 
     credential.current_model = request.current_model
     db.commit()
+    invalidate_ai_headers_cache(current_user.id)
     db.refresh(credential)
 
     try:
@@ -296,6 +299,7 @@ def clear_active_api_credential(
     ).update({"status": "inactive"}, synchronize_session=False)
 
     db.commit()
+    invalidate_ai_headers_cache(current_user.id)
 
     return {"message": "Active AI credential cleared successfully"}
 
@@ -331,6 +335,7 @@ def activate_api_credential(
 
     credential.status = "active"
     db.commit()
+    invalidate_ai_headers_cache(current_user.id)
     db.refresh(credential)
 
     try:
@@ -372,6 +377,7 @@ def delete_api_credential(
 
     db.delete(credential)
     db.commit()
+    invalidate_ai_headers_cache(current_user.id)
 
     return {"message": "AI credential deleted successfully"}
 
@@ -415,6 +421,7 @@ def update_credential_model(
 
     credential.current_model = request.current_model
     db.commit()
+    invalidate_ai_headers_cache(current_user.id)
     db.refresh(credential)
 
     try:
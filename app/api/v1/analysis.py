@@ -29,6 +29,7 @@ from app.utils.file_handling import upload_to_supabase, update_file_from_supabas
 from app.utils.folder_utils import create_default_folder
 from app.utils.call_ai_service import call_ai_service
 from app.utils.metadata_utils import create_ai_generated_metadata
+from app.services.ai_transcripts import attach_ai_transcript
 from app.services.docs_constraint import validate_dependencies
 from app.api.v1.files import list_file
 
@@ -124,8 +125,6 @@ async def generate_analysis_doc(
         file_metadata = create_ai_generated_metadata(
             doc_type=doc_type,
             content=content,
-            message=description,
-            ai_response=ai_data,
             step="analysis",
         )
 
@@ -145,6 +144,8 @@ async def generate_analysis_doc(
         )
         db.add(new_file)
         db.flush()
+        ai_message = attach_ai_transcript(db, new_file, ai_data)
+
         db.add_all(
             [
                 Chat_Session(
@@ -161,7 +162,7 @@ async def generate_analysis_doc(
                     content_type=doc_type,
                     content_id=new_file.id,
                     role="ai",
-                    message=json.dumps(ai_inner),
+                    message=ai_message,
                 ),
             ]
         )
@@ -370,12 +371,9 @@ async def regenerate_analysis_doc(
         doc.updated_by = current_user.id
         doc.storage_path = path
         doc.file_size=file_size_kb
-        doc.file_metadata = {
-            **doc.file_metadata,
-            "message": description,
-            "ai_response": ai_data,
-        }
         db.flush()
+        ai_message = attach_ai_transcript(db, doc, ai_data)
+
         db.add_all(
             [
                 Chat_Session(
@@ -392,7 +390,7 @@ async def regenerate_analysis_doc(
                     content_type=doc.file_type,
                     content_id=doc.id,
                     role="ai",
-                    message=json.dumps(ai_inner),
+                    message=ai_message,
                 ),
             ]
         )
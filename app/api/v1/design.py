@@ -41,6 +41,7 @@ from app.utils.file_handling import (
 from app.utils.folder_utils import create_default_folder
 from app.utils.call_ai_service import call_ai_service
 from app.utils.metadata_utils import create_ai_generated_metadata
+from app.services.ai_transcripts import attach_ai_transcript
 from app.api.v1.files import list_file
 from app.services.docs_constraint import validate_dependencies
 
@@ -165,8 +166,6 @@ async def generate_design(
         file_metadata = create_ai_generated_metadata(
             doc_type=design_type,
             content=markdown_content,
-            message=description,
-            ai_response=ai_data,
             step="design",
         )
         file_metadata["design_category"] = design_type.split("-")[0]
@@ -188,13 +187,15 @@ async def generate_design(
         db.add(new_file)
         db.flush()
 
+        ai_message = attach_ai_transcript(db, new_file, ai_data)
+
         new_ai_session = Chat_Session(
             project_id=project_id,
             user_id=current_user.id,
             content_type=design_type,
             content_id=new_file.id,
             role="ai",
-            message=json.dumps(ai_inner_response),
+            message=ai_message,
         )
 
         new_user_session = Chat_Session(
@@ -435,24 +436,21 @@ async def regenerate_design(
         generate_at = datetime.now(timezone.utc)
 
         existing_doc.content = markdown_content
-        existing_doc.file_metadata = {
-            **existing_doc.file_metadata,
-            "message": description,
-            "ai_response": ai_data,
-        }
         existing_doc.updated_by = current_user.id
         existing_doc.storage_path = path_in_bucket
         existing_doc.file_size = file_size_kb
 
         db.flush()
 
+        ai_message = attach_ai_transcript(db, existing_doc, ai_data)
+
         new_ai_session = Chat_Session(
             content_id=existing_doc.id,
             project_id=project_id,
             user_id=current_user.id,
             content_type=design_type,
             role="ai",
-            message=json.dumps(ai_inner_response),
+            message=ai_message,
         )
 
         new_user_session = Chat_Session(
@@ -1,5 +1,4 @@
 from io import BytesIO
-import json
 import logging
 from fastapi import (
     APIRouter,
@@ -36,6 +35,7 @@ from app.utils.folder_utils import create_default_folder
 from app.utils.call_ai_service import call_ai_service
 from app.utils.get_unique_name import get_unique_diagram_name
 from app.utils.metadata_utils import create_ai_generated_metadata
+from app.services.ai_transcripts import attach_ai_transcript
 from app.schemas.folder import CreateFolderRequest
 from app.api.v1.files import list_file
 
@@ -140,8 +140,6 @@ async def generate_usecase_diagram(
         file_metadata = create_ai_generated_metadata(
             doc_type=doc_type,
             content=ai_data["response"]["detail"],
-            message=description,
-            ai_response=ai_data,
             step="diagram",
         )
 
@@ -162,6 +160,8 @@ async def generate_usecase_diagram(
         db.flush()  # get generated diagram_id + version without commit
 
         # Create chat sessions
+        ai_message = attach_ai_transcript(db, new_file, ai_data)
+
         new_ai_session = Chat_Session(
             
             content_id=new_file.id,
@@ -169,7 +169,7 @@ async def generate_usecase_diagram(
             user_id=current_user.id,
             content_type="diagram",
             role="ai",
-            message=json.dumps(ai_data["response"]),
+            message=ai_message,
         )
 
         new_user_session = Chat_Session(
@@ -437,13 +437,15 @@ async def regenerate_srs(
 
         generate_at = datetime.now(timezone.utc)
 
+        ai_message = attach_ai_transcript(db, existing_diagram, ai_data)
+
         new_ai_session = Chat_Session(
             content_id=existing_diagram.id,
             project_id=project_id,
             user_id=current_user.id,
             content_type="diagram",
             role="ai",
-            message=json.dumps(ai_data["response"]),
+            message=ai_message,
         )
 
         new_user_session = Chat_Session(
@@ -1,4 +1,3 @@
-import tempfile
 import os
 import logging
 import mimetypes
@@ -21,7 +20,6 @@ from app.utils.file_handling import (
     has_extension,
     upload_to_supabase,
     delete_file_from_supabase,
-    extract_text_from_binary,
     download_file_from_supabase,
 )
 from app.schemas.file import UploadedFileResponse, UploadResponse
@@ -116,20 +114,8 @@ async def upload(
             file_size_bytes = len(binary_content)
             file_size_kb = round(file_size_bytes / 1024, 2)
 
+            # Raw text is extracted by process_markdown_task, off the event loop.
             try:
-                raw_text = extract_text_from_binary(binary_content, suffix)
-            except Exception as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to extract raw text from {file.filename}: {str(e)}",
-                )
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(binary_content)
-                tmp_path = tmp.name
-
-            try:
-
                 file.file.seek(0)
                 raw_filename = f"/{current_user.id}/{project_id}/user/{path}/{unique_title}{suffix}"
                 raw_url = await upload_to_supabase(file, raw_filename)
@@ -142,9 +128,6 @@ async def upload(
                     status_code=500,
                     detail=f"Error processing Upload/MarkItDown for {file.filename}: {str(e)}",
                 )
-            finally:
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
 
             raw_record = Files(
                 project_id=project_id,
@@ -152,7 +135,7 @@ async def upload(
                 created_by=current_user.id,
                 updated_by=current_user.id,
                 name=unique_title,
-                content=raw_text,
+                content=None,
                 extension=suffix,
                 storage_path=raw_url,
                 # storage_md_path=md_url,
@@ -184,7 +167,7 @@ async def upload(
                     name=raw_record.name,
                     size_kb=file_size_kb,
                     type=raw_record.extension,
-                    content=raw_text,
+                    content=None,
                     created_at=raw_record.created_at,
                     status=raw_record.status,
                 )
@@ -1,4 +1,4 @@
-from app.models.file import Files
+from app.models.file import HIDDEN_FILE_STATUSES, Files
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text
 from app.api.v1.auth import get_current_user
@@ -143,7 +143,10 @@ async def get_folder_children(
 
     files = (
         db.query(Files)
-        .filter(Files.folder_id == folder_id, Files.status != "deleted")
+        .filter(
+            Files.folder_id == folder_id,
+            Files.status.notin_(HIDDEN_FILE_STATUSES),
+        )
         .all()
     )
 
@@ -10,13 +10,14 @@ from fastapi import (
 )
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 from app.models.user import User
 from app.core.security import verify_token
 
 from app.api.v1.planning import generate_planning_doc
 from app.api.v1.design import generate_design
 from app.services.rag_postprocess import queue_rag_indexing
+from app.services.step_dag import DAG_STOPPED, NODE_DONE, run_document_dag
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -67,13 +68,14 @@ async def websocket_generate_step(
     }
 
     # --------------------------------------------------
-    # 3. PROCESS SINGLE DOCUMENT (SEQUENTIAL)
+    # 3. PROCESS SINGLE DOCUMENT
     # --------------------------------------------------
     async def process_single_doc(
         step: str,
         project_name: str,
         description: str,
         doc_type: str,
+        db: Session,
     ):
         try:
             await websocket.send_json(
@@ -185,18 +187,28 @@ async def websocket_generate_step(
             )
 
             # ==================================================
-            # 🔁 PROCESS DOCUMENTS ONE BY ONE
+            # 🔁 PROCESS DOCUMENTS IN DEPENDENCY ORDER
             # ==================================================
-            for doc in documents:
-                if stop_event.is_set():
-                    return
-
-                await process_single_doc(
-                    step=step_name,
-                    project_name=context["project_name"],
-                    description=context["description"],
-                    doc_type=doc["type"],
-                )
+            async def run_node(index: int, doc: dict, step_name=step_name) -> str:
+                # Documents run concurrently, so each gets its own session.
+                node_db = SessionLocal()
+                try:
+                    await process_single_doc(
+                        step=step_name,
+                        project_name=context["project_name"],
+                        description=context["description"],
+                        doc_type=doc["type"],
+                        db=node_db,
+                    )
+                finally:
+                    node_db.close()
+                return NODE_DONE
+
+            outcome = await run_document_dag(
+                documents, run_node, stop_event=stop_event
+            )
+            if outcome == DAG_STOPPED:
+                return
 
             # ---- STEP FINISHED ----
             await websocket.send_json(
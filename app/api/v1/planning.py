@@ -27,6 +27,7 @@ from app.utils.file_handling import upload_to_supabase, update_file_from_supabas
 from app.utils.folder_utils import create_default_folder
 from app.utils.call_ai_service import call_ai_service
 from app.utils.metadata_utils import create_ai_generated_metadata
+from app.services.ai_transcripts import attach_ai_transcript
 from app.api.v1.files import list_file
 from app.services.docs_constraint import validate_dependencies
 
@@ -130,8 +131,6 @@ async def generate_planning_doc(
         file_metadata = create_ai_generated_metadata(
             doc_type=doc_type,
             content=content,
-            message=description,
-            ai_response=ai_data,
             step="planning",
         )
 
@@ -152,6 +151,8 @@ async def generate_planning_doc(
         db.add(new_file)
         db.flush()
 
+        ai_message = attach_ai_transcript(db, new_file, ai_data)
+
         db.add_all(
             [
                 Chat_Session(
@@ -168,7 +169,7 @@ async def generate_planning_doc(
                     content_type=doc_type,
                     content_id=new_file.id,
                     role="ai",
-                    message=json.dumps(ai_inner_resp),
+                    message=ai_message,
                 ),
             ]
         )
@@ -375,12 +376,9 @@ async def regenerate_planning_doc(
         doc.file_size = file_size_kb
         doc.updated_by = current_user.id
         doc.storage_path = path
-        doc.file_metadata = {
-            **doc.file_metadata,
-            "message": description,
-            "ai_response": ai_data,
-        }
         db.flush()
+        ai_message = attach_ai_transcript(db, doc, ai_data)
+
         db.add_all(
             [
                 Chat_Session(
@@ -397,7 +395,7 @@ async def regenerate_planning_doc(
                     content_type=doc.file_type,
                     content_id=doc.id,
                     role="ai",
-                    message=json.dumps(ai_inner),
+                    message=ai_message,
                 ),
             ]
         )
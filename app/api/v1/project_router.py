@@ -1,4 +1,4 @@
-from app.models.file import Files
+from app.models.file import HIDDEN_FILE_STATUSES, Files
 from app.schemas.file import GetFileResponse
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import asc, desc
@@ -262,7 +262,7 @@ async def get_root_contents(
         .filter(
             Files.project_id == project_id,
             Files.folder_id.is_(None),
-            Files.status != "deleted",
+            Files.status.notin_(HIDDEN_FILE_STATUSES),
         )
         .all()
     )
@@ -329,7 +329,10 @@ async def get_project_tree(
     )
     files = (
         db.query(Files)
-        .filter(Files.project_id == project_id, Files.status != "deleted")
+        .filter(
+            Files.project_id == project_id,
+            Files.status.notin_(HIDDEN_FILE_STATUSES),
+        )
         .all()
     )
 
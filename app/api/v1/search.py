@@ -1,8 +1,14 @@
 import math
 import logging
+from typing import Optional
 from app.api.v1.auth import get_current_user
 from app.models.user import User
 from app.schemas.global_search import SearchResponse, SearchResultItem
+from app.services.global_search import (
+    count_search_matches,
+    decode_cursor,
+    fetch_search_page,
+)
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -17,9 +23,12 @@ def global_search(
     keyword: str = Query(..., min_length=1, max_length=100),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: str = Query("exact", pattern="^(exact|approximate|none)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    keyset = decode_cursor(cursor) if cursor else None
     try:
         # Get projects owned by the user
         project_rows = db.execute(
@@ -33,38 +42,20 @@ def global_search(
             return SearchResponse(
                 keyword=keyword, total=0, page=page, total_pages=0, results=[]
             )
-        offset = (page - 1) * limit
-
-        # Use raw SQL for efficient full-text search with pagination
-        search_query = text("""
-            SELECT 
-                entity_id, 
-                entity_type, 
-                project_id,
-                title, 
-                ts_rank(search_vector, websearch_to_tsquery('english', :keyword)) AS rank,
-                COUNT(*) OVER() AS total_count
-            FROM 
-                global_search_index
-            WHERE 
-                search_vector @@ websearch_to_tsquery('english', :keyword)
-                AND project_id = ANY(:project_ids)
-            ORDER BY 
-                rank DESC
-            LIMIT :limit OFFSET :offset
-        """)
-
-        search_results = db.execute(
-            search_query,
-            {
-                "keyword": keyword,
-                "project_ids": project_ids,
-                "limit": limit,
-                "offset": offset,
-            },
-        ).fetchall()
-        total_records = search_results[0].total_count if search_results else 0
-        total_pages = math.ceil(total_records / limit) if total_records > 0 else 0
+        search_results, next_cursor = fetch_search_page(
+            db,
+            keyword=keyword,
+            project_ids=project_ids,
+            limit=limit,
+            cursor=keyset,
+            offset=(page - 1) * limit,
+        )
+        total_records, approximate = count_search_matches(
+            db, keyword=keyword, project_ids=project_ids, mode=count
+        )
+        total_pages = (
+            math.ceil(total_records / limit) if total_records is not None else None
+        )
         results = [
             SearchResultItem(
                 entity_id=row.entity_id,
@@ -79,8 +70,10 @@ def global_search(
         return SearchResponse(
             keyword=keyword,
             total=total_records,
+            total_is_approximate=approximate,
             page=page,
             total_pages=total_pages,
+            next_cursor=next_cursor,
             results=results,
         )
 
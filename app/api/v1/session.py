@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.models.session import Chat_Session
+from app.services.ai_transcripts import load_ai_transcripts
 from app.schemas.session import (
     ListSessionResponse,
     GetSessionResponse,
@@ -18,8 +19,30 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def build_session_response(session_list):
+def _parse_ai_message(session):
+    try:
+        parsed = json.loads(session.message)
+    except (TypeError, ValueError):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def build_session_response(session_list, db: Session):
     result = []
+    parsed_messages = {
+        id(session): _parse_ai_message(session)
+        for session in session_list
+        if session.role == "ai"
+    }
+    # AI rows reference their response by transcript id; load them in one go.
+    transcripts = load_ai_transcripts(
+        db,
+        [
+            parsed.get("transcript_id")
+            for parsed in parsed_messages.values()
+            if parsed is not None
+        ],
+    )
 
     for session in session_list:
         message = ""
@@ -27,7 +50,14 @@ def build_session_response(session_list):
 
         if session.role == "ai":
             try:
-                parsed = json.loads(session.message)
+                parsed = parsed_messages[id(session)]
+                if "transcript_id" in parsed:
+                    transcript = transcripts.get(parsed["transcript_id"]) or {}
+                    response = transcript.get("response")
+                    parsed = {
+                        "summary": parsed.get("summary"),
+                        **(response if isinstance(response, dict) else {}),
+                    }
                 content = parsed.get("content")
 
                 if isinstance(content, dict):
@@ -69,7 +99,7 @@ async def list_session(
         .all()
     )
 
-    return {"Sessions": build_session_response(session_list)}
+    return {"Sessions": build_session_response(session_list, db)}
 
 
 @router.get("/list-ai/{content_id}", response_model=ListSessionResponse)
@@ -84,4 +114,4 @@ async def list_session_ai(
         .all()
     )
 
-    return {"Sessions": build_session_response(session_list)}
+    return {"Sessions": build_session_response(session_list, db)}
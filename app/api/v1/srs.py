@@ -13,7 +13,6 @@ from io import BytesIO
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import json
 from app.core.database import get_db
 from app.api.v1.auth import get_current_user
 from app.models.user import User
@@ -39,6 +38,7 @@ from app.utils.srs_utils import (
 from app.utils.folder_utils import create_default_folder
 from app.utils.call_ai_service import call_ai_service
 from app.utils.metadata_utils import create_ai_generated_metadata
+from app.services.ai_transcripts import attach_ai_transcript
 from app.api.v1.files import list_file
 from app.services.docs_constraint import validate_dependencies
 
@@ -102,8 +102,6 @@ async def generate_srs(
     file_metadata = create_ai_generated_metadata(
         doc_type="srs",
         content=markdown_content,
-        message=description,
-        ai_response=ai_data,
         step="srs",
     )
 
@@ -124,13 +122,15 @@ async def generate_srs(
     db.commit()
     db.refresh(new_file)
 
+    ai_message = attach_ai_transcript(db, new_file, ai_data)
+
     new_ai_session = Chat_Session(
         project_id=project_id,
         user_id=current_user.id,
         content_type="srs",
         content_id=new_file.id,
         role="ai",
-        message=json.dumps(ai_data["response"]),
+        message=ai_message,
     )
 
     new_user_session = Chat_Session(
@@ -399,11 +399,6 @@ async def regenerate_srs(
 
     existing_doc.content = markdown_content
 
-    existing_doc.file_metadata = {
-        **existing_doc.file_metadata,
-        "message": description,
-        "ai_response": ai_data,
-    }
     existing_doc.updated_by = current_user.id
 
     file_name = f"{current_user.id}/{project_id}/{folder.name}/{existing_doc.name}.md"
@@ -421,13 +416,15 @@ async def regenerate_srs(
     try:
         generate_at = datetime.now(timezone.utc)
 
+        ai_message = attach_ai_transcript(db, existing_doc, ai_data)
+
         new_ai_session = Chat_Session(
             content_id=existing_doc.id,
             project_id=project_id,
             user_id=current_user.id,
             content_type="srs",
             role="ai",
-            message=json.dumps(ai_data["response"]),
+            message=ai_message,
         )
 
         new_user_session = Chat_Session(
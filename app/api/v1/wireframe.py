@@ -28,6 +28,7 @@ from app.utils.get_unique_name import get_unique_diagram_name
 from app.utils.folder_utils import create_default_folder
 from app.schemas.folder import CreateFolderRequest
 from app.api.v1.files import list_file
+from app.services.ai_transcripts import attach_ai_transcript
 from app.services.docs_constraint import validate_dependencies
 
 logger = logging.getLogger(__name__)
@@ -175,13 +176,10 @@ async def generate_wireframe(
             content=ai_content,
             file_category="ai gen",
             file_type="wireframe",
-            metadata={
-                "message": description,
-                "ai_response": ai_data,
-            },
         )
         db.add(new_file)
         db.flush()  # get generated diagram_id + version without commit
+        attach_ai_transcript(db, new_file, ai_data)
 
         # Create chat sessions
 
@@ -374,6 +372,7 @@ async def regenerate_srs(
 
     try:
         generate_at = datetime.now(timezone.utc)
+        attach_ai_transcript(db, existing_wireframe, ai_data)
 
         new_user_session = Chat_Session(
             project_id=project_id,
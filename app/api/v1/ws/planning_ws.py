@@ -8,13 +8,22 @@ from fastapi import (
 )
 
 import logging
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.security import verify_token
 
 from app.models.user import User
-from app.core.step_task_registry import StepTaskRegistry
+from app.services.step_jobs import (
+    ACTION_CANCEL,
+    ACTION_STOP,
+    ACTIVE_JOB_STATUSES,
+    fail_queued_step_job,
+    get_step_job_status,
+    open_step_job,
+    request_step_job_action,
+)
 from app.services.step_ws_notifier import StepWSNotifier
-from app.services.planning_runner import run_planning_step
+from app.tasks.step_tasks import run_step_job_task
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -52,76 +61,62 @@ async def ws_planning(
     await websocket.accept()
 
     StepWSNotifier.register(project_id, "planning", websocket)
-    notifier = StepWSNotifier(project_id, "planning")
 
     try:
         init_data = await websocket.receive_json()
-        existing_task = StepTaskRegistry.get_task(
-            project_id, current_user.id, "planning"
-        )
-
-        if existing_task:
-            logger.info("Cancelling previous planning task")
-            existing_task.cancel()
-            try:
-                await existing_task
-
-            except asyncio.CancelledError:
-                pass
 
-        stop_event = asyncio.Event()
-
-        task = StepTaskRegistry.start(
-            project_id,
-            current_user.id,
-            "planning",
-            run_planning_step(
-                project_id=project_id,
-                project_name=init_data["project_name"],
-                description=init_data.get("description", ""),
-                documents=init_data["documents"],
-                current_user_id=current_user.id,
-                notifier=notifier,
-                stop_event=stop_event,
-            ),
+        # Generation runs as a durable job on a Celery worker; this socket
+        # only relays its events (via redis_event_listener) and stop requests.
+        job = await asyncio.to_thread(
+            open_step_job, project_id, current_user.id, "planning", init_data
         )
-
-        while not task.done():
-            recv_task = asyncio.create_task(websocket.receive_json())
-            done, pending = await asyncio.wait(
-                [task, recv_task], return_when=asyncio.FIRST_COMPLETED
-            )
-            if task in done:
-                recv_task.cancel()
-                break
-            if recv_task in done:
-                try:
-                    msg = recv_task.result()
-                    if isinstance(msg, dict) and msg.get("action") == "stop":
-                        logger.info(
-                            f"Received STOP signal from FE for project {project_id}"
-                        )
-                        stop_event.set()
-                    else:
-                        logger.warning(f"Ignored message during generation: {msg}")
-                except WebSocketDisconnect:
-                    raise
-                except Exception as e:
-                    logger.error(f"Socket receive error: {e}")
+        job_id = job["job_id"]
+        if not job["resumed"]:
+            try:
+                run_step_job_task.delay(job_id)
+            except Exception as e:
+                logger.error(f"Could not enqueue planning job {job_id}: {e}")
+                await asyncio.to_thread(
+                    fail_queued_step_job, job_id, f"Could not enqueue: {e}"
+                )
+                await websocket.send_json(
+                    {
+                        "type": "step_error",
+                        "step": "planning",
+                        "job_id": job_id,
+                        "message": "Could not start generation, please retry",
+                    }
+                )
+                await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+                return
+        await websocket.send_json(job)
+
+        while True:
+            try:
+                msg = await asyncio.wait_for(
+                    websocket.receive_json(), timeout=settings.step_job_poll_seconds
+                )
+            except asyncio.TimeoutError:
+                job_status = await asyncio.to_thread(get_step_job_status, job_id)
+                if job_status not in ACTIVE_JOB_STATUSES:
                     break
-        await task
+                continue
+
+            if isinstance(msg, dict) and msg.get("action") in (
+                ACTION_STOP,
+                ACTION_CANCEL,
+            ):
+                logger.info(
+                    f"Received {msg['action'].upper()} signal from FE for project {project_id}"
+                )
+                await asyncio.to_thread(request_step_job_action, job_id, msg["action"])
+            else:
+                logger.warning(f"Ignored message during generation: {msg}")
         await websocket.close()
 
     except WebSocketDisconnect:
+        # The job keeps running; reconnect with {"resume": true} to follow it.
         logger.info(f"WebSocket disconnected by client for project {project_id}")
-        task = StepTaskRegistry.get_task(project_id, current_user.id, "planning")
-        if task and not task.done():
-            logger.info(f"Cancelling planning task for project {project_id}")
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         try:
@@ -5,7 +5,6 @@ import logging
 from app.core.database import get_db
 from app.core.security import verify_token
 from app.models.user import User
-from app.core.step_task_registry import StepTaskRegistry
 from app.services.step_ws_notifier import StepWSNotifier
 from app.core.database import SessionLocal
 
@@ -11,6 +11,7 @@ from app.services.document_generation import (
     regenerate_document,
     update_document,
 )
+from app.services.file_listing import INCLUDE_DESCRIPTION, parse_include
 from app.core.database import get_db
 from app.core.rbac import Permission, ProjectAccessContext, require_permission
 from app.schemas.analysis import (
@@ -54,6 +55,7 @@ async def generate_analysis_doc(
 async def list_analysis_docs(
     project_id: int,
     doc_type: Optional[str] = Query(None),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     access: ProjectAccessContext = Depends(
         require_permission(Permission.FILE_READ)
     ),
@@ -67,6 +69,7 @@ async def list_analysis_docs(
         item_response_cls=GetAnalysisResponse,
         type_field="doc_type",
         db=db,
+        include=parse_include(include),
     )
 
 
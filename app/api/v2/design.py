@@ -17,6 +17,7 @@ from app.services.document_generation import (
     regenerate_document,
     update_document,
 )
+from app.services.file_listing import INCLUDE_DESCRIPTION, parse_include
 from app.core.database import get_db
 from app.core.rbac import Permission, ProjectAccessContext, require_permission
 from app.schemas.design import (
@@ -73,6 +74,7 @@ async def generate_design_doc(
 async def list_design_docs(
     project_id: int,
     design_type: Optional[str] = Query(None),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     access: ProjectAccessContext = Depends(require_permission(Permission.FILE_READ)),
     db: Session = Depends(get_db),
 ):
@@ -84,6 +86,7 @@ async def list_design_docs(
         item_response_cls=GetDesignResponse,
         type_field="design_type",
         db=db,
+        include=parse_include(include),
     )
 
 
@@ -1,29 +1,33 @@
 import logging
-import mimetypes
 import os
-import tempfile
 from typing import List, Optional
-from urllib.parse import quote
 
 from celery import chain
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.rbac import Permission, ProjectAccessContext, require_permission
-from app.models.file import Files
+from app.models.file import FILE_STATUS_UPLOADING, Files
 from app.models.folder import Folder
-from app.schemas.file import UploadedFileResponse, UploadResponse
+from app.schemas.file import (
+    CompleteUploadRequest,
+    SignedUploadItem,
+    SignedUploadRequest,
+    SignedUploadResponse,
+    UploadedFileResponse,
+    UploadResponse,
+)
 from app.tasks.file_tasks import extract_metadata_task, process_markdown_task, index_rag_task
 from app.utils.file_handling import (
     delete_file_from_supabase,
-    download_file_from_supabase,
-    extract_text_from_binary,
     has_extension,
+    sanitize_filename,
     upload_to_supabase,
 )
+from app.utils.file_download import storage_file_response
 from app.utils.get_unique_name import get_unique_diagram_name
+from app.utils.storage_backend import get_storage_backend
 from app.core.rag_database import get_rag_db
 from app.utils.rag_indexer import delete_rag_chunks_for_file
 
@@ -44,6 +48,41 @@ ALLOWED_EXTENSIONS = {
 }
 
 
+def _ensure_upload_folder(db: Session, project_id: int, folder_id: Optional[int]):
+    if folder_id is None:
+        return
+    folder = (
+        db.query(Folder)
+        .filter(
+            Folder.id == folder_id,
+            Folder.project_id == project_id,
+            Folder.is_deleted == False,
+        )
+        .first()
+    )
+    if not folder:
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+
+def _allowed_suffix(filename: str) -> str:
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Unsupported file type '{suffix}'. Allowed formats: "
+                "txt, md, csv, pdf, docx, pptx, png, jpg, jpeg and gif."
+            ),
+        )
+    return suffix
+
+
+def _storage_folder_of(storage_path: str) -> str:
+    # "/<user>/<project>/user/<folder...>/<name><ext>" -> "<folder...>"
+    parts = storage_path.strip("/").split("/")
+    return "/".join(parts[3:-1]) or "root"
+
+
 @router.post("/{project_id}/files/upload", response_model=UploadResponse)
 async def upload_files(
     project_id: int,
@@ -53,18 +92,7 @@ async def upload_files(
     access: ProjectAccessContext = Depends(require_permission(Permission.FILE_WRITE)),
     db: Session = Depends(get_db),
 ):
-    if folder_id is not None:
-        folder = (
-            db.query(Folder)
-            .filter(
-                Folder.id == folder_id,
-                Folder.project_id == project_id,
-                Folder.is_deleted == False,
-            )
-            .first()
-        )
-        if not folder:
-            raise HTTPException(status_code=404, detail="Folder not found")
+    _ensure_upload_folder(db, project_id, folder_id)
 
     uploaded_files = []
     storage_folder = path.strip("/") or "root"
@@ -74,15 +102,7 @@ async def upload_files(
             if not file.filename or not has_extension(file.filename):
                 continue
 
-            suffix = os.path.splitext(file.filename)[1].lower()
-            if suffix not in ALLOWED_EXTENSIONS:
-                raise HTTPException(
-                    status_code=400,
-                    detail=(
-                        f"Unsupported file type '{suffix}'. Allowed formats: "
-                        "txt, md, csv, pdf, docx, pptx, png, jpg, jpeg and gif."
-                    ),
-                )
+            suffix = _allowed_suffix(file.filename)
 
             file_name = os.path.splitext(file.filename)[0]
             unique_title = get_unique_diagram_name(db, file_name, project_id, suffix)
@@ -90,20 +110,7 @@ async def upload_files(
             binary_content = await file.read()
             file_size_kb = round(len(binary_content) / 1024, 2)
 
-            try:
-                raw_text = extract_text_from_binary(binary_content, suffix)
-            except Exception as exc:
-                raise HTTPException(
-                    status_code=500,
-                    detail=(
-                        f"Failed to extract raw text from {file.filename}: {str(exc)}"
-                    ),
-                )
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(binary_content)
-                tmp_path = tmp.name
-
+            # Raw text is extracted by process_markdown_task, off the event loop.
             try:
                 file.file.seek(0)
                 raw_filename = (
@@ -121,9 +128,6 @@ async def upload_files(
                         f"{file.filename}: {str(exc)}"
                     ),
                 )
-            finally:
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
 
             raw_record = Files(
                 project_id=project_id,
@@ -131,7 +135,7 @@ async def upload_files(
                 created_by=access.user.id,
                 updated_by=access.user.id,
                 name=unique_title,
-                content=raw_text,
+                content=None,
                 extension=suffix,
                 storage_path=raw_url,
                 file_category="user upload",
@@ -164,7 +168,7 @@ async def upload_files(
                     name=raw_record.name,
                     size_kb=file_size_kb,
                     type=raw_record.extension,
-                    content=raw_text,
+                    content=None,
                     created_at=raw_record.created_at,
                     status=raw_record.status,
                 )
@@ -180,8 +184,160 @@ async def upload_files(
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@router.post(
+    "/{project_id}/files/uploads/sign", response_model=SignedUploadResponse
+)
+async def sign_file_uploads(
+    project_id: int,
+    payload: SignedUploadRequest,
+    access: ProjectAccessContext = Depends(require_permission(Permission.FILE_WRITE)),
+    db: Session = Depends(get_db),
+):
+    """Phase one of a direct upload: reserve a file record per file and
+    return presigned URLs the client uploads the bytes to."""
+    _ensure_upload_folder(db, project_id, payload.folder_id)
+    storage_folder = payload.path.strip("/") or "root"
+    backend = get_storage_backend()
+
+    uploads = []
+    try:
+        for item in payload.files:
+            if not has_extension(item.filename):
+                raise HTTPException(
+                    status_code=400, detail=f"File '{item.filename}' has no extension"
+                )
+            suffix = _allowed_suffix(item.filename)
+            file_name = os.path.splitext(item.filename)[0]
+            unique_title = get_unique_diagram_name(db, file_name, project_id, suffix)
+            storage_path = sanitize_filename(
+                f"/{access.user.id}/{project_id}/user/"
+                f"{storage_folder}/{unique_title}{suffix}"
+            )
+
+            signed = await backend.create_signed_upload(storage_path)
+
+            record = Files(
+                project_id=project_id,
+                folder_id=payload.folder_id,
+                created_by=access.user.id,
+                updated_by=access.user.id,
+                name=unique_title,
+                extension=suffix,
+                storage_path=storage_path,
+                file_category="user upload",
+                file_size=round((item.size_bytes or 0) / 1024, 2),
+                file_type=suffix,
+                status=FILE_STATUS_UPLOADING,
+            )
+            db.add(record)
+            # Flush so the next file's unique name sees this one.
+            db.flush()
+
+            uploads.append(
+                SignedUploadItem(
+                    id=str(record.id),
+                    name=record.name,
+                    storage_path=storage_path,
+                    upload_url=signed.url,
+                    token=signed.token,
+                )
+            )
+
+        db.commit()
+        return SignedUploadResponse(status="ok", uploads=uploads)
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as exc:
+        db.rollback()
+        logger.exception(f"Failed to sign uploads for project {project_id}: {exc}")
+        raise HTTPException(status_code=500, detail="Failed to prepare upload")
+
+
+@router.post(
+    "/{project_id}/files/uploads/complete", response_model=UploadResponse
+)
+async def complete_file_uploads(
+    project_id: int,
+    payload: CompleteUploadRequest,
+    access: ProjectAccessContext = Depends(require_permission(Permission.FILE_WRITE)),
+    db: Session = Depends(get_db),
+):
+    """Phase two of a direct upload: confirm the bytes are in storage and
+    enqueue the processing pipeline. Completing a file twice is a no-op."""
+    backend = get_storage_backend()
+    records = []
+    to_process = []
+
+    for file_id in payload.file_ids:
+        record = (
+            db.query(Files)
+            .filter(
+                Files.id == file_id,
+                Files.project_id == project_id,
+                Files.status != "deleted",
+            )
+            .first()
+        )
+        if not record:
+            raise HTTPException(status_code=404, detail=f"File {file_id} not found")
+
+        if record.status == FILE_STATUS_UPLOADING:
+            size = await backend.stat(record.storage_path)
+            if size is None:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"File '{record.name}' has not been uploaded yet",
+                )
+            # Claim the row: of two concurrent completes only the one whose
+            # UPDATE matched enqueues the pipeline; the other waits on the
+            # row lock, matches nothing and just reports the file.
+            claimed = (
+                db.query(Files)
+                .filter(Files.id == record.id, Files.status == FILE_STATUS_UPLOADING)
+                .update(
+                    {"status": "pending", "file_size": round(size / 1024, 2)},
+                    synchronize_session=False,
+                )
+            )
+            if claimed:
+                to_process.append(record)
+        records.append(record)
+
+    db.commit()
+    for record in records:
+        db.refresh(record)
+
+    for record in to_process:
+        chain(
+            process_markdown_task.s(
+                str(record.id), None, _storage_folder_of(record.storage_path)
+            ),
+            extract_metadata_task.s(),
+            index_rag_task.s(),
+        ).apply_async()
+
+    return UploadResponse(
+        status="ok",
+        files=[
+            UploadedFileResponse(
+                id=str(record.id),
+                name=record.name,
+                size_kb=float(record.file_size or 0),
+                type=record.extension,
+                content=record.content,
+                created_at=record.created_at,
+                status=record.status,
+            )
+            for record in records
+        ],
+    )
+
+
 @router.get("/{project_id}/files/{file_id}/export")
 async def export_file(
+    request: Request,
     project_id: int,
     file_id: str,
     access: ProjectAccessContext = Depends(require_permission(Permission.FILE_READ)),
@@ -200,22 +356,7 @@ async def export_file(
         raise HTTPException(status_code=404, detail="File not found")
 
     try:
-        file_stream = await download_file_from_supabase(doc.storage_path)
-        filename = f"{doc.name}{doc.extension or ''}"
-        media_type, _ = mimetypes.guess_type(filename)
-        if not media_type:
-            media_type = "application/octet-stream"
-
-        return StreamingResponse(
-            file_stream,
-            media_type=media_type,
-            headers={
-                "Content-Disposition": (
-                    f'attachment; filename="{filename}"; '
-                    f"filename*=UTF-8''{quote(filename)}"
-                )
-            },
-        )
+        return await storage_file_response(request, doc)
     except HTTPException:
         raise
     except Exception as exc:
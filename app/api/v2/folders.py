@@ -1,16 +1,24 @@
 from datetime import datetime, timezone
+from typing import Optional, Set
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.rbac import Permission, ProjectAccessContext, require_permission
 from app.models.deletion_job import DeletionJob
-from app.models.file import Files
+from app.models.file import HIDDEN_FILE_STATUSES, Files
 from app.models.folder import Folder
 from app.schemas.folder import CreateFolderRequest, UpdateFolderRequest
 from app.services.deletion_service import background_hard_delete_files
+from app.services.file_listing import (
+    INCLUDE_DESCRIPTION,
+    defer_heavy_columns,
+    file_content,
+    file_metadata,
+    parse_include,
+)
 
 router = APIRouter()
 
@@ -28,7 +36,7 @@ def serialize_folder(folder: Folder):
     }
 
 
-def serialize_file(file: Files):
+def serialize_file(file: Files, include: Set[str] = frozenset()):
     return {
         "id": file.id,
         "project_id": file.project_id,
@@ -38,11 +46,11 @@ def serialize_file(file: Files):
         "name": file.name,
         "extension": file.extension,
         "storage_path": file.storage_path,
-        "content": file.content,
+        "content": file_content(file, include),
         "file_category": file.file_category,
         "file_type": file.file_type,
         "file_size": file.file_size,
-        "file_metadata": file.file_metadata or {},
+        "file_metadata": file_metadata(file, include),
         "status": file.status,
         "created_at": file.created_at,
         "updated_at": file.updated_at,
@@ -117,6 +125,7 @@ async def create_folder(
 async def get_folder_contents(
     project_id: int,
     folder_id: int,
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     access: ProjectAccessContext = Depends(require_permission(Permission.FOLDER_READ)),
     db: Session = Depends(get_db),
 ):
@@ -142,19 +151,19 @@ async def get_folder_contents(
         .all()
     )
 
-    files = (
-        db.query(Files)
-        .filter(
+    include = parse_include(include)
+    files = defer_heavy_columns(
+        db.query(Files).filter(
             Files.folder_id == folder_id,
             Files.project_id == project_id,
-            Files.status != "deleted",
-        )
-        .all()
-    )
+            Files.status.notin_(HIDDEN_FILE_STATUSES),
+        ),
+        include,
+    ).all()
 
     return {
         "folders": [serialize_folder(child) for child in folders],
-        "files": [serialize_file(file) for file in files],
+        "files": [serialize_file(file, include) for file in files],
     }
 
 
@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from typing import Optional, Set
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import asc, desc
@@ -11,9 +12,16 @@ from app.models.project import Project
 from app.models.project_member import ProjectMember
 from app.models.role import Role
 from app.models.user import User
-from app.models.file import Files
+from app.models.file import HIDDEN_FILE_STATUSES, Files
 from app.models.folder import Folder
 from app.schemas.file import GetFileResponse
+from app.services.file_listing import (
+    INCLUDE_DESCRIPTION,
+    defer_heavy_columns,
+    file_content,
+    file_metadata,
+    parse_include,
+)
 from app.schemas.folder import FolderNode
 from app.schemas.project import (
     GetProjectChildResponse,
@@ -56,7 +64,7 @@ def serialize_folder(folder: Folder):
     }
 
 
-def serialize_file(file: Files):
+def serialize_file(file: Files, include: Set[str] = frozenset()):
     return {
         "id": file.id,
         "project_id": file.project_id,
@@ -66,11 +74,11 @@ def serialize_file(file: Files):
         "name": file.name,
         "extension": file.extension,
         "storage_path": file.storage_path,
-        "content": file.content,
+        "content": file_content(file, include),
         "file_category": file.file_category,
         "file_type": file.file_type,
         "file_size": file.file_size,
-        "file_metadata": file.file_metadata or {},
+        "file_metadata": file_metadata(file, include),
         "status": file.status,
         "created_at": file.created_at,
         "updated_at": file.updated_at,
@@ -175,6 +183,7 @@ async def get_project(
 @router.get("/{project_id}/contents", response_model=GetProjectChildResponse)
 async def get_root_contents(
     project_id: int,
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     access: ProjectAccessContext = Depends(require_permission(Permission.PROJECT_READ)),
     db: Session = Depends(get_db),
 ):
@@ -187,25 +196,26 @@ async def get_root_contents(
         )
         .all()
     )
-    files = (
-        db.query(Files)
-        .filter(
+    include = parse_include(include)
+    files = defer_heavy_columns(
+        db.query(Files).filter(
             Files.project_id == project_id,
             Files.folder_id.is_(None),
-            Files.status != "deleted",
-        )
-        .all()
-    )
+            Files.status.notin_(HIDDEN_FILE_STATUSES),
+        ),
+        include,
+    ).all()
 
     return {
         "folders": [serialize_folder(folder) for folder in folders],
-        "files": [serialize_file(file) for file in files],
+        "files": [serialize_file(file, include) for file in files],
     }
 
 
 @router.get("/{project_id}/tree", response_model=GetProjectTreeResponse)
 async def get_project_tree(
     project_id: int,
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     access: ProjectAccessContext = Depends(require_permission(Permission.PROJECT_READ)),
     db: Session = Depends(get_db),
 ):
@@ -214,11 +224,14 @@ async def get_project_tree(
         .filter(Folder.project_id == project_id, Folder.is_deleted == False)
         .all()
     )
-    files = (
-        db.query(Files)
-        .filter(Files.project_id == project_id, Files.status != "deleted")
-        .all()
-    )
+    include = parse_include(include)
+    files = defer_heavy_columns(
+        db.query(Files).filter(
+            Files.project_id == project_id,
+            Files.status.notin_(HIDDEN_FILE_STATUSES),
+        ),
+        include,
+    ).all()
 
     root_files = []
     root_folders = []
@@ -238,24 +251,7 @@ async def get_project_tree(
         )
 
     for file in files:
-        file_node = GetFileResponse(
-            id=file.id,
-            project_id=file.project_id,
-            folder_id=file.folder_id,
-            created_by=file.created_by,
-            updated_by=file.updated_by,
-            name=file.name,
-            extension=file.extension,
-            storage_path=file.storage_path,
-            content=file.content,
-            file_category=file.file_category,
-            file_type=file.file_type,
-            file_size=file.file_size,
-            file_metadata=file.file_metadata or {},
-            status=file.status,
-            created_at=file.created_at,
-            updated_at=file.updated_at,
-        )
+        file_node = GetFileResponse(**serialize_file(file, include))
         if not file.folder_id:
             root_files.append(file_node)
         elif file.folder_id in folder_map:
@@ -0,0 +1,53 @@
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.rag_database import get_rag_db
+from app.core.rbac import Permission, ProjectAccessContext, require_permission
+from app.schemas.rag import RagSearchHit, RagSearchResponse
+from app.services.rag_retrieval import search_rag_chunks
+from app.utils.rag_indexer import embed_query
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/{project_id}/rag/search", response_model=RagSearchResponse)
+def search_project_rag(
+    project_id: int,
+    q: str = Query(..., min_length=1, max_length=2000),
+    k: int = Query(10, ge=1, le=50),
+    document_type: Optional[List[str]] = Query(None),
+    ef_search: Optional[int] = Query(None, ge=1, le=1000),
+    min_similarity: float = Query(0.0, ge=-1.0, le=1.0),
+    access: ProjectAccessContext = Depends(require_permission(Permission.FILE_READ)),
+    rag_db: Session = Depends(get_rag_db),
+):
+    try:
+        query_embedding = embed_query(q)
+    except Exception as e:
+        logger.error(f"Failed to embed RAG query for project {project_id}: {e}")
+        raise HTTPException(status_code=502, detail="Embedding service unavailable")
+
+    try:
+        hits = search_rag_chunks(
+            rag_db,
+            project_ids=[project_id],
+            query_embedding=query_embedding,
+            k=k,
+            document_types=document_type,
+            ef_search=ef_search,
+            min_similarity=min_similarity,
+        )
+    except Exception as e:
+        logger.error(f"RAG search failed for project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    return RagSearchResponse(
+        query=q,
+        project_id=project_id,
+        k=k,
+        results=[RagSearchHit(**hit) for hit in hits],
+    )
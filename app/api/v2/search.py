@@ -1,8 +1,23 @@
+import asyncio
 import math
 import logging
+from typing import Optional
 from app.api.v1.auth import get_current_user
+from app.core.rbac import Permission, check_permission
+from app.models.file import Files
 from app.models.user import User
-from app.schemas.global_search import SearchResponse, SearchResultItem
+from app.schemas.global_search import (
+    HybridSearchResponse,
+    HybridSearchResultItem,
+    SearchResponse,
+    SearchResultItem,
+)
+from app.services.global_search import (
+    count_search_matches,
+    decode_cursor,
+    fetch_search_page,
+)
+from app.services.rag_retrieval import hybrid_search_rag_chunks
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -17,9 +32,12 @@ def global_search(
     keyword: str = Query(..., min_length=1, max_length=100),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: str = Query("exact", pattern="^(exact|approximate|none)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    keyset = decode_cursor(cursor) if cursor else None
     try:
         # Get projects owned by the user
         project_rows = db.execute(
@@ -33,38 +51,20 @@ def global_search(
             return SearchResponse(
                 keyword=keyword, total=0, page=page, total_pages=0, results=[]
             )
-        offset = (page - 1) * limit
-
-        # Use raw SQL for efficient full-text search with pagination
-        search_query = text("""
-            SELECT 
-                entity_id, 
-                entity_type, 
-                project_id,
-                title, 
-                ts_rank(search_vector, websearch_to_tsquery('english', :keyword)) AS rank,
-                COUNT(*) OVER() AS total_count
-            FROM 
-                global_search_index
-            WHERE 
-                search_vector @@ websearch_to_tsquery('english', :keyword)
-                AND project_id = ANY(:project_ids)
-            ORDER BY 
-                rank DESC
-            LIMIT :limit OFFSET :offset
-        """)
-
-        search_results = db.execute(
-            search_query,
-            {
-                "keyword": keyword,
-                "project_ids": project_ids,
-                "limit": limit,
-                "offset": offset,
-            },
-        ).fetchall()
-        total_records = search_results[0].total_count if search_results else 0
-        total_pages = math.ceil(total_records / limit) if total_records > 0 else 0
+        search_results, next_cursor = fetch_search_page(
+            db,
+            keyword=keyword,
+            project_ids=project_ids,
+            limit=limit,
+            cursor=keyset,
+            offset=(page - 1) * limit,
+        )
+        total_records, approximate = count_search_matches(
+            db, keyword=keyword, project_ids=project_ids, mode=count
+        )
+        total_pages = (
+            math.ceil(total_records / limit) if total_records is not None else None
+        )
         results = [
             SearchResultItem(
                 entity_id=row.entity_id,
@@ -79,11 +79,103 @@ def global_search(
         return SearchResponse(
             keyword=keyword,
             total=total_records,
+            total_is_approximate=approximate,
             page=page,
             total_pages=total_pages,
+            next_cursor=next_cursor,
             results=results,
         )
 
     except Exception as e:
         logger.error(f"Error fetching user projects: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def _hybrid_project_ids(
+    db: Session, current_user: User, project_id: Optional[int]
+) -> list:
+    if project_id is not None:
+        check_permission(
+            project_id=project_id,
+            current_user=current_user,
+            db=db,
+            permission=Permission.FILE_READ,
+        )
+        return [project_id]
+
+    project_rows = db.execute(
+        text("""
+            SELECT project_id from project_members WHERE user_id = :user_id
+        """),
+        {"user_id": current_user.id},
+    ).fetchall()
+    return [row.project_id for row in project_rows]
+
+
+def _file_names(db: Session, file_ids: set) -> dict:
+    if not file_ids:
+        return {}
+    return {
+        str(file.id): file.name
+        for file in db.query(Files.id, Files.name).filter(Files.id.in_(file_ids))
+    }
+
+
+@router.get("/hybrid", response_model=HybridSearchResponse)
+async def hybrid_search(
+    keyword: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    project_id: Optional[int] = Query(None),
+    budget_ms: Optional[int] = Query(None, ge=100, le=10000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # The session is synchronous: keep its queries off the event loop, like
+    # the search legs themselves.
+    project_ids = await asyncio.to_thread(
+        _hybrid_project_ids, db, current_user, project_id
+    )
+
+    if not project_ids:
+        return HybridSearchResponse(
+            keyword=keyword, total=0, partial=False, missing_sources=[], results=[]
+        )
+
+    try:
+        hits, missing = await hybrid_search_rag_chunks(
+            project_ids=project_ids,
+            keyword=keyword,
+            limit=limit,
+            budget_ms=budget_ms,
+        )
+    except Exception as e:
+        logger.error(f"Hybrid search failed: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    file_names = await asyncio.to_thread(
+        _file_names, db, {hit["file_id"] for hit in hits}
+    )
+
+    results = [
+        HybridSearchResultItem(
+            chunk_id=hit["id"],
+            file_id=hit["file_id"],
+            file_name=file_names.get(hit["file_id"]),
+            project_id=hit["project_id"],
+            document_type=hit["document_type"],
+            chunk_index=hit["chunk_index"],
+            content=hit["content"],
+            score=round(hit["score"], 6),
+            lexical_rank=hit.get("lexical_rank"),
+            semantic_rank=hit.get("semantic_rank"),
+        )
+        for hit in hits
+    ]
+
+    return HybridSearchResponse(
+        keyword=keyword,
+        total=len(results),
+        partial=bool(missing),
+        missing_sources=missing,
+        results=results,
+    )
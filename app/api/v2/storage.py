@@ -0,0 +1,31 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.utils.storage_backend import LocalStorageBackend, get_storage_backend
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.put("/uploads")
+async def put_signed_upload(
+    request: Request,
+    path: str = Query(...),
+    expires: int = Query(...),
+    token: str = Query(...),
+):
+    """Signed-upload target for the local storage backend.
+
+    Supabase clients upload to the URL Supabase signed; this route only
+    exists so the two-phase upload flow also works with STORAGE_BACKEND=local.
+    """
+    backend = get_storage_backend()
+    if not isinstance(backend, LocalStorageBackend):
+        raise HTTPException(status_code=404, detail="Not found")
+    if not backend.verify_upload_token(path, expires, token):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload token")
+
+    size = await backend.write_stream(path, request.stream())
+    logger.info(f"Stored signed upload {path} ({size} bytes)")
+    return {"path": path, "size": size}
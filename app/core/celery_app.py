@@ -1,9 +1,12 @@
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
+from app.services.ai_credentials import start_ai_credentials_listener
 
 # don't delete all models below
 from app.models.ai_credential import AICredential
 from app.models.ai_provider_model import AIProviderModel
+from app.models.ai_transcript import AITranscript
 from app.models.custom_document_format import CustomDocumentFormat
 from app.models.deletion_job import DeletionJob
 from app.models.file import Files
@@ -13,6 +16,7 @@ from app.models.project import Project
 from app.models.project_member import ProjectMember
 from app.models.role import Role
 from app.models.session import Chat_Session
+from app.models.step_job import StepJob, StepJobDocument
 from app.models.token import Token
 from app.models.user import User
 from app.models.user_identity import UserIdentity
@@ -23,7 +27,7 @@ celery_app = Celery(
     "ba_copilot",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["app.tasks.file_tasks"],
+    include=["app.tasks.file_tasks", "app.tasks.step_tasks"],
 )
 
 celery_app.conf.update(
@@ -35,6 +39,36 @@ celery_app.conf.update(
     task_acks_late=True,
     worker_prefetch_multiplier=1,
     task_reject_on_worker_lost=True,
+    # Step generation holds a worker for minutes at a time; keep it on its own
+    # queue so uploads, indexing and the beat jobs are never stuck behind it.
+    task_routes={
+        "run_step_job_task": {"queue": "generation"},
+    },
+    beat_schedule={
+        "prune-rag-embedding-cache": {
+            "task": "prune_rag_embedding_cache_task",
+            "schedule": 24 * 60 * 60,
+        },
+        "ensure-rag-hnsw-index": {
+            "task": "ensure_rag_hnsw_index_task",
+            "schedule": 60 * 60,
+        },
+        "cleanup-abandoned-uploads": {
+            "task": "cleanup_abandoned_uploads_task",
+            "schedule": 60 * 60,
+        },
+        "requeue-stale-step-jobs": {
+            "task": "requeue_stale_step_jobs_task",
+            "schedule": 60,
+        },
+    },
 )
 
+
+@worker_process_init.connect
+def subscribe_to_ai_credential_changes(**kwargs):
+    # Step generation runs here, so revoked keys must be evicted here too.
+    start_ai_credentials_listener()
+
+
 # celery_app.autodiscover_tasks(["app.tasks"])
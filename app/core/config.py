@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
-from typing import Optional, List
+from pydantic import ConfigDict, field_validator
+from typing import Dict, Optional, List
 from dotenv import load_dotenv
 import os
 
@@ -42,15 +42,39 @@ class Settings(BaseSettings):
 
     supabase_url: Optional[str] = None
     supabase_key: Optional[str] = None
+    # Object storage: "supabase", or "local" (files under storage_local_root)
+    storage_backend: str = "supabase"
+    storage_local_root: str = "./storage"
+    storage_max_workers: int = 8
+    storage_stream_chunk_size: int = 65536
+    # Direct uploads not completed within this window are discarded
+    storage_signed_upload_ttl_seconds: int = 7200
     rag_database_url: Optional[str] = os.getenv("RAG_DATABASE_URL")
 
     openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY", None)
     openai_embedding_model: str = "text-embedding-3-small"
     openai_url: str = os.getenv("OPENROUTER_BASE_URL")
 
+    rag_embedding_dimensions: int = 1536
+    # vector: float32, halfvec: float16, binary: bit-quantized index + exact re-rank
+    rag_vector_storage: str = "vector"
+    rag_binary_rerank_factor: int = 4
     rag_chunk_size: int = 500
     rag_chunk_overlap: int = 70
     rag_embed_batch_size: int = 64
+    rag_embed_max_batch_tokens: int = 250000
+    rag_embed_concurrency: int = 4
+    rag_insert_page_size: int = 200
+    rag_incremental_reindex: bool = True
+    rag_embedding_cache_enabled: bool = True
+    rag_embedding_cache_ttl_days: int = 30
+    rag_embedding_cache_max_entries: int = 200000
+    rag_hnsw_m: int = 16
+    rag_hnsw_ef_construction: int = 64
+    rag_hnsw_ef_search: int = 40
+    rag_hnsw_iterative_scan: str = "relaxed_order"
+    rag_hybrid_rrf_k: int = 60
+    rag_hybrid_budget_ms: int = 1500
 
     ai_service_url_srs: str
     ai_service_url_wireframe: str
@@ -87,6 +111,62 @@ class Settings(BaseSettings):
     ai_service_url_metadata_extraction: str = "http://ai:8000/api/v1/metadata/extract"
     ai_service_url_rag_index: str = "http://ai:8000/api/v1/rag/index"
 
+    # Shared AI HTTP client
+    ai_http2: bool = True
+    ai_http_max_connections: int = 50
+    ai_http_max_keepalive_connections: int = 20
+    ai_http_keepalive_expiry: float = 30.0
+    ai_connect_timeout: float = 10
+    ai_read_timeout: float = 180
+    # URL path -> read timeout (seconds), e.g. {"/api/v1/metadata/extract": 60}
+    ai_endpoint_read_timeouts: Dict[str, float] = {}
+    # Stream step generation output to WebSocket clients as doc_delta events
+    ai_streaming_enabled: bool = False
+    # Share identical generation calls (in flight and for a short TTL)
+    ai_response_dedupe_enabled: bool = True
+    ai_response_cache_ttl_seconds: int = 120
+
+    # AI admission control (per process)
+    ai_governor_enabled: bool = True
+    ai_max_concurrent_per_user: int = 4
+    ai_user_queue_limit: int = 20
+    ai_global_rate_per_second: float = 10.0
+    ai_global_burst: int = 20
+    ai_queue_timeout_seconds: float = 30.0
+
+    # AI circuit breaker and retry budget
+    ai_circuit_failure_threshold: int = 5
+    ai_circuit_recovery_seconds: float = 30.0
+    ai_circuit_half_open_max_calls: int = 1
+    ai_retry_budget_ratio: float = 0.1
+    ai_retry_budget_min_retries: int = 3
+    ai_retry_budget_window_seconds: float = 60.0
+
+    # Resolved AI credential headers, per process
+    ai_headers_cache_ttl_seconds: int = 300
+
+    # Step generation: documents generated concurrently per step
+    step_max_parallel_documents: int = 3
+    # Also wait for "recommended" documents, not just "required" ones
+    step_dag_include_recommended: bool = False
+    # Step jobs run on Celery workers; a running job heartbeats every
+    # step_job_heartbeat_seconds and is requeued once it has been silent
+    # for step_job_stale_seconds, up to step_job_max_attempts times.
+    step_job_heartbeat_seconds: float = 15.0
+    step_job_stale_seconds: int = 120
+    step_job_max_attempts: int = 3
+    # How often an attached WebSocket checks whether its job has finished
+    step_job_poll_seconds: float = 2.0
+
+    # Global search
+    search_count_cache_ttl_seconds: int = 60
+    search_approximate_count_cap: int = 1000
+    search_backfill_batch_size: int = 500
+
+    # AI transcripts (zlib level 1-9; rows per batch for compact_ai_transcripts)
+    ai_transcript_compress_level: int = 6
+    ai_transcript_compact_batch_size: int = 200
+
     # Google OAuth2 config
     google_client_id: str
     google_client_secret: str
@@ -97,4 +177,27 @@ class Settings(BaseSettings):
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/0"
     TEMP_STORAGE_PATH: str = "temp_storage"
 
+    @field_validator("rag_vector_storage")
+    @classmethod
+    def rag_vector_storage_supported(cls, value: str) -> str:
+        normalized = value.strip().lower()
+        if normalized not in {"vector", "halfvec", "binary"}:
+            raise ValueError("rag_vector_storage must be vector, halfvec or binary")
+        return normalized
+
+    @field_validator("storage_backend")
+    @classmethod
+    def storage_backend_supported(cls, value: str) -> str:
+        normalized = value.strip().lower()
+        if normalized not in {"supabase", "local"}:
+            raise ValueError("storage_backend must be supabase or local")
+        return normalized
+
+    @field_validator("rag_embedding_dimensions")
+    @classmethod
+    def rag_embedding_dimensions_positive(cls, value: int) -> int:
+        if value <= 0:
+            raise ValueError("rag_embedding_dimensions must be positive")
+        return value
+
 settings = Settings()
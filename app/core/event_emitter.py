@@ -13,7 +13,10 @@ class RedisEventEmitter(EventEmitter):
         self.r = redis.Redis.from_url(settings.CELERY_BROKER_URL)
 
     def emit(self, event: dict):
-        self.r.publish("events", json.dumps(event))
+        self.publish("events", event)
+
+    def publish(self, channel: str, event: dict):
+        self.r.publish(channel, json.dumps(event))
 
 
 emitter = RedisEventEmitter()
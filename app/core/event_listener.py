@@ -4,6 +4,7 @@ import logging
 import redis.asyncio as redis
 
 from app.core.config import settings
+from app.services.ai_credentials import AI_CREDENTIALS_CHANNEL, evict_ai_headers
 from app.services.step_ws_notifier import StepWSNotifier
 
 logger = logging.getLogger(__name__)
@@ -13,8 +14,8 @@ async def redis_event_listener():
     r = redis.from_url(settings.CELERY_BROKER_URL)
     pubsub = r.pubsub()
 
-    await pubsub.subscribe("events")
-    logger.info("Subscribed to Redis channel: events")
+    await pubsub.subscribe("events", AI_CREDENTIALS_CHANNEL)
+    logger.info(f"Subscribed to Redis channels: events, {AI_CREDENTIALS_CHANNEL}")
 
     try:
         async for message in pubsub.listen():
@@ -22,7 +23,19 @@ async def redis_event_listener():
                 continue
 
             data = json.loads(message["data"])
-            logger.info(f"Received event: {data}")
+
+            if message["channel"] in (AI_CREDENTIALS_CHANNEL, AI_CREDENTIALS_CHANNEL.encode()):
+                evict_ai_headers(data["user_id"])
+                continue
+
+            # Step events carry streamed tokens and whole generated documents;
+            # keep INFO to one line per event and skip the per-token deltas.
+            if data.get("type") != "doc_delta":
+                logger.info(
+                    f"Received event type={data.get('type')} "
+                    f"project_id={data.get('project_id')} step={data.get('step')}"
+                )
+            logger.debug(f"Received event: {data}")
 
             notifier = StepWSNotifier(data["project_id"], data["step"])
 
@@ -30,6 +43,6 @@ async def redis_event_listener():
 
     except asyncio.CancelledError:
         logger.info("Redis listener shutting down...")
-        await pubsub.unsubscribe("events")
+        await pubsub.unsubscribe("events", AI_CREDENTIALS_CHANNEL)
         await pubsub.close()
         raise
@@ -1,17 +1,81 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
 rag_database_url = settings.rag_database_url or settings.database_url
 rag_engine = create_engine(rag_database_url)
 RagSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=rag_engine)
 
+# pgvector's HNSW index accepts at most this many dimensions per column type.
+HNSW_MAX_DIMENSIONS = {"vector": 2000, "halfvec": 4000}
+
 
 def get_rag_db():
     db = RagSessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def rag_vector_type() -> str:
+    """SQL type of rag_chunks.embedding for the configured storage mode.
+
+    Binary mode keeps full-precision vectors for re-ranking and only
+    quantizes them inside the index expression.
+    """
+    return "halfvec" if settings.rag_vector_storage == "halfvec" else "vector"
+
+
+def expected_embedding_column_type() -> str:
+    return f"{rag_vector_type()}({settings.rag_embedding_dimensions})"
+
+
+def validate_rag_embedding_column(engine=None) -> None:
+    """Fail fast when rag_chunks.embedding disagrees with the embedding settings.
+
+    A mismatch would otherwise only surface as failed inserts in the indexing
+    worker. A missing table or unreachable RAG database is logged, not raised.
+    """
+    engine = engine or rag_engine
+    expected = expected_embedding_column_type()
+    try:
+        with engine.connect() as conn:
+            actual = conn.execute(
+                text(
+                    """
+                    SELECT format_type(atttypid, atttypmod)
+                    FROM pg_attribute
+                    WHERE attrelid = to_regclass('rag_chunks')
+                      AND attname = 'embedding'
+                      AND NOT attisdropped
+                    """
+                )
+            ).scalar()
+    except Exception as e:
+        logger.warning(f"Could not verify rag_chunks.embedding type: {e}")
+        return
+
+    if actual is None:
+        logger.warning("rag_chunks table not found; skipping embedding type check")
+        return
+
+    if actual != expected:
+        raise RuntimeError(
+            f"rag_chunks.embedding is {actual} but settings expect {expected} "
+            f"(RAG_EMBEDDING_DIMENSIONS={settings.rag_embedding_dimensions}, "
+            f"RAG_VECTOR_STORAGE={settings.rag_vector_storage}); "
+            "migrate the column or update the settings"
+        )
+
+    limit = HNSW_MAX_DIMENSIONS.get(settings.rag_vector_storage)
+    if limit is not None and settings.rag_embedding_dimensions > limit:
+        logger.warning(
+            f"{expected} exceeds the {limit}-dimension HNSW limit; "
+            "searches will fall back to exact scans"
+        )
@@ -27,12 +27,17 @@ from app.api.v2 import (
     planning as v2_planning,
     project_members as v2_project_members,
     projects as v2_projects,
+    rag as v2_rag,
     roles as v2_roles,
     search as v2_search,
+    storage as v2_storage,
 )
 
 from app.api.v1.ws import planning_ws, design_ws, analysis_ws, upload_file_notifier_ws
 from app.core.database import engine, Base
+from app.core.rag_database import validate_rag_embedding_column
+from app.services.search_index import install_search_index_triggers
+from app.utils.ai_http_client import close_ai_http_client, open_ai_http_client
 from app.core.event_listener import redis_event_listener
 import logging
 import asyncio
@@ -60,6 +65,16 @@ async def lifespan(app: FastAPI):
                 raise e
             await asyncio.sleep(2)
 
+    try:
+        install_search_index_triggers(engine)
+    except Exception as e:
+        logger.warning(f"Could not install global search triggers: {str(e)}")
+
+    # Refuse to start when rag_chunks cannot hold the configured embeddings.
+    validate_rag_embedding_column()
+
+    await open_ai_http_client()
+
     listener_task = asyncio.create_task(redis_event_listener())
     logger.info("Redis event listener started")
 
@@ -74,6 +89,8 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             logger.info("Redis listener cancelled")
 
+        await close_ai_http_client()
+
 
 app = FastAPI(
     title="BE Service - BA Copilot",
@@ -181,6 +198,8 @@ app.include_router(v2_design.router, prefix="/api/v2/projects", tags=["v2 design
 app.include_router(
     v2_analysis.router, prefix="/api/v2/projects", tags=["v2 analysis"]
 )
+app.include_router(v2_rag.router, prefix="/api/v2/projects", tags=["v2 rag"])
+app.include_router(v2_storage.router, prefix="/api/v2/storage", tags=["v2 storage"])
 
 
 @app.get("/")
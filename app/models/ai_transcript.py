@@ -0,0 +1,30 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class AITranscript(Base):
+    """The raw AI service response behind a generated document, stored once.
+
+    Files.metadata and the "ai" Chat_Session row only reference it by id.
+    """
+
+    __tablename__ = "ai_transcripts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(
+        Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    file_id = Column(
+        UUID(as_uuid=True).with_variant(String(36), "sqlite"),
+        ForeignKey("files.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # zlib-compressed JSON of the full call_ai_service result
+    response_zlib = Column(LargeBinary, nullable=False)
+    # Uncompressed JSON size in bytes; compare with length(response_zlib).
+    response_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -13,6 +13,11 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from app.core.database import Base
 
+FILE_STATUS_UPLOADING = "uploading"
+# Left out of listings and search: removed files, and direct uploads whose
+# bytes have not been confirmed in storage yet.
+HIDDEN_FILE_STATUSES = ("deleted", FILE_STATUS_UPLOADING)
+
 
 class Files(Base):
     __tablename__ = "files"
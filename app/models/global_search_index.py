@@ -11,9 +11,17 @@ class GlobalSearchIndex(Base):
     entity_type = Column(String(20))           
     project_id = Column(Integer, nullable=False)
     title = Column(Text)                       
-    search_vector = Column(TSVECTOR)
+    search_vector = Column(TSVECTOR().with_variant(Text(), "sqlite"))
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
 Index('idx_search_vector', GlobalSearchIndex.search_vector, postgresql_using='gin')
+# Kept in sync by the triggers in app/services/search_index.py, which upsert on
+# (entity_type, entity_id).
+Index(
+    'uq_global_search_entity',
+    GlobalSearchIndex.entity_type,
+    GlobalSearchIndex.entity_id,
+    unique=True,
+)
@@ -0,0 +1,61 @@
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class StepJob(Base):
+    __tablename__ = "step_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(
+        Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    step = Column(String(32), nullable=False)
+    status = Column(String(32), nullable=False, default="queued")
+    # project_name, description and documents as sent by the client
+    payload = Column(JSONB().with_variant(JSON(), "sqlite"), nullable=False)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    # Last time a run_step_job_task message was sent for the job
+    queued_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class StepJobDocument(Base):
+    """A document a step job has finished (its checkpoint).
+
+    Inserted in the same transaction as the generated Files row, so a
+    restarted job never regenerates a document that was already saved.
+    """
+
+    __tablename__ = "step_job_documents"
+    __table_args__ = (UniqueConstraint("job_id", "doc_index"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(
+        Integer, ForeignKey("step_jobs.id", ondelete="CASCADE"), nullable=False
+    )
+    doc_index = Column(Integer, nullable=False)
+    doc_type = Column(String(100), nullable=False)
+    # The generate response as sent in the doc_completed event
+    data = Column(JSONB().with_variant(JSON(), "sqlite"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
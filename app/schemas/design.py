@@ -30,7 +30,8 @@ class DesignGenerateResponse(BaseResponseModel):
 class GetDesignResponse(BaseResponseModel):
     document_id: str
     project_name: str
-    content: str
+    # None in listings unless requested with ?include=content
+    content: Optional[str] = None
     design_type: str
     file_category: str
     status: str
@@ -29,7 +29,7 @@ class UploadedFileResponse(BaseResponseModel):
     name: str
     size_kb: float
     type: str
-    content: str
+    content: Optional[str] = Field(None, description="Extracted text; empty until processing has run")
     status: str =Field(...,description="Status handling file")
     created_at: datetime = Field(..., description="Timestamp when the file was created")
 
@@ -37,3 +37,31 @@ class UploadedFileResponse(BaseResponseModel):
 class UploadResponse(BaseResponseModel):
     status: str
     files: List[UploadedFileResponse]
+
+
+class SignedUploadFile(BaseModel):
+    filename: str = Field(..., description="Original file name, including extension")
+    size_bytes: Optional[int] = Field(None, ge=0, description="Declared size in bytes")
+
+
+class SignedUploadRequest(BaseModel):
+    folder_id: Optional[int] = None
+    path: str = ""
+    files: List[SignedUploadFile]
+
+
+class SignedUploadItem(BaseModel):
+    id: str = Field(..., description="File id to pass to the complete endpoint")
+    name: str
+    storage_path: str
+    upload_url: str = Field(..., description="Presigned URL the client uploads the bytes to")
+    token: str
+
+
+class SignedUploadResponse(BaseResponseModel):
+    status: str
+    uploads: List[SignedUploadItem]
+
+
+class CompleteUploadRequest(BaseModel):
+    file_ids: List[str]
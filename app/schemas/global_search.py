@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class SearchResultItem(BaseModel):
@@ -12,7 +12,30 @@ class SearchResultItem(BaseModel):
 
 class SearchResponse(BaseModel):
     keyword: str
-    total: int
+    total: Optional[int] = None
+    total_is_approximate: bool = False
     page: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
     results: List[SearchResultItem]
+
+
+class HybridSearchResultItem(BaseModel):
+    chunk_id: str
+    file_id: str
+    file_name: Optional[str] = None
+    project_id: int
+    document_type: str
+    chunk_index: int
+    content: str
+    score: float
+    lexical_rank: Optional[int] = None
+    semantic_rank: Optional[int] = None
+
+
+class HybridSearchResponse(BaseModel):
+    keyword: str
+    total: int
+    partial: bool
+    missing_sources: List[str]
+    results: List[HybridSearchResultItem]
@@ -20,7 +20,8 @@ class PlanningGenerateResponse(BaseResponseModel):
 class GetPlanningResponse(BaseResponseModel):
     document_id: str
     project_name: str
-    content: str
+    # None in listings unless requested with ?include=content
+    content: Optional[str] = None
     doc_type: str
     file_category: str
     status: str
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class RagSearchHit(BaseModel):
+    id: str
+    file_id: str
+    project_id: int
+    document_type: str
+    chunk_index: int
+    content: str
+    token_count: Optional[int] = None
+    similarity: float
+
+
+class RagSearchResponse(BaseModel):
+    query: str
+    project_id: int
+    k: int
+    results: List[RagSearchHit]
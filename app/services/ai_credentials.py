@@ -1,10 +1,29 @@
-from typing import Optional
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.event_emitter import emitter
 from app.models.ai_credential import AICredential
 from app.utils.encryption import decrypt_api_key
 
+logger = logging.getLogger(__name__)
+
+AI_CREDENTIALS_CHANNEL = "ai_credentials"
+_RESUBSCRIBE_DELAY_SECONDS = 5
+
+# user_id -> (expires_at, headers resolved from the active credential)
+_headers_cache: Dict[int, Tuple[float, dict]] = {}
+# user_id -> eviction count, plus a count of full clears; a load that
+# raced an eviction is not cached.
+_headers_generation: Dict[int, int] = {}
+_headers_clears = 0
+_headers_cache_lock = threading.Lock()
+
 
 def get_active_ai_credential_for_user(
     db: Session,
@@ -21,16 +40,11 @@ def get_active_ai_credential_for_user(
     )
 
 
-def resolve_ai_headers_for_user(
-    db: Session,
-    user_id: int,
-    model: Optional[str] = None,
-) -> dict[str, str]:
+def _load_ai_headers(db: Session, user_id: int) -> dict[str, str]:
     credential = get_active_ai_credential_for_user(db, user_id)
     if not credential:
         return {}
 
-    resolved_model = model or credential.current_model
     decrypted_key = decrypt_api_key(
         credential.encrypted_api_key,
         credential.iv,
@@ -42,7 +56,100 @@ def resolve_ai_headers_for_user(
         "X-AI-API-Key": decrypted_key,
     }
 
-    if resolved_model:
-        headers["X-AI-Model"] = resolved_model
+    if credential.current_model:
+        headers["X-AI-Model"] = credential.current_model
+
+    return headers
+
+
+def _cache_generation(user_id: int) -> Tuple[int, int]:
+    # Call with _headers_cache_lock held.
+    return _headers_clears, _headers_generation.get(user_id, 0)
+
+
+def resolve_ai_headers_for_user(
+    db: Session,
+    user_id: int,
+    model: Optional[str] = None,
+) -> dict[str, str]:
+    now = time.monotonic()
+    with _headers_cache_lock:
+        cached = _headers_cache.get(user_id)
+        generation = _cache_generation(user_id)
+    if cached and cached[0] > now:
+        headers = cached[1]
+    else:
+        headers = _load_ai_headers(db, user_id)
+        ttl = settings.ai_headers_cache_ttl_seconds
+        if ttl > 0:
+            with _headers_cache_lock:
+                # Evicted while loading: what we read may be the old key.
+                if _cache_generation(user_id) == generation:
+                    _headers_cache[user_id] = (now + ttl, headers)
 
+    headers = dict(headers)
+    if headers and model:
+        headers["X-AI-Model"] = model
     return headers
+
+
+def evict_ai_headers(user_id: int) -> None:
+    """Drop this process's cached headers for ``user_id``."""
+    with _headers_cache_lock:
+        _headers_cache.pop(user_id, None)
+        _headers_generation[user_id] = _headers_generation.get(user_id, 0) + 1
+
+
+def invalidate_ai_headers_cache(user_id: int) -> None:
+    """Evict ``user_id`` here and tell every other process to do the same.
+
+    Call after any change to the user's credentials. API processes hear it
+    through the Redis event listener, Celery workers through
+    ``start_ai_credentials_listener``.
+    """
+    evict_ai_headers(user_id)
+    try:
+        emitter.publish(AI_CREDENTIALS_CHANNEL, {"user_id": user_id})
+    except Exception as e:
+        logger.warning(f"Could not broadcast AI credential change: {e}")
+
+
+def _listen_for_ai_credential_changes() -> None:
+    pubsub = emitter.r.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(AI_CREDENTIALS_CHANNEL)
+    # Changes published while we were not subscribed are lost; start clean.
+    global _headers_clears
+    with _headers_cache_lock:
+        _headers_cache.clear()
+        _headers_clears += 1
+    try:
+        for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            evict_ai_headers(json.loads(message["data"])["user_id"])
+    finally:
+        pubsub.close()
+
+
+def _run_ai_credentials_listener() -> None:
+    while True:
+        try:
+            _listen_for_ai_credential_changes()
+        except Exception as e:
+            logger.warning(f"AI credential listener disconnected: {e}")
+        time.sleep(_RESUBSCRIBE_DELAY_SECONDS)
+
+
+def start_ai_credentials_listener() -> threading.Thread:
+    """Evict cached headers in this process when credentials change.
+
+    For processes without the API's Redis event listener (Celery workers),
+    so a revoked key stops being used right away rather than after the TTL.
+    """
+    thread = threading.Thread(
+        target=_run_ai_credentials_listener,
+        name="ai-credentials-listener",
+        daemon=True,
+    )
+    thread.start()
+    return thread
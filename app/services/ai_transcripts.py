@@ -0,0 +1,160 @@
+import json
+import logging
+import zlib
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session, load_only
+
+from app.core.config import settings
+from app.models.ai_transcript import AITranscript
+from app.models.file import Files
+from app.models.session import Chat_Session
+
+logger = logging.getLogger(__name__)
+
+# Keys generation used to copy into Files.metadata before transcripts existed.
+LEGACY_METADATA_KEYS = ("message", "ai_response")
+
+
+def _serialize(ai_data: dict) -> bytes:
+    return json.dumps(ai_data, separators=(",", ":")).encode("utf-8")
+
+
+def _decompress(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _session_message(transcript_id: int, ai_inner) -> str:
+    summary = ai_inner.get("summary") if isinstance(ai_inner, dict) else None
+    return json.dumps({"transcript_id": transcript_id, "summary": summary or ""})
+
+
+def store_ai_transcript(db: Session, doc: Files, ai_data: dict) -> AITranscript:
+    """Add a compressed transcript for ``doc`` (already flushed) to the session."""
+    raw = _serialize(ai_data)
+    transcript = AITranscript(
+        project_id=doc.project_id,
+        file_id=doc.id,
+        response_zlib=zlib.compress(raw, settings.ai_transcript_compress_level),
+        response_size=len(raw),
+    )
+    db.add(transcript)
+    db.flush()
+    return transcript
+
+
+def attach_ai_transcript(db: Session, doc: Files, ai_data: dict) -> str:
+    """Store ``ai_data`` once and point ``doc`` at it.
+
+    Returns the message for the "ai" Chat_Session row: the transcript id and
+    the short summary, not another copy of the response.
+    """
+    transcript = store_ai_transcript(db, doc, ai_data)
+    metadata = {
+        key: value
+        for key, value in (doc.file_metadata or {}).items()
+        if key not in LEGACY_METADATA_KEYS
+    }
+    metadata["transcript_id"] = transcript.id
+    doc.file_metadata = metadata
+    return _session_message(transcript.id, (ai_data or {}).get("response"))
+
+
+def load_ai_transcripts(db: Session, transcript_ids: Iterable[int]) -> Dict[int, dict]:
+    """Decompressed transcripts by id, in one query."""
+    ids = {transcript_id for transcript_id in transcript_ids if transcript_id}
+    if not ids:
+        return {}
+    rows = (
+        db.query(AITranscript.id, AITranscript.response_zlib)
+        .filter(AITranscript.id.in_(ids))
+        .all()
+    )
+    return {row.id: _decompress(row.response_zlib) for row in rows}
+
+
+def _compact_file(db: Session, doc: Files) -> Optional[int]:
+    metadata = doc.file_metadata or {}
+    ai_data = metadata.get("ai_response")
+    transcript_id = None
+    if isinstance(ai_data, dict):
+        transcript_id = store_ai_transcript(db, doc, ai_data).id
+
+    compact = {k: v for k, v in metadata.items() if k not in LEGACY_METADATA_KEYS}
+    if transcript_id:
+        compact["transcript_id"] = transcript_id
+    doc.file_metadata = compact
+    return compact.get("transcript_id")
+
+
+def _compact_sessions(db: Session, doc: Files, sessions, ai_data, transcript_id) -> int:
+    compacted = 0
+    for session in sessions:
+        try:
+            ai_inner = json.loads(session.message)
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(ai_inner, dict) or "transcript_id" in ai_inner:
+            continue
+
+        if transcript_id and ai_data.get("response") == ai_inner:
+            session_transcript_id = transcript_id
+        else:
+            # An earlier generation: its full response only survives here.
+            session_transcript_id = store_ai_transcript(
+                db, doc, {"response": ai_inner}
+            ).id
+        session.message = _session_message(session_transcript_id, ai_inner)
+        compacted += 1
+    return compacted
+
+
+def compact_ai_transcripts(db: Session, *, batch_size: Optional[int] = None) -> dict:
+    """Move AI responses out of existing files and chat sessions.
+
+    Walks files by primary key and commits per batch. Idempotent: rows that
+    already reference a transcript are left as they are.
+    """
+    batch_size = batch_size or settings.ai_transcript_compact_batch_size
+    after = None
+    stats = {"files": 0, "sessions": 0}
+    while True:
+        query = (
+            db.query(Files)
+            .options(load_only(Files.id, Files.project_id, Files.file_metadata))
+            .filter(Files.file_category == "ai gen")
+        )
+        if after is not None:
+            query = query.filter(Files.id > after)
+        batch = query.order_by(Files.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        sessions_by_file: Dict[str, list] = {}
+        for session in db.query(Chat_Session).filter(
+            Chat_Session.content_id.in_([doc.id for doc in batch]),
+            Chat_Session.role == "ai",
+        ):
+            sessions_by_file.setdefault(str(session.content_id), []).append(session)
+
+        for doc in batch:
+            metadata = doc.file_metadata or {}
+            ai_data = metadata.get("ai_response")
+            transcript_id = metadata.get("transcript_id")
+            if any(key in metadata for key in LEGACY_METADATA_KEYS):
+                transcript_id = _compact_file(db, doc)
+                stats["files"] += 1
+            stats["sessions"] += _compact_sessions(
+                db,
+                doc,
+                sessions_by_file.get(str(doc.id), []),
+                ai_data if isinstance(ai_data, dict) else {},
+                transcript_id,
+            )
+        after = batch[-1].id
+        db.commit()
+        if len(batch) < batch_size:
+            break
+
+    logger.info(f"[TRANSCRIPTS] Compacted {stats}")
+    return stats
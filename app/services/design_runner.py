@@ -2,15 +2,26 @@ import asyncio
 import logging
 
 from fastapi import HTTPException
+
 from app.api.v2.design import (
     generate_design_doc,
 )
-from app.core.step_task_registry import StepTaskRegistry
 from app.core.database import SessionLocal
-from app.core.rbac import check_permission
-from app.core.rbac import Permission
+from app.services.generation_context import (
+    GenerationContext,
+    checkpoint_document,
+    use_generation_context,
+)
 from app.services.rag_postprocess import queue_rag_indexing
-from app.models.user import User
+from app.services.step_dag import (
+    DAG_ABORTED,
+    DAG_STOPPED,
+    NODE_ABORT,
+    NODE_DONE,
+    NODE_FAILED,
+    run_document_dag,
+)
+from app.utils.ai_streaming import doc_delta_sender, stream_ai_deltas
 
 logger = logging.getLogger(__name__)
 
@@ -23,118 +34,146 @@ async def run_design_step(
     current_user_id,
     notifier,
     stop_event: asyncio.Event = None,
+    checkpoints=None,
 ):
-    try:
-        await notifier.send({"type": "step_start", "step": "design"})
-
-        for index, doc in enumerate(documents):
-            if stop_event and stop_event.is_set():
-                logger.info(
-                    f"Project {project_id}: design generation stopped by user request."
-                )
-                await notifier.send(
-                    {
-                        "type": "step_stopped",
-                        "step": "design",
-                        "message": "User requested stop. Remaining tasks skipped.",
-                    }
-                )
-                break
-            # ------------------------------------
-
-            if asyncio.current_task().cancelled():
-                raise asyncio.CancelledError()
-
-            doc_type = doc["type"]
+    async def generate_one(index: int, doc: dict) -> str:
+        doc_type = doc["type"]
 
+        saved = checkpoints.get(index, doc_type) if checkpoints else None
+        if saved is not None:
+            # Finished before the job was restarted.
             await notifier.send(
                 {
-                    "type": "doc_start",
+                    "type": "doc_completed",
                     "step": "design",
                     "index": index,
                     "doc_type": doc_type,
+                    "data": saved,
+                    "resumed": True,
                 }
             )
+            return NODE_DONE
 
-            db = SessionLocal()
-
-            try:
-                current_user = db.query(User).filter(User.id == current_user_id).first()
+        await notifier.send(
+            {
+                "type": "doc_start",
+                "step": "design",
+                "index": index,
+                "doc_type": doc_type,
+            }
+        )
 
-                if not current_user:
-                    raise HTTPException(status_code=401, detail="User not found")
-
-                access = check_permission(
-                    project_id=project_id,
-                    current_user=current_user,
-                    db=db,
-                    permission=Permission.FILE_WRITE,
-                )
+        # One session per document: independent documents run concurrently.
+        db = SessionLocal()
 
+        try:
+            on_delta = doc_delta_sender(
+                notifier, step="design", index=index, doc_type=doc_type
+            )
+            # The checkpoint commits with the document, so a restarted job
+            # never generates a second copy of it.
+            stage = checkpoints.stager(index, doc_type) if checkpoints else None
+            with stream_ai_deltas(on_delta), use_generation_context(
+                context
+            ), checkpoint_document(stage):
                 result = await generate_design_doc(
                     project_id=project_id,
                     project_name=doc_type,
                     design_type=doc_type,
                     description=description,
-                    access=access,
+                    access=context.access,
                     db=db,
                 )
 
-                await notifier.send(
-                    {
-                        "type": "doc_completed",
-                        "step": "design",
-                        "index": index,
-                        "doc_type": doc_type,
-                        "data": result.model_dump(mode="json"),
-                    }
-                )
+            data = result.model_dump(mode="json")
+            await notifier.send(
+                {
+                    "type": "doc_completed",
+                    "step": "design",
+                    "index": index,
+                    "doc_type": doc_type,
+                    "data": data,
+                }
+            )
 
-                await queue_rag_indexing(
-                    step="design",
-                    file_id=result.document_id,
-                    doc_type=doc_type,
-                    markdown_text=result.document,
-                    emit_event=notifier.send,
-                )
+            await queue_rag_indexing(
+                step="design",
+                file_id=result.document_id,
+                doc_type=doc_type,
+                markdown_text=result.document,
+                emit_event=notifier.send,
+            )
+            return NODE_DONE
 
-            except asyncio.CancelledError:
-                logger.warning(
-                    f"[design][{doc_type}] Generation CANCELLED (Hard stop)."
-                )
-                raise
-
-            except HTTPException as he:
-                error_payload = {"code": he.status_code, "message": he.detail}
-                logger.warning(f"[design][{doc_type}] {error_payload}")
-                await notifier.send(
-                    {
-                        "type": "doc_error",
-                        "step": "design",
-                        "index": index,
-                        "doc_type": doc_type,
-                        "error": error_payload,
-                    }
-                )
-                if he.status_code in [401, 403]:
-                    break
-
-                continue
-
-            except Exception as e:
-                logger.exception(f"[design][{doc_type}] UNEXPECTED ERROR")
-                await notifier.send(
-                    {
-                        "type": "doc_error",
-                        "step": "design",
-                        "index": index,
-                        "doc_type": doc_type,
-                        "error": {"code": 500, "message": str(e)},
-                    }
-                )
-                continue
-            finally:
-                db.close()
+        except asyncio.CancelledError:
+            logger.warning(f"[design][{doc_type}] Generation CANCELLED (Hard stop).")
+            raise
+
+        except HTTPException as he:
+            error_payload = {"code": he.status_code, "message": he.detail}
+            logger.warning(f"[design][{doc_type}] {error_payload}")
+            await notifier.send(
+                {
+                    "type": "doc_error",
+                    "step": "design",
+                    "index": index,
+                    "doc_type": doc_type,
+                    "error": error_payload,
+                }
+            )
+            if he.status_code in [401, 403]:
+                return NODE_ABORT
+            return NODE_FAILED
+
+        except Exception as e:
+            logger.exception(f"[design][{doc_type}] UNEXPECTED ERROR")
+            await notifier.send(
+                {
+                    "type": "doc_error",
+                    "step": "design",
+                    "index": index,
+                    "doc_type": doc_type,
+                    "error": {"code": 500, "message": str(e)},
+                }
+            )
+            return NODE_FAILED
+        finally:
+            db.close()
+
+    try:
+        await notifier.send({"type": "step_start", "step": "design"})
+
+        # Project, folders, formats and permission, loaded once for the step.
+        db = SessionLocal()
+        try:
+            context = GenerationContext.load(db, project_id, current_user_id)
+        except HTTPException as he:
+            logger.warning(f"[DESIGN] Step not started: {he.detail}")
+            await notifier.send(
+                {
+                    "type": "step_error",
+                    "step": "design",
+                    "message": he.detail,
+                    "code": he.status_code,
+                }
+            )
+            return DAG_ABORTED
+        finally:
+            db.close()
+
+        outcome = await run_document_dag(documents, generate_one, stop_event=stop_event)
+
+        if outcome == DAG_STOPPED:
+            logger.info(
+                f"Project {project_id}: Design generation stopped by user request."
+            )
+            await notifier.send(
+                {
+                    "type": "step_stopped",
+                    "step": "design",
+                    "message": "User requested stop. Remaining tasks skipped.",
+                }
+            )
 
         await notifier.send(
             {
@@ -142,14 +181,14 @@ async def run_design_step(
                 "step": "design",
             }
         )
+        return outcome
 
     except asyncio.CancelledError:
-        logger.info(
-            f"Process for project {project_id} fully stopped (Connection Lost)."
-        )
+        logger.info(f"Design step for project {project_id} cancelled.")
+        raise
 
     except Exception as e:
         logger.error(f"FATAL design ERROR: {str(e)}")
-        await notifier.send({"type": "step_error", "step": "design", "message": str(e)})
-    finally:
-        StepTaskRegistry.finish(project_id, current_user_id, "design")
+        await notifier.send(
+            {"type": "step_error", "step": "design", "message": str(e)}
+        )
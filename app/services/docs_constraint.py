@@ -87,7 +87,6 @@ def validate_dependencies(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    deps = DOCUMENT_DEPENDENCIES.get(document_type, {})
     sql_query = """
     SELECT DISTINCT(file_type) FROM files
     WHERE project_id = :project_id 
@@ -100,6 +99,13 @@ def validate_dependencies(
 
     existing_file_types = [r[0] for r in result]
 
+    return check_dependencies(document_type, existing_file_types)
+
+
+def check_dependencies(document_type: str, existing_file_types):
+    """validate_dependencies against file types the caller already loaded."""
+    deps = DOCUMENT_DEPENDENCIES.get(document_type, {})
+
     missing_required = [
         d for d in deps.get("required", []) if d not in existing_file_types
     ]
@@ -1,20 +1,27 @@
-import json
 import logging
 from datetime import datetime, timezone
 from io import BytesIO
-from typing import Callable, Optional
+from typing import Callable, Optional, Set
 
 from fastapi import HTTPException, UploadFile
 from sqlalchemy.orm import Session
 
 from app.core.rbac import ProjectAccessContext
-from app.models.file import Files
+from app.models.file import HIDDEN_FILE_STATUSES, Files
 from app.models.folder import Folder
 from app.models.session import Chat_Session
 from app.schemas.folder import CreateFolderRequest
 from app.models.project import Project
+from app.services.ai_transcripts import attach_ai_transcript
 from app.services.docs_constraint import validate_dependencies
 from app.services.document_format_service import resolve_active_format
+from app.services.file_listing import INCLUDE_CONTENT, defer_heavy_columns
+from app.services.generation_context import (
+    current_document_checkpoint,
+    current_generation_context,
+)
+from app.services.rag_postprocess import queue_rag_indexing
+from app.utils.ai_streaming import current_ai_stream_sink
 from app.utils.call_ai_service import call_ai_service
 from app.utils.file_handling import update_file_from_supabase, upload_to_supabase
 from app.utils.folder_utils import create_default_folder
@@ -23,6 +30,8 @@ from app.utils.metadata_utils import create_ai_generated_metadata
 
 FILE_STATUS_COMPLETED = "completed"
 
+logger = logging.getLogger(__name__)
+
 
 async def list_project_file_paths(project_id: int, db: Session):
     file_list = (
@@ -72,11 +81,26 @@ Project Description:
 """.strip()
 
 
-def document_response(response_cls, doc: Files, type_field: str):
+async def reindex_document(doc: Files, content: str) -> None:
+    # Incremental indexing only re-embeds the chunks an edit actually changed.
+    try:
+        await queue_rag_indexing(
+            step=(doc.file_metadata or {}).get("step", "update"),
+            file_id=str(doc.id),
+            doc_type=doc.file_type,
+            markdown_text=content,
+        )
+    except Exception as exc:
+        logger.warning(f"Failed to queue RAG re-indexing for file_id={doc.id}: {exc}")
+
+
+def document_response(
+    response_cls, doc: Files, type_field: str, include_content: bool = True
+):
     payload = {
         "document_id": str(doc.id),
         "project_name": doc.name,
-        "content": doc.content,
+        "content": doc.content if include_content else None,
         "status": doc.status,
         "file_category": doc.file_category,
         "updated_at": doc.updated_at,
@@ -142,9 +166,15 @@ async def generate_document(
             detail=f"Invalid document type. Must be one of: {valid_types}",
         )
 
-    dependency_result = validate_dependencies(
-        project_id, document_type, db, access.user
-    )
+    # Step runs share one context; single-document requests load per call.
+    context = current_generation_context(project_id)
+
+    if context:
+        dependency_result = context.check_dependencies(document_type)
+    else:
+        dependency_result = validate_dependencies(
+            project_id, document_type, db, access.user
+        )
     if not dependency_result["can_proceed"]:
         raise HTTPException(
             status_code=422,
@@ -154,25 +184,30 @@ async def generate_document(
             ),
         )
 
-    result = await create_default_folder(
-        project_id, CreateFolderRequest(name=document_type), access.user.id, db
-    )
-    if result.error:
-        raise HTTPException(status_code=500, detail="Failed to create folder")
-    folder = result.folder
+    if context:
+        folder = await context.get_folder(document_type, db)
+        result = context.active_format(document_type)
+        description = context.describe(description)
+    else:
+        result = await create_default_folder(
+            project_id, CreateFolderRequest(name=document_type), access.user.id, db
+        )
+        if result.error:
+            raise HTTPException(status_code=500, detail="Failed to create folder")
+        folder = result.folder
 
-    result = await resolve_active_format(
-        db=db,
-        project_id=project_id,
-        document_type=document_type,
-    )
-    # file_urls = await list_project_file_paths(project_id, db)
+        result = await resolve_active_format(
+            db=db,
+            project_id=project_id,
+            document_type=document_type,
+        )
+        # file_urls = await list_project_file_paths(project_id, db)
 
-    description = resolve_description(
-        db=db,
-        project_id=project_id,
-        description=description,
-    )
+        description = resolve_description(
+            db=db,
+            project_id=project_id,
+            description=description,
+        )
 
     ai_payload = {
         "message": description,
@@ -188,6 +223,8 @@ async def generate_document(
         ai_payload,
         db=db,
         user_id=access.user.id,
+        on_delta=current_ai_stream_sink(),
+        dedupe=True,
     )
 
     ai_inner = ai_data.get("response", {})
@@ -196,7 +233,12 @@ async def generate_document(
     )
     content = str(content)
 
-    unique_title = get_unique_diagram_name(db, project_name, project_id, document_type)
+    if context:
+        unique_title = context.unique_name(project_name, document_type)
+    else:
+        unique_title = get_unique_diagram_name(
+            db, project_name, project_id, document_type
+        )
     upload_buffer = BytesIO(content.encode("utf-8"))
     file_size_kb = round(len(upload_buffer.getvalue()) / 1024, 2)
     file_path = await upload_to_supabase(
@@ -212,8 +254,6 @@ async def generate_document(
         file_metadata = create_ai_generated_metadata(
             doc_type=document_type,
             content=content,
-            message=description,
-            ai_response=ai_data,
             step=step,
         )
         if step == "design":
@@ -235,6 +275,7 @@ async def generate_document(
         )
         db.add(new_file)
         db.flush()
+        ai_message = attach_ai_transcript(db, new_file, ai_data)
 
         db.add_all(
             [
@@ -252,13 +293,11 @@ async def generate_document(
                     content_type=document_type,
                     content_id=new_file.id,
                     role="ai",
-                    message=json.dumps(ai_inner),
+                    message=ai_message,
                 ),
             ]
         )
-        db.commit()
-        db.refresh(new_file)
-        return generate_response(
+        response = generate_response(
             response_cls,
             new_file,
             access,
@@ -267,6 +306,14 @@ async def generate_document(
             type_field,
             dependency_result["missing_recommended"],
         )
+        checkpoint = current_document_checkpoint()
+        if checkpoint:
+            checkpoint(db, response)
+        db.commit()
+        db.refresh(new_file)
+        if context:
+            context.record(document_type, unique_title)
+        return response
     except Exception as exc:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(exc))
@@ -281,19 +328,23 @@ def list_documents(
     item_response_cls,
     type_field: str,
     db: Session,
+    include: Set[str] = frozenset(),
 ):
     query = db.query(Files).filter(
         Files.project_id == project_id,
-        Files.status != "deleted",
+        Files.status.notin_(HIDDEN_FILE_STATUSES),
     )
     if document_type:
         query = query.filter(Files.file_type == document_type)
     else:
         query = query.filter(Files.file_type.in_(valid_types))
+    query = defer_heavy_columns(query, include)
 
+    include_content = INCLUDE_CONTENT in include
     return {
         "documents": [
-            document_response(item_response_cls, doc, type_field) for doc in query.all()
+            document_response(item_response_cls, doc, type_field, include_content)
+            for doc in query.all()
         ]
     }
 
@@ -381,6 +432,7 @@ async def update_document(
 
     db.commit()
     db.refresh(doc)
+    await reindex_document(doc, content)
     return update_response(response_cls, doc, content)
 
 
@@ -439,6 +491,8 @@ async def regenerate_document(
         ai_payload,
         db=db,
         user_id=access.user.id,
+        on_delta=current_ai_stream_sink(),
+        dedupe=True,
     )
     ai_inner = ai_data.get("response", {})
     content = str(format_response(ai_inner))
@@ -463,13 +517,9 @@ async def regenerate_document(
         doc.file_size = file_size_kb
         if path:
             doc.storage_path = path
-        doc.file_metadata = {
-            **(doc.file_metadata or {}),
-            "message": description,
-            "ai_response": ai_data,
-        }
         doc.status = "completed"
         db.flush()
+        ai_message = attach_ai_transcript(db, doc, ai_data)
         db.add_all(
             [
                 Chat_Session(
@@ -486,12 +536,13 @@ async def regenerate_document(
                     content_type=doc.file_type,
                     content_id=doc.id,
                     role="ai",
-                    message=json.dumps(ai_inner),
+                    message=ai_message,
                 ),
             ]
         )
         db.commit()
         db.refresh(doc)
+        await reindex_document(doc, content)
         return generate_response(
             response_cls,
             doc,
@@ -0,0 +1,48 @@
+from typing import Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy.orm import defer
+
+from app.models.file import Files
+
+# Listing endpoints leave out the heavy Files columns unless asked with
+# ?include=content,metadata; the get-document endpoints always return them.
+INCLUDE_CONTENT = "content"
+INCLUDE_METADATA = "metadata"
+INCLUDE_OPTIONS = (INCLUDE_CONTENT, INCLUDE_METADATA)
+
+INCLUDE_DESCRIPTION = (
+    "Comma-separated heavy fields to return for each file: "
+    f"{', '.join(INCLUDE_OPTIONS)}. Omitted fields are null."
+)
+
+
+def parse_include(include: Optional[str]) -> Set[str]:
+    fields = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = fields.difference(INCLUDE_OPTIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid include: {sorted(unknown)}. Must be one of: {list(INCLUDE_OPTIONS)}",
+        )
+    return fields
+
+
+def defer_heavy_columns(query, include: Set[str]):
+    """Skip Files.content / Files.metadata in the SELECT unless included.
+
+    Serializers must not touch a deferred column, or every row lazy-loads it.
+    """
+    if INCLUDE_CONTENT not in include:
+        query = query.options(defer(Files.content))
+    if INCLUDE_METADATA not in include:
+        query = query.options(defer(Files.file_metadata))
+    return query
+
+
+def file_content(file: Files, include: Set[str]) -> Optional[str]:
+    return file.content if INCLUDE_CONTENT in include else None
+
+
+def file_metadata(file: Files, include: Set[str]) -> Optional[dict]:
+    return (file.file_metadata or {}) if INCLUDE_METADATA in include else None
@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.rbac import Permission, ProjectAccessContext, check_permission
+from app.models.custom_document_format import CustomDocumentFormat
+from app.models.file import Files
+from app.models.folder import Folder
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.folder import CreateFolderRequest, CreateFolderResponse
+from app.services.docs_constraint import check_dependencies
+from app.utils.folder_utils import create_default_folder
+from app.utils.get_unique_name import pick_unique_name
+
+
+class GenerationContext:
+    """Project state shared by every document of one step run.
+
+    Loaded once per step instead of once per document, then kept current as
+    documents complete. The step runners run documents concurrently on one
+    event loop with their own sessions, so everything here is plain data.
+    """
+
+    def __init__(
+        self,
+        *,
+        project_id: int,
+        access: ProjectAccessContext,
+        project_name: str,
+        project_description: str,
+        existing_file_types: Set[str],
+        names_by_type: Dict[str, List[str]],
+        folders: Dict[str, CreateFolderResponse],
+        formats: Dict[str, dict],
+    ):
+        self.project_id = project_id
+        self.access = access
+        self.project_name = project_name
+        self.project_description = project_description
+        self.existing_file_types = existing_file_types
+        self.names_by_type = names_by_type
+        self.folders = folders
+        self.formats = formats
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        project_id: int,
+        user_id: int,
+        permission: Permission = Permission.FILE_WRITE,
+    ) -> "GenerationContext":
+        current_user = db.query(User).filter(User.id == user_id).first()
+        if not current_user:
+            raise HTTPException(status_code=401, detail="User not found")
+
+        access = check_permission(
+            project_id=project_id,
+            current_user=current_user,
+            db=db,
+            permission=permission,
+        )
+
+        project = (
+            db.query(Project)
+            .filter(Project.id == project_id, Project.status != "deleted")
+            .first()
+        )
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        existing_file_types: Set[str] = set()
+        names_by_type: Dict[str, List[str]] = {}
+        for file_type, name, status in db.query(
+            Files.file_type, Files.name, Files.status
+        ).filter(Files.project_id == project_id):
+            # Deleted files still hold their name (see get_unique_diagram_name)
+            # but no longer satisfy dependencies (see validate_dependencies).
+            names_by_type.setdefault(file_type, []).append(name)
+            if status != "deleted":
+                existing_file_types.add(file_type)
+
+        folders: Dict[str, CreateFolderResponse] = {}
+        for folder in (
+            db.query(Folder)
+            .filter(
+                Folder.project_id == project_id,
+                Folder.parent_id.is_(None),
+                Folder.is_deleted == False,
+            )
+            .order_by(Folder.id.asc())
+        ):
+            folders.setdefault(folder.name, CreateFolderResponse.model_validate(folder))
+
+        formats: Dict[str, dict] = {}
+        for custom_format in db.query(CustomDocumentFormat).filter(
+            CustomDocumentFormat.project_id == project_id,
+            CustomDocumentFormat.is_activated.is_(True),
+        ):
+            formats.setdefault(
+                custom_format.document_type,
+                {
+                    "source": "custom",
+                    "document_type": custom_format.document_type,
+                    "content": custom_format.content,
+                    "extension": custom_format.extension,
+                    "format_id": custom_format.id,
+                },
+            )
+
+        return cls(
+            project_id=project_id,
+            access=access,
+            project_name=project.name or "",
+            project_description=project.description or "",
+            existing_file_types=existing_file_types,
+            names_by_type=names_by_type,
+            folders=folders,
+            formats=formats,
+        )
+
+    def check_dependencies(self, document_type: str) -> dict:
+        return check_dependencies(document_type, self.existing_file_types)
+
+    async def get_folder(self, document_type: str, db: Session) -> CreateFolderResponse:
+        folder = self.folders.get(document_type)
+        if folder is None:
+            result = await create_default_folder(
+                self.project_id,
+                CreateFolderRequest(name=document_type),
+                self.access.user.id,
+                db,
+            )
+            if result.error:
+                raise HTTPException(status_code=500, detail="Failed to create folder")
+            folder = self.folders.setdefault(document_type, result.folder)
+        return folder
+
+    def active_format(self, document_type: str) -> Optional[dict]:
+        return self.formats.get(document_type)
+
+    def describe(self, description: Optional[str]) -> str:
+        if description and description.strip():
+            return description.strip()
+        return f"""
+Project Name: {self.project_name}
+
+Project Description:
+{self.project_description}
+""".strip()
+
+    def unique_name(self, title: str, document_type: str) -> str:
+        return pick_unique_name(title, self.names_by_type.get(document_type, []))
+
+    def record(self, document_type: str, name: str) -> None:
+        """Account for a document this step just committed."""
+        self.existing_file_types.add(document_type)
+        self.names_by_type.setdefault(document_type, []).append(name)
+
+
+# Set by the step runners around a document generation so generate_document
+# can reuse it without threading it through the FastAPI endpoint functions
+# the runners call (same approach as stream_ai_deltas).
+_generation_context: ContextVar[Optional[GenerationContext]] = ContextVar(
+    "generation_context", default=None
+)
+
+
+@contextmanager
+def use_generation_context(context: GenerationContext):
+    token = _generation_context.set(context)
+    try:
+        yield
+    finally:
+        _generation_context.reset(token)
+
+
+def current_generation_context(project_id: int) -> Optional[GenerationContext]:
+    context = _generation_context.get()
+    if context is not None and context.project_id == project_id:
+        return context
+    return None
+
+
+# Set by the step runners around one document: called with the session and
+# the generate response right before generate_document commits the new file,
+# so a step job's checkpoint lands in the same transaction as the document.
+DocumentCheckpoint = Callable[[Session, object], None]
+_document_checkpoint: ContextVar[Optional[DocumentCheckpoint]] = ContextVar(
+    "document_checkpoint", default=None
+)
+
+
+@contextmanager
+def checkpoint_document(callback: Optional[DocumentCheckpoint]):
+    token = _document_checkpoint.set(callback)
+    try:
+        yield
+    finally:
+        _document_checkpoint.reset(token)
+
+
+def current_document_checkpoint() -> Optional[DocumentCheckpoint]:
+    return _document_checkpoint.get()
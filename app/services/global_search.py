@@ -0,0 +1,158 @@
+import base64
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import redis
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Joining the caller's project ids (rather than project_id = ANY(...)) lets
+# each project probe the (project_id, search_vector) GIN index directly.
+_MATCH_SOURCE = """
+    unnest(CAST(:project_ids AS integer[])) AS scope(project_id)
+    JOIN global_search_index g ON g.project_id = scope.project_id
+    WHERE g.search_vector @@ websearch_to_tsquery('english', :keyword)
+"""
+
+_MATCHES_SQL = f"""
+    SELECT
+        g.id,
+        g.entity_id,
+        g.entity_type,
+        g.project_id,
+        g.title,
+        ts_rank(g.search_vector, websearch_to_tsquery('english', :keyword)) AS rank
+    FROM {_MATCH_SOURCE}
+"""
+
+
+def encode_cursor(rank: float, row_id: int) -> str:
+    payload = json.dumps([rank, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def fetch_search_page(
+    db,
+    *,
+    keyword: str,
+    project_ids: Sequence[int],
+    limit: int,
+    cursor: Optional[Tuple[float, int]] = None,
+    offset: int = 0,
+) -> Tuple[List, Optional[str]]:
+    """Return one page of matches ordered by ``(rank, id)`` descending.
+
+    With a cursor the page starts strictly after that ``(rank, id)`` key, so
+    deep pages cost a top-N sort instead of ranking and skipping every
+    earlier row. ``offset`` is kept for the legacy ``page`` parameter.
+    Returns ``(rows, next_cursor)``.
+    """
+    params = {
+        "keyword": keyword,
+        "project_ids": list(project_ids),
+        # One extra row tells us whether another page exists.
+        "limit": limit + 1,
+    }
+    keyset = ""
+    if cursor is not None:
+        # ts_rank returns real; compare in the same type so the key is exact.
+        keyset = "WHERE (rank, id) < (CAST(:cursor_rank AS real), :cursor_id)"
+        params["cursor_rank"], params["cursor_id"] = cursor
+    paging = "LIMIT :limit"
+    if cursor is None and offset:
+        paging += " OFFSET :offset"
+        params["offset"] = offset
+
+    rows = db.execute(
+        text(
+            f"""
+            SELECT * FROM ({_MATCHES_SQL}) AS matches
+            {keyset}
+            ORDER BY rank DESC, id DESC
+            {paging}
+            """
+        ),
+        params,
+    ).fetchall()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(float(last.rank), last.id)
+
+
+def count_search_matches(
+    db, *, keyword: str, project_ids: Sequence[int], mode: str
+) -> Tuple[Optional[int], bool]:
+    """Count matches once per query and cache the result for a short TTL.
+
+    ``approximate`` stops counting at ``search_approximate_count_cap`` rows.
+    Returns ``(total, is_approximate)``; ``total`` is None for ``none``.
+    """
+    if mode == "none":
+        return None, False
+
+    cap = settings.search_approximate_count_cap if mode == "approximate" else None
+    cache_key = _count_cache_key(keyword, project_ids, mode)
+    cached = _get_cached_count(cache_key)
+    if cached is None:
+        statement = f"SELECT 1 FROM {_MATCH_SOURCE}"
+        params = {"keyword": keyword, "project_ids": list(project_ids)}
+        if cap is not None:
+            # Probe one row past the cap to know whether the count was cut off.
+            statement += " LIMIT :cap"
+            params["cap"] = cap + 1
+        cached = db.execute(
+            text(f"SELECT COUNT(*) FROM ({statement}) AS matches"), params
+        ).scalar() or 0
+        _set_cached_count(cache_key, cached)
+
+    if cap is not None and cached > cap:
+        return cap, True
+    return cached, False
+
+
+def _count_cache_key(keyword: str, project_ids: Sequence[int], mode: str) -> str:
+    scope = ",".join(str(project_id) for project_id in sorted(project_ids))
+    digest = hashlib.sha256(f"{mode}\0{keyword}\0{scope}".encode()).hexdigest()
+    return f"search:count:{digest}"
+
+
+@lru_cache(maxsize=1)
+def _get_redis():
+    return redis.Redis.from_url(
+        settings.CELERY_BROKER_URL, socket_timeout=0.2, socket_connect_timeout=0.2
+    )
+
+
+def _get_cached_count(key: str) -> Optional[int]:
+    try:
+        value = _get_redis().get(key)
+    except Exception as e:
+        logger.warning(f"Search count cache unavailable: {e}")
+        return None
+    return int(value) if value is not None else None
+
+
+def _set_cached_count(key: str, total: int) -> None:
+    try:
+        _get_redis().set(key, total, ex=settings.search_count_cache_ttl_seconds)
+    except Exception as e:
+        logger.warning(f"Search count cache unavailable: {e}")
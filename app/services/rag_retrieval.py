@@ -0,0 +1,341 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+
+from app.core.config import settings
+from app.core.rag_database import RagSessionLocal, rag_vector_type
+from app.utils.rag_indexer import _vector_literal, embed_query
+
+logger = logging.getLogger(__name__)
+
+HNSW_INDEX_NAME = "idx_rag_chunks_embedding_hnsw"
+ITERATIVE_SCAN_MODES = {"off", "relaxed_order", "strict_order"}
+
+
+def _hnsw_build_options() -> Dict[str, int]:
+    return {
+        "m": int(settings.rag_hnsw_m),
+        "ef_construction": int(settings.rag_hnsw_ef_construction),
+    }
+
+
+def _hnsw_index_target() -> str:
+    dimensions = int(settings.rag_embedding_dimensions)
+    if settings.rag_vector_storage == "binary":
+        return f"(binary_quantize(embedding)::bit({dimensions})) bit_hamming_ops"
+    return f"embedding {rag_vector_type()}_cosine_ops"
+
+
+def _hnsw_index_signature() -> str:
+    # Stored as the index comment so a change of storage mode, dimensions or
+    # build parameters is detected without parsing pg_get_indexdef output.
+    options = ",".join(f"{key}={value}" for key, value in _hnsw_build_options().items())
+    return (
+        f"{settings.rag_vector_storage}:{settings.rag_embedding_dimensions}:{options}"
+    )
+
+
+def ensure_hnsw_index(engine) -> str:
+    """Create the HNSW index on rag_chunks, or rebuild it when the storage mode,
+    dimensions or build parameters no longer match settings.
+
+    Builds run ``CONCURRENTLY`` so indexing keeps writing while the graph is
+    built; a rebuild swaps in the new index before dropping the old one.
+    Returns ``"created"``, ``"rebuilt"`` or ``"unchanged"``.
+    """
+    signature = _hnsw_index_signature()
+    with_clause = ", ".join(
+        f"{key} = {value}" for key, value in _hnsw_build_options().items()
+    )
+
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        existing = conn.execute(
+            text(
+                """
+                SELECT obj_description(c.oid, 'pg_class') AS signature,
+                       i.indisvalid
+                FROM pg_class c
+                JOIN pg_index i ON i.indexrelid = c.oid
+                WHERE c.relname = :name
+                """
+            ),
+            {"name": HNSW_INDEX_NAME},
+        ).first()
+
+        if (
+            existing is not None
+            and existing.indisvalid
+            and existing.signature == signature
+        ):
+            return "unchanged"
+
+        build_name = HNSW_INDEX_NAME if existing is None else f"{HNSW_INDEX_NAME}_new"
+        # Leftover from an interrupted concurrent build is invalid; start over.
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {build_name}"))
+        logger.info(f"[RAG] Building HNSW index {build_name} ({signature})")
+        conn.execute(
+            text(
+                f"""
+                CREATE INDEX CONCURRENTLY {build_name}
+                ON rag_chunks USING hnsw ({_hnsw_index_target()})
+                WITH ({with_clause})
+                """
+            )
+        )
+        conn.execute(text(f"COMMENT ON INDEX {build_name} IS '{signature}'"))
+
+        if existing is None:
+            return "created"
+
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {HNSW_INDEX_NAME}"))
+        conn.execute(text(f"ALTER INDEX {build_name} RENAME TO {HNSW_INDEX_NAME}"))
+        return "rebuilt"
+
+
+def _configure_hnsw_scan(db, *, ef_search: int) -> None:
+    # SET LOCAL lasts until the end of the transaction, so pooled connections
+    # never carry one request's search settings into the next.
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+    mode = (settings.rag_hnsw_iterative_scan or "").strip().lower()
+    if mode and mode != "off":
+        if mode not in ITERATIVE_SCAN_MODES:
+            raise ValueError(f"Unsupported hnsw.iterative_scan mode: {mode}")
+        # Keeps scanning the graph until enough rows pass the project filter,
+        # instead of returning fewer than k hits for small projects.
+        db.execute(text(f"SET LOCAL hnsw.iterative_scan = {mode}"))
+
+
+def _chunk_hit(row) -> Dict:
+    return {
+        "id": str(row.id),
+        "file_id": str(row.file_id),
+        "project_id": row.project_id,
+        "document_type": row.document_type,
+        "chunk_index": row.chunk_index,
+        "content": row.content,
+        "token_count": row.token_count,
+    }
+
+
+def search_rag_chunks(
+    db,
+    *,
+    project_ids: Sequence[int],
+    query_embedding: List[float],
+    k: int = 10,
+    document_types: Optional[List[str]] = None,
+    ef_search: Optional[int] = None,
+    min_similarity: float = 0.0,
+) -> List[Dict]:
+    """Return the ``k`` chunks of the given projects closest to ``query_embedding``.
+
+    The project (and optional document type) filter sits in the same query as
+    the ``<=>`` ordering so the planner can serve it from the HNSW scan.
+    """
+    vector_type = rag_vector_type()
+    binary = settings.rag_vector_storage == "binary"
+    # Binary mode over-fetches by Hamming distance, then re-ranks exactly.
+    candidates = k * max(1, settings.rag_binary_rerank_factor) if binary else k
+
+    # HNSW returns at most ef_search candidates, so never ask for fewer.
+    ef_search = max(int(ef_search or settings.rag_hnsw_ef_search), candidates)
+    _configure_hnsw_scan(db, ef_search=ef_search)
+
+    filters = ["project_id IN :project_ids"]
+    params = {
+        "project_ids": list(project_ids),
+        "query_embedding": _vector_literal(query_embedding),
+        "k": k,
+        "candidates": candidates,
+    }
+    statement_params = [bindparam("project_ids", expanding=True)]
+    if document_types:
+        filters.append("document_type IN :document_types")
+        params["document_types"] = list(document_types)
+        statement_params.append(bindparam("document_types", expanding=True))
+
+    if binary:
+        dimensions = int(settings.rag_embedding_dimensions)
+        order_by = (
+            f"binary_quantize(embedding)::bit({dimensions}) <~> "
+            f"binary_quantize(CAST(:query_embedding AS vector))::bit({dimensions})"
+        )
+    else:
+        order_by = f"embedding <=> CAST(:query_embedding AS {vector_type})"
+
+    statement = text(
+        f"""
+        SELECT *
+        FROM (
+            SELECT id, file_id, project_id, document_type, chunk_index, content,
+                   token_count,
+                   embedding <=> CAST(:query_embedding AS {vector_type}) AS distance
+            FROM rag_chunks
+            WHERE {" AND ".join(filters)}
+            ORDER BY {order_by}
+            LIMIT :candidates
+        ) AS nearest
+        ORDER BY distance
+        LIMIT :k
+        """
+    )
+    rows = db.execute(statement.bindparams(*statement_params), params).fetchall()
+
+    hits = []
+    for row in rows:
+        similarity = 1 - float(row.distance)
+        if similarity < min_similarity:
+            continue
+        hit = _chunk_hit(row)
+        hit["similarity"] = similarity
+        hits.append(hit)
+
+    # relaxed_order iterative scans may return neighbours slightly out of order.
+    hits.sort(key=lambda hit: hit["similarity"], reverse=True)
+    return hits
+
+
+def lexical_search_rag_chunks(
+    db,
+    *,
+    project_ids: Sequence[int],
+    keyword: str,
+    limit: int = 10,
+) -> List[Dict]:
+    """Full-text search over rag_chunks.content_tsv, best ``ts_rank`` first."""
+    statement = text(
+        """
+        SELECT id, file_id, project_id, document_type, chunk_index, content,
+               token_count,
+               ts_rank(content_tsv, websearch_to_tsquery('english', :keyword)) AS rank
+        FROM rag_chunks
+        WHERE content_tsv @@ websearch_to_tsquery('english', :keyword)
+          AND project_id IN :project_ids
+        ORDER BY rank DESC
+        LIMIT :limit
+        """
+    ).bindparams(bindparam("project_ids", expanding=True))
+
+    rows = db.execute(
+        statement,
+        {"keyword": keyword, "project_ids": list(project_ids), "limit": limit},
+    ).fetchall()
+
+    hits = []
+    for row in rows:
+        hit = _chunk_hit(row)
+        hit["rank"] = float(row.rank)
+        hits.append(hit)
+    return hits
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Dict[str, List[Dict]], *, rrf_k: Optional[int] = None
+) -> List[Dict]:
+    """Fuse ranked chunk lists by ``sum(1 / (rrf_k + rank))`` per chunk id.
+
+    Each fused hit records its 1-based rank in every source as
+    ``<source>_rank`` (None when the source did not return it).
+    """
+    rrf_k = settings.rag_hybrid_rrf_k if rrf_k is None else rrf_k
+    fused: Dict[str, Dict] = {}
+
+    for source, hits in ranked_lists.items():
+        for rank, hit in enumerate(hits, start=1):
+            entry = fused.get(hit["id"])
+            if entry is None:
+                entry = {
+                    key: value
+                    for key, value in hit.items()
+                    if key not in ("rank", "similarity")
+                }
+                entry["score"] = 0.0
+                for name in ranked_lists:
+                    entry[f"{name}_rank"] = None
+                fused[hit["id"]] = entry
+            entry["score"] += 1.0 / (rrf_k + rank)
+            entry[f"{source}_rank"] = rank
+
+    return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
+
+
+def _set_statement_timeout(db, timeout_ms: int) -> None:
+    # Bounds queries the latency budget has already given up on.
+    db.execute(text(f"SET LOCAL statement_timeout = {max(1, int(timeout_ms))}"))
+
+
+async def hybrid_search_rag_chunks(
+    *,
+    project_ids: Sequence[int],
+    keyword: str,
+    limit: int = 10,
+    budget_ms: Optional[int] = None,
+    session_factory=RagSessionLocal,
+) -> Tuple[List[Dict], List[str]]:
+    """Run lexical and semantic chunk search concurrently and fuse them with RRF.
+
+    Both searches share one latency budget; a source that fails or does not
+    finish in time is left out of the fusion. Returns ``(hits, missing)``
+    where ``missing`` names the sources that did not contribute.
+    """
+    budget_ms = budget_ms or settings.rag_hybrid_budget_ms
+    # Fuse over a deeper candidate list than we return.
+    candidates = limit * 2
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget_ms / 1000
+
+    def remaining_ms() -> int:
+        # Cancelling a to_thread task does not stop its thread, so each query
+        # is bounded server-side by whatever budget is left when it starts.
+        return int((deadline - loop.time()) * 1000)
+
+    def run_lexical() -> List[Dict]:
+        with session_factory() as db:
+            _set_statement_timeout(db, remaining_ms())
+            return lexical_search_rag_chunks(
+                db, project_ids=project_ids, keyword=keyword, limit=candidates
+            )
+
+    def query_semantic(query_embedding: List[float]) -> List[Dict]:
+        with session_factory() as db:
+            _set_statement_timeout(db, remaining_ms())
+            return search_rag_chunks(
+                db,
+                project_ids=project_ids,
+                query_embedding=query_embedding,
+                k=candidates,
+            )
+
+    async def run_semantic() -> List[Dict]:
+        # A slow embedding gives up without ever taking a pooled connection.
+        query_embedding = await asyncio.wait_for(
+            asyncio.to_thread(embed_query, keyword, timeout=budget_ms / 1000),
+            timeout=budget_ms / 1000,
+        )
+        return await asyncio.to_thread(query_semantic, query_embedding)
+
+    tasks = {
+        "lexical": asyncio.create_task(asyncio.to_thread(run_lexical)),
+        "semantic": asyncio.create_task(run_semantic()),
+    }
+    await asyncio.wait(tasks.values(), timeout=budget_ms / 1000)
+
+    ranked_lists: Dict[str, List[Dict]] = {}
+    missing: List[str] = []
+    for source, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            logger.warning(f"[RAG] Hybrid {source} search exceeded {budget_ms}ms")
+            missing.append(source)
+            continue
+        if task.exception() is not None:
+            logger.warning(f"[RAG] Hybrid {source} search failed: {task.exception()}")
+            missing.append(source)
+            continue
+        ranked_lists[source] = task.result()
+
+    return reciprocal_rank_fusion(ranked_lists)[:limit], missing
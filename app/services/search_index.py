@@ -0,0 +1,264 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# tsvector values are capped at 1MB; index only the head of very large files.
+MAX_INDEXED_CONTENT_CHARS = 100000
+
+# Per entity: source table, id type, owning project column, the columns whose
+# change re-indexes a row, the weighted vector and the "still searchable"
+# predicate. ``{row}`` is NEW inside triggers and the batch alias in backfill.
+SEARCH_ENTITIES: Dict[str, Dict[str, str]] = {
+    "file": {
+        "table": "files",
+        "id_type": "uuid",
+        "project_column": "project_id",
+        "watched_columns": "name, content, status, project_id",
+        "vector": (
+            "setweight(to_tsvector('english', coalesce({row}.name, '')), 'A') || "
+            "setweight(to_tsvector('english', "
+            f"left(coalesce({{row}}.content, ''), {MAX_INDEXED_CONTENT_CHARS})), 'B')"
+        ),
+        "live": "{row}.status NOT IN ('deleted', 'uploading')",
+    },
+    "folder": {
+        "table": "folders",
+        "id_type": "integer",
+        "project_column": "project_id",
+        "watched_columns": "name, is_deleted, project_id",
+        "vector": "setweight(to_tsvector('english', coalesce({row}.name, '')), 'A')",
+        "live": "NOT {row}.is_deleted",
+    },
+    "project": {
+        "table": "projects",
+        "id_type": "integer",
+        "project_column": "id",
+        "watched_columns": "name, description, status",
+        "vector": (
+            "setweight(to_tsvector('english', coalesce({row}.name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce({row}.description, '')), 'B')"
+        ),
+        "live": "{row}.status <> 'deleted'",
+    },
+}
+
+_UPSERT_CONFLICT = """
+    ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+        project_id = EXCLUDED.project_id,
+        title = EXCLUDED.title,
+        search_vector = EXCLUDED.search_vector,
+        updated_at = EXCLUDED.updated_at
+"""
+
+# The backfill only rewrites rows that differ, so re-running it over an
+# index the triggers kept in sync writes nothing.
+_REPAIR_CONFLICT = (
+    _UPSERT_CONFLICT
+    + """
+    WHERE (
+        global_search_index.project_id,
+        global_search_index.title,
+        global_search_index.search_vector
+    ) IS DISTINCT FROM (EXCLUDED.project_id, EXCLUDED.title, EXCLUDED.search_vector)
+"""
+)
+
+_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    # Upsert target for triggers and backfill.
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_global_search_entity
+        ON global_search_index (entity_type, entity_id)
+    """,
+    # Search joins the caller's project ids against this index, so each
+    # project is one GIN probe on (project_id = x AND search_vector @@ q).
+    """
+    CREATE INDEX IF NOT EXISTS idx_global_search_project_vector
+        ON global_search_index USING gin (project_id, search_vector)
+    """,
+]
+
+
+def _trigger_ddl(entity: str, spec: Dict[str, str]) -> list:
+    row_vector = spec["vector"].format(row="NEW")
+    live = spec["live"].format(row="NEW")
+    on_remove = ""
+    if entity == "project":
+        # A deleted project's files and folders must drop out of search too.
+        on_remove = "DELETE FROM global_search_index WHERE project_id = NEW.id;"
+
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION gsi_sync_{entity}() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM global_search_index
+                WHERE entity_type = '{entity}' AND entity_id = OLD.id::text;
+                RETURN OLD;
+            END IF;
+
+            IF {live} THEN
+                INSERT INTO global_search_index (
+                    entity_id, entity_type, project_id, title, search_vector, updated_at
+                )
+                VALUES (
+                    NEW.id::text, '{entity}', NEW.{spec["project_column"]}, NEW.name,
+                    {row_vector}, now()
+                )
+                {_UPSERT_CONFLICT};
+            ELSE
+                DELETE FROM global_search_index
+                WHERE entity_type = '{entity}' AND entity_id = NEW.id::text;
+                {on_remove}
+            END IF;
+            RETURN NEW;
+        END;
+        $$
+        """,
+        f"DROP TRIGGER IF EXISTS trg_gsi_{entity} ON {spec['table']}",
+        f"""
+        CREATE TRIGGER trg_gsi_{entity}
+        AFTER INSERT OR DELETE OR UPDATE OF {spec["watched_columns"]}
+        ON {spec["table"]}
+        FOR EACH ROW EXECUTE FUNCTION gsi_sync_{entity}()
+        """,
+    ]
+
+
+def install_search_index_triggers(engine) -> bool:
+    """Install the indexes and row triggers that keep global_search_index
+    in sync with files, folders and projects.
+
+    Idempotent; safe to run on every startup. Postgres only, returns False
+    when skipped for another dialect.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+
+    with engine.begin() as conn:
+        # Several app workers start at once; let one of them do the DDL.
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('global_search_index'))"))
+        for statement in _INDEX_DDL:
+            conn.execute(text(statement))
+        for entity, spec in SEARCH_ENTITIES.items():
+            for statement in _trigger_ddl(entity, spec):
+                conn.execute(text(statement))
+    return True
+
+
+def backfill_search_index(
+    db, *, entity: str, batch_size: Optional[int] = None
+) -> int:
+    """Add or fix index rows for every live ``entity`` row, ``batch_size`` at
+    a time.
+
+    Walks the source table by primary key and commits per batch, so a large
+    backfill neither holds long locks nor needs a full rebuild. Rows already
+    in sync are left untouched. Returns the number of source rows visited.
+    """
+    spec = SEARCH_ENTITIES[entity]
+    batch_size = batch_size or settings.search_backfill_batch_size
+    vector = spec["vector"].format(row="batch")
+    live = spec["live"].format(row="batch")
+    statement = text(
+        f"""
+        WITH batch AS (
+            SELECT *
+            FROM {spec["table"]}
+            WHERE CAST(:after AS {spec["id_type"]}) IS NULL
+               OR id > CAST(:after AS {spec["id_type"]})
+            ORDER BY id
+            LIMIT :batch_size
+        ),
+        upserted AS (
+            INSERT INTO global_search_index (
+                entity_id, entity_type, project_id, title, search_vector, updated_at
+            )
+            SELECT batch.id::text, '{entity}', batch.{spec["project_column"]},
+                   batch.name, {vector}, now()
+            FROM batch
+            WHERE {live}
+            {_REPAIR_CONFLICT}
+        )
+        SELECT id::text AS last_id, (SELECT count(*) FROM batch) AS visited
+        FROM batch
+        ORDER BY id DESC
+        LIMIT 1
+        """
+    )
+
+    after = None
+    visited = 0
+    while True:
+        row = db.execute(statement, {"after": after, "batch_size": batch_size}).first()
+        db.commit()
+        if row is None:
+            break
+        visited += row.visited
+        after = row.last_id
+        if row.visited < batch_size:
+            break
+
+    logger.info(f"[SEARCH] Backfilled {visited} {entity} rows into global_search_index")
+    return visited
+
+
+def prune_search_index(
+    db, *, entity: str, batch_size: Optional[int] = None
+) -> int:
+    """Delete index rows whose ``entity`` row is gone or no longer live.
+
+    Walks the index by primary key and commits per batch, like the backfill.
+    Returns the number of index rows deleted.
+    """
+    spec = SEARCH_ENTITIES[entity]
+    batch_size = batch_size or settings.search_backfill_batch_size
+    live = spec["live"].format(row="src")
+    statement = text(
+        f"""
+        WITH batch AS (
+            SELECT id, entity_id
+            FROM global_search_index
+            WHERE entity_type = '{entity}'
+              AND (CAST(:after AS integer) IS NULL OR id > CAST(:after AS integer))
+            ORDER BY id
+            LIMIT :batch_size
+        ),
+        removed AS (
+            DELETE FROM global_search_index gsi
+            USING batch
+            WHERE gsi.id = batch.id
+              AND NOT EXISTS (
+                  SELECT 1 FROM {spec["table"]} src
+                  WHERE src.id = CAST(batch.entity_id AS {spec["id_type"]})
+                    AND {live}
+              )
+            RETURNING gsi.id
+        )
+        SELECT max(batch.id) AS last_id,
+               count(*) AS visited,
+               (SELECT count(*) FROM removed) AS removed
+        FROM batch
+        """
+    )
+
+    after = None
+    removed = 0
+    while True:
+        row = db.execute(statement, {"after": after, "batch_size": batch_size}).first()
+        db.commit()
+        if row is None or not row.visited:
+            break
+        removed += row.removed
+        after = row.last_id
+        if row.visited < batch_size:
+            break
+
+    logger.info(f"[SEARCH] Pruned {removed} orphaned {entity} rows from global_search_index")
+    return removed
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.services.docs_constraint import DOCUMENT_DEPENDENCIES
+
+logger = logging.getLogger(__name__)
+
+# What a node callback reports back to the scheduler.
+NODE_DONE = "done"
+NODE_FAILED = "failed"
+# Stop launching new documents (e.g. 401/403: nothing else will succeed).
+NODE_ABORT = "abort"
+
+# run_document_dag results
+DAG_COMPLETED = "completed"
+DAG_STOPPED = "stopped"
+DAG_ABORTED = "aborted"
+
+
+def build_document_graph(
+    doc_types: List[str], *, include_recommended: bool = False
+) -> Dict[int, Set[int]]:
+    """Map each requested document (by index) to the indices it waits for.
+
+    Only dependencies that are part of this request count; the others are
+    either already in the project or checked by validate_dependencies.
+    """
+    first_index: Dict[str, int] = {}
+    for index, doc_type in enumerate(doc_types):
+        first_index.setdefault(doc_type, index)
+
+    graph: Dict[int, Set[int]] = {}
+    for index, doc_type in enumerate(doc_types):
+        deps = DOCUMENT_DEPENDENCIES.get(doc_type, {})
+        names = list(deps.get("required", []))
+        if include_recommended:
+            names += deps.get("recommended", [])
+        waits_for = {first_index[name] for name in names if name in first_index}
+        if first_index[doc_type] != index:
+            # A repeated type runs after its first occurrence.
+            waits_for.add(first_index[doc_type])
+        waits_for.discard(index)
+        graph[index] = waits_for
+
+    _break_cycles(graph)
+    return graph
+
+
+def _break_cycles(graph: Dict[int, Set[int]]) -> None:
+    # DOCUMENT_DEPENDENCIES is acyclic today; if an edit ever introduces a
+    # cycle, fall back to request order for the nodes involved.
+    remaining = {index: set(deps) for index, deps in graph.items()}
+    while True:
+        ready = [index for index, deps in remaining.items() if not deps]
+        if not ready:
+            break
+        for index in ready:
+            del remaining[index]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    if remaining:
+        logger.warning(f"Document dependency cycle among {sorted(remaining)}")
+        for index in remaining:
+            graph[index] = {dep for dep in graph[index] if dep < index}
+
+
+async def run_document_dag(
+    documents: List[dict],
+    run_node: Callable[[int, dict], Awaitable[str]],
+    *,
+    stop_event: Optional[asyncio.Event] = None,
+    max_parallel: Optional[int] = None,
+) -> str:
+    """Generate ``documents`` in dependency order, ``max_parallel`` at a time.
+
+    ``run_node(index, doc)`` handles and reports its own errors and returns
+    NODE_DONE, NODE_FAILED or NODE_ABORT. A finished node releases its
+    dependents either way; a failed required dependency surfaces as the
+    dependent's own 422, as it does for sequential generation.
+
+    Setting ``stop_event`` stops new documents from starting while those in
+    flight finish. Cancelling the caller cancels every running node.
+    """
+    max_parallel = max(1, max_parallel or settings.step_max_parallel_documents)
+    graph = build_document_graph(
+        [doc["type"] for doc in documents],
+        include_recommended=settings.step_dag_include_recommended,
+    )
+
+    dependents: Dict[int, Set[int]] = {index: set() for index in graph}
+    for index, deps in graph.items():
+        for dep in deps:
+            dependents[dep].add(index)
+
+    waiting = {index: set(deps) for index, deps in graph.items()}
+    ready = sorted(index for index, deps in waiting.items() if not deps)
+    running: Dict[asyncio.Task, int] = {}
+    result = DAG_COMPLETED
+
+    try:
+        while ready or running:
+            while ready and result == DAG_COMPLETED and len(running) < max_parallel:
+                if stop_event and stop_event.is_set():
+                    result = DAG_STOPPED
+                    break
+                index = ready.pop(0)
+                task = asyncio.create_task(run_node(index, documents[index]))
+                running[task] = index
+
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = running.pop(task)
+                if task.result() == NODE_ABORT and result == DAG_COMPLETED:
+                    result = DAG_ABORTED
+                for dependent in dependents[index]:
+                    waiting[dependent].discard(index)
+                    if not waiting[dependent]:
+                        ready.append(dependent)
+                # Listing order breaks ties, as in sequential generation.
+                ready.sort()
+
+    except BaseException:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        raise
+
+    return result
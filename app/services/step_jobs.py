@@ -0,0 +1,473 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import redis.asyncio as redis
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.event_emitter import emitter
+from app.models.step_job import StepJob, StepJobDocument
+from app.services.analysis_runner import run_analysis_step
+from app.services.design_runner import run_design_step
+from app.services.planning_runner import run_planning_step
+from app.services.step_dag import DAG_ABORTED, DAG_COMPLETED, DAG_STOPPED
+
+logger = logging.getLogger(__name__)
+
+# Stop/cancel requests, published by whichever API replica holds the socket
+# and picked up by whichever worker runs the job.
+STEP_JOB_CONTROL_CHANNEL = "step_jobs:control"
+_CONTROL_KEY = "step_job:{job_id}:control"
+_CONTROL_KEY_TTL_SECONDS = 24 * 60 * 60
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_STOPPED = "stopped"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# Stop: documents in flight finish, no new ones start.
+# Cancel: documents in flight are abandoned.
+ACTION_STOP = "stop"
+ACTION_CANCEL = "cancel"
+# Worker-internal: the job was requeued or cancelled behind this worker's back.
+_ACTION_RELEASE = "release"
+
+_STEP_RUNNERS = {
+    "planning": run_planning_step,
+    "design": run_design_step,
+    "analysis": run_analysis_step,
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# API side
+# ---------------------------------------------------------------------------
+
+
+def send_step_job_control(job_id: int, action: str) -> None:
+    key = _CONTROL_KEY.format(job_id=job_id)
+    # The key covers a worker that has not subscribed yet; a stop never
+    # downgrades an earlier cancel.
+    emitter.r.set(key, action, ex=_CONTROL_KEY_TTL_SECONDS, nx=action == ACTION_STOP)
+    emitter.publish(STEP_JOB_CONTROL_CHANNEL, {"job_id": job_id, "action": action})
+
+
+def _cancel_step_job(db: Session, job: StepJob) -> None:
+    # The row is the source of truth: a cancelled job is never claimed or
+    # requeued again, even if the worker misses the control message.
+    job.status = JOB_CANCELLED
+    job.finished_at = _now()
+    db.commit()
+    send_step_job_control(job.id, ACTION_CANCEL)
+
+
+def _load_checkpoints(db: Session, job_id: int) -> Dict[int, StepJobDocument]:
+    rows = db.query(StepJobDocument).filter(StepJobDocument.job_id == job_id)
+    return {row.doc_index: row for row in rows}
+
+
+def _job_snapshot(db: Session, job: StepJob, resumed: bool) -> dict:
+    checkpoints = _load_checkpoints(db, job.id)
+    return {
+        "type": "job_accepted",
+        "step": job.step,
+        "job_id": job.id,
+        "status": job.status,
+        "resumed": resumed,
+        "completed": [
+            {"index": index, "doc_type": saved.doc_type, "data": saved.data}
+            for index, saved in sorted(checkpoints.items())
+        ],
+    }
+
+
+def open_step_job(project_id: int, user_id: int, step: str, init_data: dict) -> dict:
+    """Attach to the user's running job for ``step`` or queue a new one.
+
+    ``{"resume": true}`` reattaches to the active job, if any, and returns the
+    documents it already finished. Otherwise any active job is cancelled and
+    a new one is queued; the caller enqueues run_step_job_task for it.
+    """
+    db = SessionLocal()
+    try:
+        active = (
+            db.query(StepJob)
+            .filter(
+                StepJob.project_id == project_id,
+                StepJob.user_id == user_id,
+                StepJob.step == step,
+                StepJob.status.in_(ACTIVE_JOB_STATUSES),
+            )
+            .order_by(StepJob.id.desc())
+            .all()
+        )
+        if init_data.get("resume") and active:
+            return _job_snapshot(db, active[0], resumed=True)
+
+        for previous in active:
+            logger.info(f"Cancelling previous {step} job {previous.id}")
+            _cancel_step_job(db, previous)
+
+        job = StepJob(
+            project_id=project_id,
+            user_id=user_id,
+            step=step,
+            status=JOB_QUEUED,
+            queued_at=_now(),
+            payload={
+                "project_name": init_data["project_name"],
+                "description": init_data.get("description", ""),
+                "documents": init_data["documents"],
+            },
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return _job_snapshot(db, job, resumed=False)
+    finally:
+        db.close()
+
+
+def request_step_job_action(job_id: int, action: str) -> None:
+    if action == ACTION_CANCEL:
+        db = SessionLocal()
+        try:
+            job = db.query(StepJob).filter(StepJob.id == job_id).first()
+            if job and job.status in ACTIVE_JOB_STATUSES:
+                _cancel_step_job(db, job)
+        finally:
+            db.close()
+    else:
+        send_step_job_control(job_id, action)
+
+
+def get_step_job_status(job_id: int) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        job = db.query(StepJob.status).filter(StepJob.id == job_id).first()
+        return job.status if job else None
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+
+class StepJobNotifier:
+    """Publishes step events on the "events" channel; every API replica
+    forwards them to its WebSocket clients for the step."""
+
+    def __init__(self, project_id: int, step: str, job_id: int):
+        self.project_id = project_id
+        self.step = step
+        self.job_id = job_id
+
+    async def send(self, payload: dict):
+        event = {**payload, "project_id": self.project_id, "job_id": self.job_id}
+        event.setdefault("step", self.step)
+        try:
+            await asyncio.to_thread(emitter.emit, event)
+        except Exception as e:
+            # Losing a progress event must not fail the document.
+            logger.warning(f"Step job {self.job_id}: could not publish event: {e}")
+
+
+class StepJobCheckpoints:
+    """Documents a job has finished, so a restarted job resumes after the
+    last completed document.
+
+    ``stage`` adds the checkpoint to the session that inserts the document,
+    so both commit (or roll back) together.
+    """
+
+    def __init__(self, job_id: int, saved: Optional[Dict[int, dict]] = None):
+        self.job_id = job_id
+        # {index: {"doc_type": ..., "data": ...}}
+        self._saved = dict(saved or {})
+
+    def get(self, index: int, doc_type: str) -> Optional[dict]:
+        saved = self._saved.get(index)
+        if saved and saved.get("doc_type") == doc_type:
+            return saved["data"]
+        return None
+
+    def stage(self, db: Session, index: int, doc_type: str, data: dict) -> None:
+        db.add(
+            StepJobDocument(
+                job_id=self.job_id, doc_index=index, doc_type=doc_type, data=data
+            )
+        )
+        self._saved[index] = {"doc_type": doc_type, "data": data}
+
+    def stager(self, index: int, doc_type: str):
+        """Callback for checkpoint_document: stage the generate response."""
+
+        def stage(db: Session, result) -> None:
+            self.stage(db, index, doc_type, result.model_dump(mode="json"))
+
+        return stage
+
+
+def _update_running_job(job_id: int, values: dict) -> bool:
+    """Update the job only while it is still running; False once it was
+    cancelled or requeued elsewhere."""
+    db = SessionLocal()
+    try:
+        updated = (
+            db.query(StepJob)
+            .filter(StepJob.id == job_id, StepJob.status == JOB_RUNNING)
+            .update(values, synchronize_session=False)
+        )
+        db.commit()
+        return bool(updated)
+    finally:
+        db.close()
+
+
+def claim_step_job(db: Session, job_id: int) -> Optional[StepJob]:
+    """Mark the job as running on this worker.
+
+    Returns None when the job is finished, cancelled or still heartbeating on
+    another worker, so a redelivered or duplicated task message is harmless.
+    """
+    stale_before = _now() - timedelta(seconds=settings.step_job_stale_seconds)
+    claimed = (
+        db.query(StepJob)
+        .filter(
+            StepJob.id == job_id,
+            or_(
+                StepJob.status == JOB_QUEUED,
+                and_(
+                    StepJob.status == JOB_RUNNING,
+                    StepJob.heartbeat_at < stale_before,
+                ),
+            ),
+        )
+        .update(
+            {
+                "status": JOB_RUNNING,
+                "heartbeat_at": _now(),
+                "attempt_count": StepJob.attempt_count + 1,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if not claimed:
+        return None
+    return db.query(StepJob).filter(StepJob.id == job_id).first()
+
+
+def requeue_stale_step_jobs(db: Session) -> List[int]:
+    """Hand running jobs whose worker went silent back to the queue, and
+    re-send queued jobs whose task message never got picked up (e.g. the
+    broker was down when it was enqueued).
+
+    Returns the ids to re-enqueue; jobs out of attempts are marked failed.
+    A duplicated message is harmless, see claim_step_job.
+    """
+    stale_before = _now() - timedelta(seconds=settings.step_job_stale_seconds)
+    stale = (
+        db.query(StepJob)
+        .filter(
+            or_(
+                and_(
+                    StepJob.status == JOB_RUNNING,
+                    StepJob.heartbeat_at < stale_before,
+                ),
+                and_(
+                    StepJob.status == JOB_QUEUED,
+                    or_(
+                        StepJob.queued_at < stale_before,
+                        and_(
+                            StepJob.queued_at.is_(None),
+                            StepJob.created_at < stale_before,
+                        ),
+                    ),
+                ),
+            )
+        )
+        .all()
+    )
+    requeued = []
+    for job in stale:
+        if job.status == JOB_RUNNING and (
+            job.attempt_count >= settings.step_job_max_attempts
+        ):
+            job.status = JOB_FAILED
+            job.finished_at = _now()
+            job.last_error = f"Worker lost after {job.attempt_count} attempts"
+        else:
+            job.status = JOB_QUEUED
+            job.queued_at = _now()
+            requeued.append(job.id)
+    db.commit()
+    return requeued
+
+
+def fail_queued_step_job(job_id: int, error: str) -> None:
+    """Mark a job that could not be enqueued as failed, so a resume does not
+    attach to a job no worker will ever run."""
+    db = SessionLocal()
+    try:
+        db.query(StepJob).filter(
+            StepJob.id == job_id, StepJob.status == JOB_QUEUED
+        ).update(
+            {"status": JOB_FAILED, "finished_at": _now(), "last_error": error},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _listen_for_control(job_id: int, apply: Callable[[str], None]) -> None:
+    client = redis.from_url(settings.CELERY_BROKER_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(STEP_JOB_CONTROL_CHANNEL)
+        # A request sent before we subscribed only left the key behind.
+        pending = await client.get(_CONTROL_KEY.format(job_id=job_id))
+        if pending:
+            apply(pending.decode() if isinstance(pending, bytes) else pending)
+
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=1.0
+            )
+            if not message:
+                continue
+            data = json.loads(message["data"])
+            if data.get("job_id") == job_id:
+                apply(data.get("action"))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # The heartbeat still notices cancellation through the job row.
+        logger.warning(f"Step job {job_id}: control channel unavailable: {e}")
+    finally:
+        try:
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception:
+            pass
+
+
+async def _heartbeat(job_id: int, apply: Callable[[str], None]) -> None:
+    while True:
+        await asyncio.sleep(settings.step_job_heartbeat_seconds)
+        alive = await asyncio.to_thread(
+            _update_running_job, job_id, {"heartbeat_at": _now()}
+        )
+        if not alive:
+            apply(_ACTION_RELEASE)
+            return
+
+
+async def run_step_job(job_id: int) -> Optional[str]:
+    """Run (or resume) a step job on this worker. Returns its final status,
+    or None if the job was not ours to run."""
+    db = SessionLocal()
+    try:
+        job = claim_step_job(db, job_id)
+        if not job:
+            logger.info(f"Step job {job_id} is finished or owned by another worker")
+            return None
+        if job.attempt_count > settings.step_job_max_attempts:
+            _update_running_job(
+                job_id,
+                {
+                    "status": JOB_FAILED,
+                    "finished_at": _now(),
+                    "last_error": f"Gave up after {job.attempt_count - 1} attempts",
+                },
+            )
+            return JOB_FAILED
+
+        project_id, user_id, step = job.project_id, job.user_id, job.step
+        payload = dict(job.payload)
+        checkpoints = StepJobCheckpoints(
+            job_id,
+            {
+                index: {"doc_type": saved.doc_type, "data": saved.data}
+                for index, saved in _load_checkpoints(db, job_id).items()
+            },
+        )
+    finally:
+        db.close()
+
+    notifier = StepJobNotifier(project_id, step, job_id)
+    stop_event = asyncio.Event()
+    runner = asyncio.create_task(
+        _STEP_RUNNERS[step](
+            project_id=project_id,
+            project_name=payload["project_name"],
+            description=payload.get("description", ""),
+            documents=payload["documents"],
+            current_user_id=user_id,
+            notifier=notifier,
+            stop_event=stop_event,
+            checkpoints=checkpoints,
+        )
+    )
+
+    cancelled_by = None
+
+    def apply(action: str) -> None:
+        nonlocal cancelled_by
+        if action == ACTION_STOP:
+            stop_event.set()
+        elif action in (ACTION_CANCEL, _ACTION_RELEASE) and not runner.done():
+            cancelled_by = cancelled_by or action
+            runner.cancel()
+
+    watchers = [
+        asyncio.create_task(_listen_for_control(job_id, apply)),
+        asyncio.create_task(_heartbeat(job_id, apply)),
+    ]
+    error = None
+    try:
+        outcome = await runner
+        status = {DAG_COMPLETED: JOB_COMPLETED, DAG_STOPPED: JOB_STOPPED}.get(
+            outcome, JOB_FAILED
+        )
+        if outcome == DAG_ABORTED:
+            error = "Generation aborted: project not found or not authorized"
+        elif status == JOB_FAILED:
+            error = "Step failed, see step_error event"
+    except asyncio.CancelledError:
+        if cancelled_by is None:
+            # The worker itself is going away; the job stays "running" and is
+            # requeued once its heartbeat goes stale.
+            raise
+        status = JOB_CANCELLED
+    finally:
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+
+    if cancelled_by == _ACTION_RELEASE:
+        logger.info(f"Step job {job_id} was taken over, leaving it")
+        return None
+
+    values: Dict[str, object] = {"status": status, "finished_at": _now()}
+    if error:
+        values["last_error"] = error
+    await asyncio.to_thread(_update_running_job, job_id, values)
+    await notifier.send({"type": "job_finished", "step": step, "status": status})
+    logger.info(f"Step job {job_id} ({step}) finished with status={status}")
+    return status
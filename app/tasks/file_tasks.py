@@ -2,29 +2,48 @@ import os
 import io
 import logging
 import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
 from fastapi import UploadFile
 from markitdown import MarkItDown
 
 from app.core.celery_app import celery_app
 from app.core.database import get_db
-from app.core.rag_database import get_rag_db
-from app.models.file import Files
+from app.core.rag_database import get_rag_db, rag_engine
+from app.models.file import FILE_STATUS_UPLOADING, Files
 from app.core.config import settings
-from app.utils.file_handling import upload_to_supabase
+from app.utils.file_handling import (
+    delete_file_from_supabase,
+    download_file_to_path,
+    extract_text_from_binary,
+    upload_to_supabase,
+)
 from app.utils.call_ai_service import call_ai_service
+from app.utils.ai_http_client import run_in_worker_loop
 from app.utils.metadata_utils import create_user_upload_metadata
-from app.utils.rag_indexer import index_rag_chunks
+from app.utils.rag_indexer import index_rag_chunks, prune_embedding_cache
+from app.services.rag_retrieval import ensure_hnsw_index
+from app.services.ai_transcripts import compact_ai_transcripts
+from app.services.search_index import (
+    SEARCH_ENTITIES,
+    backfill_search_index,
+    prune_search_index,
+)
 from app.core.event_emitter import emitter
 
 logger = logging.getLogger(__name__)
 
 
 @celery_app.task(name="process_markdown_task", bind=True, max_retries=2)
-def process_markdown_task(self, file_id: str, temp_path: str, supabase_folder: str):
+def process_markdown_task(
+    self, file_id: str, temp_path: str | None, supabase_folder: str
+):
+    # temp_path is None for direct uploads: the raw file is only in storage.
     db_gen = get_db()
     db = next(db_gen)
 
     cleanup_file = False
+    downloaded_path = None
 
     try:
         logger.info(f"[START] Markdown task file_id={file_id}")
@@ -46,15 +65,33 @@ def process_markdown_task(self, file_id: str, temp_path: str, supabase_folder: s
             }
         )
 
+        if temp_path is None:
+            fd, downloaded_path = tempfile.mkstemp(suffix=file_record.extension or "")
+            os.close(fd)
+            run_in_worker_loop(
+                download_file_to_path(file_record.storage_path, downloaded_path)
+            )
+
+        source_path = temp_path or downloaded_path
+
+        # Uploads leave raw text extraction to this stage so the API never
+        # parses PDFs/Office files on its event loop.
+        if file_record.content is None:
+            with open(source_path, "rb") as source:
+                file_record.content = extract_text_from_binary(
+                    source.read(), file_record.extension
+                )
+            db.commit()
+
         if file_record.extension == ".md":
             markdown_text = file_record.content
             md_url = file_record.storage_path
         else:
-            if not os.path.exists(temp_path):
-                raise Exception(f"Temp file not found: {temp_path}")
+            if not os.path.exists(source_path):
+                raise Exception(f"Temp file not found: {source_path}")
 
             md_engine = MarkItDown(enable_plugins=True)
-            result = md_engine.convert(temp_path)
+            result = md_engine.convert(source_path)
 
             markdown_text = result.text_content
             if not markdown_text:
@@ -114,8 +151,10 @@ def process_markdown_task(self, file_id: str, temp_path: str, supabase_folder: s
 
     finally:
         db_gen.close()
-        if cleanup_file and os.path.exists(temp_path):
+        if cleanup_file and temp_path and os.path.exists(temp_path):
             os.remove(temp_path)
+        if downloaded_path and os.path.exists(downloaded_path):
+            os.remove(downloaded_path)
 
 
 @celery_app.task(name="extract_metadata_task", bind=True)
@@ -140,7 +179,7 @@ def extract_metadata_task(self, payload: dict):
             "filename": file_record.name,
         }
 
-        metadata_response = asyncio.run(
+        metadata_response = run_in_worker_loop(
             call_ai_service(
                 ai_service_url=settings.ai_service_url_metadata_extraction,
                 payload=metadata_payload,
@@ -293,3 +332,125 @@ def index_rag_task(self, payload: dict):
     finally:
         local_db_gen.close()
         rag_db_gen.close()
+
+
+@celery_app.task(name="prune_rag_embedding_cache_task")
+def prune_rag_embedding_cache_task():
+    rag_db_gen = get_rag_db()
+    rag_db = next(rag_db_gen)
+
+    try:
+        evicted = prune_embedding_cache(rag_db)
+        rag_db.commit()
+        logger.info(f"[SUCCESS] Pruned {evicted} RAG embedding cache entries")
+        return {"evicted": evicted}
+    except Exception as e:
+        rag_db.rollback()
+        logger.error(f"[FAILED] RAG embedding cache prune error={str(e)}")
+        raise
+    finally:
+        rag_db_gen.close()
+
+
+@celery_app.task(name="ensure_rag_hnsw_index_task")
+def ensure_rag_hnsw_index_task():
+    try:
+        result = ensure_hnsw_index(rag_engine)
+        logger.info(f"[SUCCESS] RAG HNSW index {result}")
+        return {"index": result}
+    except Exception as e:
+        logger.error(f"[FAILED] RAG HNSW index build error={str(e)}")
+        raise
+
+
+@celery_app.task(name="backfill_search_index_task")
+def backfill_search_index_task(batch_size: int = None):
+    """One-off repair of global_search_index: fills rows the triggers never
+    wrote (e.g. data from before they were installed) and drops orphans.
+
+    Not scheduled; the triggers keep the index current. Run it by hand after
+    installing or changing the triggers:
+    ``celery -A app.core.celery_app call backfill_search_index_task``.
+    """
+    db_gen = get_db()
+    db = next(db_gen)
+
+    try:
+        result = {
+            entity: {
+                "visited": backfill_search_index(
+                    db, entity=entity, batch_size=batch_size
+                ),
+                "pruned": prune_search_index(db, entity=entity, batch_size=batch_size),
+            }
+            for entity in SEARCH_ENTITIES
+        }
+        logger.info(f"[SUCCESS] Global search backfill {result}")
+        return result
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[FAILED] Global search backfill error={str(e)}")
+        raise
+    finally:
+        db_gen.close()
+
+
+@celery_app.task(name="compact_ai_transcripts_task")
+def compact_ai_transcripts_task(batch_size: int = None):
+    """One-off migration: move AI responses stored in files.metadata and
+    sessions.message into ai_transcripts. Safe to re-run."""
+    db_gen = get_db()
+    db = next(db_gen)
+
+    try:
+        stats = compact_ai_transcripts(db, batch_size=batch_size)
+        logger.info(f"[SUCCESS] AI transcript compaction {stats}")
+        return stats
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[FAILED] AI transcript compaction error={str(e)}")
+        raise
+    finally:
+        db_gen.close()
+
+
+@celery_app.task(name="cleanup_abandoned_uploads_task")
+def cleanup_abandoned_uploads_task():
+    """Discard direct uploads whose "complete" call never arrived."""
+    db_gen = get_db()
+    db = next(db_gen)
+
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.storage_signed_upload_ttl_seconds
+        )
+        candidates = (
+            db.query(Files.id, Files.storage_path)
+            .filter(Files.status == FILE_STATUS_UPLOADING, Files.created_at < cutoff)
+            .all()
+        )
+        # Claim each row the way complete_file_uploads does: a "complete"
+        # that lands first keeps its file, and this pass leaves it alone.
+        abandoned = [
+            candidate
+            for candidate in candidates
+            if db.query(Files)
+            .filter(Files.id == candidate.id, Files.status == FILE_STATUS_UPLOADING)
+            .update({"status": "deleted"}, synchronize_session=False)
+        ]
+        db.commit()
+
+        for file_record in abandoned:
+            # The client may have uploaded the bytes without completing.
+            run_in_worker_loop(delete_file_from_supabase(file_record.storage_path))
+
+        logger.info(f"[SUCCESS] Discarded {len(abandoned)} abandoned uploads")
+        return {"discarded": len(abandoned)}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[FAILED] Abandoned upload cleanup error={str(e)}")
+        raise
+
+    finally:
+        db_gen.close()
@@ -0,0 +1,42 @@
+import logging
+
+from app.core.celery_app import celery_app
+from app.core.database import get_db
+from app.services.step_jobs import requeue_stale_step_jobs, run_step_job
+from app.utils.ai_http_client import run_in_worker_loop
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="run_step_job_task")
+def run_step_job_task(job_id: int):
+    """Generate a planning/design/analysis step's documents.
+
+    Safe to deliver more than once: the job row decides which worker runs it,
+    and a restarted job skips documents it already checkpointed.
+    """
+    status = run_in_worker_loop(run_step_job(job_id))
+    logger.info(f"[SUCCESS] Step job {job_id} status={status}")
+    return {"job_id": job_id, "status": status}
+
+
+@celery_app.task(name="requeue_stale_step_jobs_task")
+def requeue_stale_step_jobs_task():
+    db_gen = get_db()
+    db = next(db_gen)
+
+    try:
+        job_ids = requeue_stale_step_jobs(db)
+        for job_id in job_ids:
+            run_step_job_task.delay(job_id)
+
+        logger.info(f"[SUCCESS] Requeued {len(job_ids)} stale step jobs")
+        return {"requeued": job_ids}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[FAILED] Step job requeue error={str(e)}")
+        raise
+
+    finally:
+        db_gen.close()
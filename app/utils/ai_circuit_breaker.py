@@ -0,0 +1,176 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict
+from urllib.parse import urlparse
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+AI_UNAVAILABLE_ERROR = (
+    "AI service is temporarily unavailable. Please try again in a moment."
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure breaker for one AI endpoint.
+
+    ``failure_threshold`` consecutive failures open the circuit; calls then
+    fail fast until ``recovery_timeout`` has passed, after which up to
+    ``half_open_max_calls`` probes are let through. A successful probe closes
+    the circuit, a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int,
+        recovery_timeout: float,
+        half_open_max_calls: int = 1,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise a 503 when the circuit is open; otherwise admit the call."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.recovery_timeout - self.clock()
+                if remaining > 0:
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail=AI_UNAVAILABLE_ERROR,
+                        headers={"Retry-After": str(max(1, math.ceil(remaining)))},
+                    )
+                self.state = HALF_OPEN
+                self.probes_in_flight = 0
+                logger.info(f"AI circuit {self.name} half-open, probing")
+
+            if self.state == HALF_OPEN:
+                if self.probes_in_flight >= self.half_open_max_calls:
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail=AI_UNAVAILABLE_ERROR,
+                        headers={"Retry-After": "1"},
+                    )
+                self.probes_in_flight += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"AI circuit {self.name} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.probes_in_flight = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(
+                        f"AI circuit {self.name} opened after {self.failures} failures"
+                    )
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self.probes_in_flight = 0
+
+    def release_probe(self) -> None:
+        # A half-open probe that ended without a verdict (e.g. a 4xx or a
+        # cancelled task) frees its slot for the next probe.
+        with self._lock:
+            if self.state == HALF_OPEN and self.probes_in_flight:
+                self.probes_in_flight -= 1
+
+
+class RetryBudget:
+    """Process-wide cap on retries as a fraction of recent calls.
+
+    Over a sliding ``window`` seconds, retries may not exceed ``ratio`` of
+    first attempts, with ``min_retries`` always allowed so low traffic can
+    still retry.
+    """
+
+    def __init__(
+        self, *, ratio: float, min_retries: int, window: float, clock=time.monotonic
+    ):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.clock = clock
+        self._calls = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        for events in (self._calls, self._retries):
+            while events and events[0] <= now - self.window:
+                events.popleft()
+
+    def record_call(self) -> None:
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            self._calls.append(now)
+
+    def try_acquire_retry(self) -> bool:
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            allowed = max(self.min_retries, self.ratio * len(self._calls))
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_retry_budget = None
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    parsed = urlparse(url)
+    key = f"{parsed.netloc}{parsed.path}"
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                key,
+                failure_threshold=settings.ai_circuit_failure_threshold,
+                recovery_timeout=settings.ai_circuit_recovery_seconds,
+                half_open_max_calls=settings.ai_circuit_half_open_max_calls,
+            )
+            _breakers[key] = breaker
+        return breaker
+
+
+def get_retry_budget() -> RetryBudget:
+    global _retry_budget
+    with _breakers_lock:
+        if _retry_budget is None:
+            _retry_budget = RetryBudget(
+                ratio=settings.ai_retry_budget_ratio,
+                min_retries=settings.ai_retry_budget_min_retries,
+                window=settings.ai_retry_budget_window_seconds,
+            )
+        return _retry_budget
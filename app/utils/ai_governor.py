@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import math
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+AI_BUSY_ERROR = "AI service is busy. Please try again shortly."
+
+
+def _reject(retry_after: float) -> HTTPException:
+    # Same status as quota/token errors from the AI service, so callers and
+    # the frontend already treat it as "back off and retry".
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=AI_BUSY_ERROR,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class TokenBucket:
+    """Global request-rate limiter with reservations.
+
+    A caller reserves the next token immediately and sleeps until it is due,
+    so the wait is known up front and callers whose wait exceeds their
+    deadline are rejected without queueing at all.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, max_wait: float) -> float:
+        """Take one token and return how long to wait before using it.
+
+        Raises a 429 without taking the token when the wait exceeds
+        ``max_wait``.
+        """
+        self._refill()
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if wait > max_wait:
+            raise _reject(wait)
+        self.tokens -= 1
+        return wait
+
+
+class AIGovernor:
+    """Admission control for calls to the AI service.
+
+    Each user may have ``max_per_user`` calls in flight and at most
+    ``user_queue_limit`` more waiting; every attempt also needs a token from
+    the process-wide bucket. Waiting is bounded by ``queue_timeout``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_per_user: int,
+        user_queue_limit: int,
+        rate_per_second: float,
+        burst: int,
+        queue_timeout: float,
+    ):
+        self.max_per_user = max_per_user
+        self.user_queue_limit = user_queue_limit
+        self.queue_timeout = queue_timeout
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._user_slots: Dict[int, asyncio.Semaphore] = {}
+        # In-flight plus queued calls per user.
+        self._user_load: Dict[int, int] = {}
+
+    def _leave(self, user_id: int) -> None:
+        self._user_load[user_id] -= 1
+        if not self._user_load[user_id]:
+            # Drop idle users so the tables do not grow with every user seen.
+            del self._user_load[user_id]
+            self._user_slots.pop(user_id, None)
+
+    async def _acquire_user_slot(self, user_id: int, deadline: float) -> None:
+        load = self._user_load.get(user_id, 0)
+        if load >= self.max_per_user + self.user_queue_limit:
+            raise _reject(self.queue_timeout)
+
+        self._user_load[user_id] = load + 1
+        slots = self._user_slots.setdefault(
+            user_id, asyncio.Semaphore(self.max_per_user)
+        )
+        try:
+            await asyncio.wait_for(
+                slots.acquire(), timeout=max(0.0, deadline - time.monotonic())
+            )
+        except asyncio.TimeoutError:
+            self._leave(user_id)
+            logger.warning(f"AI admission timed out for user {user_id}")
+            raise _reject(self.queue_timeout)
+        except BaseException:
+            self._leave(user_id)
+            raise
+
+    def _release_user_slot(self, user_id: int) -> None:
+        self._user_slots[user_id].release()
+        self._leave(user_id)
+
+    async def take_token(self, deadline: Optional[float] = None) -> None:
+        if deadline is None:
+            deadline = time.monotonic() + self.queue_timeout
+        wait = self.bucket.reserve(max(0.0, deadline - time.monotonic()))
+        if wait:
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def admit(self, user_id: Optional[int]):
+        deadline = time.monotonic() + self.queue_timeout
+        if user_id is not None:
+            await self._acquire_user_slot(user_id, deadline)
+        try:
+            await self.take_token(deadline)
+            yield self
+        finally:
+            if user_id is not None:
+                self._release_user_slot(user_id)
+
+
+class _NoopGovernor:
+    async def take_token(self, deadline: Optional[float] = None) -> None:
+        return None
+
+    @asynccontextmanager
+    async def admit(self, user_id: Optional[int]):
+        yield self
+
+
+# Semaphores belong to the event loop they are awaited on; keep one governor
+# per loop (API loop, Celery worker loop).
+_governors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AIGovernor]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_ai_governor():
+    if not settings.ai_governor_enabled:
+        return _NoopGovernor()
+    loop = asyncio.get_running_loop()
+    governor = _governors.get(loop)
+    if governor is None:
+        governor = AIGovernor(
+            max_per_user=settings.ai_max_concurrent_per_user,
+            user_queue_limit=settings.ai_user_queue_limit,
+            rate_per_second=settings.ai_global_rate_per_second,
+            burst=settings.ai_global_burst,
+            queue_timeout=settings.ai_queue_timeout_seconds,
+        )
+        _governors[loop] = governor
+    return governor
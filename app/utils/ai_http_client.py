@@ -0,0 +1,101 @@
+import asyncio
+import atexit
+import logging
+import weakref
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# httpx pools are bound to the event loop that opened their connections, so
+# keep one client per loop: the API's loop (opened in main.lifespan) and, in
+# Celery workers, the per-process loop behind run_in_worker_loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.ai_http2,
+        limits=httpx.Limits(
+            max_connections=settings.ai_http_max_connections,
+            max_keepalive_connections=settings.ai_http_max_keepalive_connections,
+            keepalive_expiry=settings.ai_http_keepalive_expiry,
+        ),
+        timeout=ai_timeout_for(None),
+    )
+
+
+def get_ai_http_client() -> httpx.AsyncClient:
+    """Return the pooled AI client for the running event loop, creating it
+    on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _build_client()
+        _clients[loop] = client
+    return client
+
+
+async def open_ai_http_client() -> httpx.AsyncClient:
+    client = get_ai_http_client()
+    logger.info(
+        f"AI HTTP client ready (http2={settings.ai_http2}, "
+        f"max_connections={settings.ai_http_max_connections})"
+    )
+    return client
+
+
+async def close_ai_http_client() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def ai_timeout_for(
+    url: Optional[str],
+    *,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+) -> httpx.Timeout:
+    """Timeout for one AI endpoint.
+
+    Explicit arguments win, then ``ai_endpoint_read_timeouts`` keyed by URL
+    path, then the global ``ai_read_timeout``.
+    """
+    if read_timeout is None and url:
+        read_timeout = settings.ai_endpoint_read_timeouts.get(urlparse(url).path)
+    return httpx.Timeout(
+        connect=connect_timeout or settings.ai_connect_timeout,
+        read=read_timeout or settings.ai_read_timeout,
+        write=10,
+        pool=10,
+    )
+
+
+def run_in_worker_loop(coro):
+    """Run ``coro`` on this process's long-lived event loop.
+
+    Celery tasks use this instead of ``asyncio.run`` so the AI client and its
+    keep-alive connections survive from one task to the next.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(coro)
+
+
+@atexit.register
+def _close_worker_loop() -> None:
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+    try:
+        _worker_loop.run_until_complete(close_ai_http_client())
+    finally:
+        _worker_loop.close()
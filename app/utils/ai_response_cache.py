@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "ai_response:"
+
+
+def ai_cache_key(
+    ai_service_url: str, payload: Dict[str, Any], headers: Dict[str, str]
+) -> str:
+    """Hash of everything that decides the AI output.
+
+    The payload carries message, project_id, document_format (and content_id
+    on regeneration); provider and model come from the credential headers.
+    The API key itself is not part of the key.
+    """
+    material = {
+        "endpoint": ai_service_url,
+        "payload": payload,
+        "provider": headers.get("X-AI-Provider"),
+        "model": headers.get("X-AI-Model"),
+    }
+    digest = hashlib.sha256(
+        json.dumps(material, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{digest}"
+
+
+class AIResponseCoalescer:
+    """Shares one in-flight AI call between identical concurrent requests.
+
+    The call runs as its own task so a caller that goes away (a stopped step,
+    a closed WebSocket) does not fail the others; it is only cancelled once
+    nobody is waiting for it any more.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def run(
+        self, key: str, call: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Await ``call()`` or the identical call already in flight.
+
+        Returns ``(result, joined)``; ``joined`` is true when another caller
+        started the call.
+        """
+        task = self._inflight.get(key)
+        joined = task is not None
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task), joined
+        except asyncio.CancelledError:
+            if self._inflight.get(key) is task and self._waiters[key] == 1:
+                task.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            # Mark the error retrieved even if every waiter was cancelled.
+            task.exception()
+
+
+# Tasks and the Redis connection pool belong to one event loop (API loop,
+# Celery worker loop).
+_coalescers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AIResponseCoalescer]" = (
+    weakref.WeakKeyDictionary()
+)
+_redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.Redis]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_ai_coalescer() -> AIResponseCoalescer:
+    loop = asyncio.get_running_loop()
+    coalescer = _coalescers.get(loop)
+    if coalescer is None:
+        coalescer = AIResponseCoalescer()
+        _coalescers[loop] = coalescer
+    return coalescer
+
+
+def _get_redis() -> redis.Redis:
+    loop = asyncio.get_running_loop()
+    client = _redis_clients.get(loop)
+    if client is None:
+        client = redis.from_url(
+            settings.CELERY_BROKER_URL,
+            socket_timeout=0.2,
+            socket_connect_timeout=0.2,
+        )
+        _redis_clients[loop] = client
+    return client
+
+
+async def get_cached_ai_response(key: str) -> Optional[Dict[str, Any]]:
+    try:
+        value = await _get_redis().get(key)
+    except Exception as e:
+        logger.warning(f"AI response cache unavailable: {e}")
+        return None
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+
+async def store_ai_response(key: str, data: Dict[str, Any]) -> None:
+    try:
+        await _get_redis().set(
+            key, json.dumps(data), ex=settings.ai_response_cache_ttl_seconds
+        )
+    except Exception as e:
+        logger.warning(f"AI response cache unavailable: {e}")
@@ -0,0 +1,148 @@
+import json
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+# Set by the step runners around a document generation so generate_document
+# can stream without threading a callback through the FastAPI endpoint
+# functions the runners call.
+_ai_stream_sink: ContextVar[Optional[DeltaCallback]] = ContextVar(
+    "ai_stream_sink", default=None
+)
+
+
+def stream_ai_deltas(callback: DeltaCallback):
+    """Forward AI output deltas to ``callback`` for calls made inside the block.
+
+    A no-op unless AI_STREAMING_ENABLED is set.
+    """
+    if not settings.ai_streaming_enabled:
+        return nullcontext()
+    return _bind_sink(callback)
+
+
+@contextmanager
+def _bind_sink(callback: DeltaCallback):
+    token = _ai_stream_sink.set(callback)
+    try:
+        yield
+    finally:
+        _ai_stream_sink.reset(token)
+
+
+def current_ai_stream_sink() -> Optional[DeltaCallback]:
+    return _ai_stream_sink.get()
+
+
+def doc_delta_sender(notifier, *, step: str, index: int, doc_type: str) -> DeltaCallback:
+    async def send(delta: str) -> None:
+        await notifier.send(
+            {
+                "type": "doc_delta",
+                "step": step,
+                "index": index,
+                "doc_type": doc_type,
+                "delta": delta,
+            }
+        )
+
+    return send
+
+
+async def iter_sse_events(response: httpx.Response) -> AsyncIterator[Tuple[str, Dict]]:
+    """Yield ``(event, data)`` pairs from a server-sent events response.
+
+    ``data`` is decoded as JSON; plain-text data is wrapped as ``{"delta": text}``.
+    """
+    event = "message"
+    data_lines = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data_lines:
+                raw = "\n".join(data_lines)
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    data = {"delta": raw}
+                if not isinstance(data, dict):
+                    data = {"delta": str(data)}
+                yield event, data
+            event, data_lines = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "event":
+            event = value
+        elif field == "data":
+            data_lines.append(value)
+
+    if data_lines:
+        raw = "\n".join(data_lines)
+        try:
+            yield event, json.loads(raw)
+        except ValueError:
+            yield event, {"delta": raw}
+
+
+async def stream_ai_response(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: Dict,
+    headers: Dict[str, str],
+    timeout: httpx.Timeout,
+    on_delta: DeltaCallback,
+) -> httpx.Response:
+    """POST with ``stream: true`` and forward ``delta`` events to ``on_delta``.
+
+    Returns a response shaped like the non-streaming JSON body so callers
+    handle both modes the same way: the ``done`` event's body, with the
+    concatenated deltas as its ``response`` when it carries none. A stream
+    that ends without ``done`` was cut off and comes back as a 502. A service
+    that answers with plain JSON is passed through unchanged.
+    """
+    request_headers = dict(headers or {})
+    request_headers["Accept"] = "text/event-stream"
+
+    async with client.stream(
+        "POST",
+        url,
+        json={**payload, "stream": True},
+        headers=request_headers,
+        timeout=timeout,
+    ) as response:
+        content_type = response.headers.get("content-type", "")
+        if response.status_code >= 400 or "text/event-stream" not in content_type:
+            await response.aread()
+            return response
+
+        parts = []
+        final = None
+        async for event, data in iter_sse_events(response):
+            if event == "error":
+                return httpx.Response(data.get("status_code", 502), json=data)
+            if event == "done":
+                final = data
+                break
+            if "delta" in data:
+                delta = str(data["delta"])
+                parts.append(delta)
+                await on_delta(delta)
+
+    if final is None:
+        return httpx.Response(
+            502, json={"detail": "AI stream ended before the done event"}
+        )
+    if not isinstance(final.get("response"), dict):
+        final = {
+            **final,
+            "response": {"content": "".join(parts), "status_code": 200},
+        }
+    return httpx.Response(200, json=final)
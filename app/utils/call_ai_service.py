@@ -1,4 +1,5 @@
 import asyncio
+import json
 import random
 import httpx
 import logging
@@ -6,6 +7,17 @@ from fastapi import HTTPException, status
 from typing import Dict, Any, Optional
 from sqlalchemy.orm import Session
 from app.services.ai_credentials import resolve_ai_headers_for_user
+from app.utils.ai_circuit_breaker import get_circuit_breaker, get_retry_budget
+from app.utils.ai_governor import get_ai_governor
+from app.core.config import settings
+from app.utils.ai_http_client import ai_timeout_for, get_ai_http_client
+from app.utils.ai_response_cache import (
+    ai_cache_key,
+    get_ai_coalescer,
+    get_cached_ai_response,
+    store_ai_response,
+)
+from app.utils.ai_streaming import DeltaCallback, stream_ai_response
 
 logger = logging.getLogger(__name__)
 
@@ -40,16 +52,24 @@ async def call_ai_service(
     db: Optional[Session] = None,
     user_id: Optional[int] = None,
     retries: int = 3,
-    connect_timeout: int = 10,
-    read_timeout: int = 180,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    on_delta: Optional[DeltaCallback] = None,
+    dedupe: bool = False,
 ):
-    last_error: Optional[str] = None
+    """POST ``payload`` to the AI service and return its JSON body.
+
+    With ``on_delta`` the request asks for a server-sent event stream and
+    each output delta is awaited on the callback as it arrives; the return
+    value is the same assembled body as a non-streaming call.
 
-    timeout = httpx.Timeout(
-        connect=connect_timeout,
-        read=read_timeout,
-        write=10,
-        pool=10,
+    With ``dedupe`` identical calls (same endpoint, payload, provider and
+    model) share one in-flight request and a short-lived Redis cache.
+    """
+    timeout = ai_timeout_for(
+        ai_service_url,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
     )
 
     headers: Dict[str, str] = {}
@@ -58,27 +78,112 @@ async def call_ai_service(
         if ai_headers:
             headers.update(ai_headers)
 
+    async def call():
+        # Admission control: per-user concurrency and the global request rate.
+        async with get_ai_governor().admit(user_id):
+            return await _post_with_retries(
+                ai_service_url,
+                payload,
+                headers,
+                retries=retries,
+                timeout=timeout,
+                on_delta=on_delta,
+            )
+
+    if not dedupe or not settings.ai_response_dedupe_enabled:
+        return await call()
+
+    key = ai_cache_key(ai_service_url, payload, headers)
+    data = await get_cached_ai_response(key)
+    if data is not None:
+        logger.info(f"AI response cache hit → {ai_service_url}")
+        shared = True
+    else:
+
+        async def call_and_store():
+            data = await call()
+            if settings.ai_response_cache_ttl_seconds > 0:
+                await store_ai_response(key, data)
+            return data
+
+        data, shared = await get_ai_coalescer().run(key, call_and_store)
+        if shared:
+            logger.info(f"Joined in-flight AI call → {ai_service_url}")
+
+    if shared and on_delta is not None:
+        # Streaming clients still get the text, as a single delta.
+        await on_delta(_response_text(data))
+    return data
+
+
+def _response_text(data: Dict[str, Any]) -> str:
+    content = (data.get("response") or {}).get("content", "")
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+async def _post_with_retries(
+    ai_service_url: str,
+    payload: Dict[str, Any],
+    headers: Dict[str, str],
+    *,
+    retries: int,
+    timeout: httpx.Timeout,
+    on_delta: Optional[DeltaCallback] = None,
+):
+    last_error: Optional[str] = None
+    breaker = get_circuit_breaker(ai_service_url)
+    retry_budget = get_retry_budget()
+    retry_budget.record_call()
+    streamed = False
+
+    async def forward_delta(delta: str) -> None:
+        nonlocal streamed
+        streamed = True
+        await on_delta(delta)
+
     for attempt in range(1, retries + 1):
+        if attempt > 1:
+            # Retries draw from the same global budget as first attempts.
+            await get_ai_governor().take_token()
+
         if asyncio.current_task() and asyncio.current_task().cancelled():
             logger.info(f"Task cancelled before attempt {attempt}")
             raise asyncio.CancelledError()
 
+        # Fails fast with 503 while the endpoint's circuit is open.
+        breaker.before_call()
+        judged = False
+
         try:
             logger.info(
                 f"Calling AI service (attempt {attempt}/{retries}) → {ai_service_url}"
             )
 
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
+            # Shared pooled client: attempts and calls reuse keep-alive connections.
+            if on_delta is not None:
+                response = await stream_ai_response(
+                    get_ai_http_client(),
+                    ai_service_url,
+                    payload,
+                    headers,
+                    timeout,
+                    forward_delta,
+                )
+            else:
+                response = await get_ai_http_client().post(
                     ai_service_url,
                     json=payload,
                     headers=headers or None,
+                    timeout=timeout,
                 )
 
-            # try:
-            #     logger.info(f"AI Response json={response.json()}")
-            # except Exception as e:
-            #     logger.error(f"AI Response not json: {response.text}")
+            if response.status_code >= 500:
+                breaker.record_failure()
+            elif response.status_code >= 400:
+                breaker.release_probe()
+            else:
+                breaker.record_success()
+            judged = True
 
             # ---------- BODY LEVEL ----------
             try:
@@ -104,34 +209,36 @@ async def call_ai_service(
                         status_code=502,
                         detail=GENERIC_AI_ERROR,
                     )
-                continue
 
-            if data.get("type") == "metadata_extraction":
-                return data
+            else:
+                if data.get("type") == "metadata_extraction":
+                    return data
 
-            ai_res = data.get("response")
+                ai_res = data.get("response")
 
-            content = ai_res.get("content")
-            inner_status = ai_res.get("status_code", 200)
+                content = ai_res.get("content")
+                inner_status = ai_res.get("status_code", 200)
 
-            if inner_status != 200:
-                logger.error(f"AI logical error: {content}")
-                if _is_quota_or_token_error(content):
-                    logger.warning(
-                        f"AI quota/token error detected in content: {content}"
-                    )
+                if inner_status != 200:
+                    logger.error(f"AI logical error: {content}")
+                    if _is_quota_or_token_error(content):
+                        logger.warning(
+                            f"AI quota/token error detected in content: {content}"
+                        )
+                        raise HTTPException(
+                            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail="AI service error: quota exceeded or token limit reached",
+                        )
                     raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail="AI service error: quota exceeded or token limit reached",
+                        status_code=502,
+                        detail=GENERIC_AI_ERROR,
                     )
-                raise HTTPException(
-                    status_code=502,
-                    detail=GENERIC_AI_ERROR,
-                )
 
-            return data
+                return data
 
         except asyncio.CancelledError:
+            if not judged:
+                breaker.release_probe()
             logger.warning(f"AI Service Call cancelled at {ai_service_url}")
             raise
 
@@ -139,19 +246,39 @@ async def call_ai_service(
             raise
 
         except (httpx.ReadTimeout, httpx.ConnectTimeout) as e:
+            breaker.record_failure()
             last_error = str(e)
             logger.warning(f"AI timeout (attempt {attempt}/{retries})")
 
         except httpx.RequestError as e:
+            breaker.record_failure()
             last_error = str(e)
             logger.warning(f"AI request error (attempt {attempt}/{retries}): {repr(e)}")
 
+        except Exception:
+            # E.g. a failing delta callback or a malformed event: not the
+            # endpoint's verdict, but a half-open probe slot must not leak.
+            if not judged:
+                breaker.release_probe()
+            raise
+
+        if streamed:
+            # Clients have already rendered part of this answer; a retry
+            # would stream a second copy on top of it.
+            logger.warning(f"AI stream interrupted, not retrying {ai_service_url}")
+            break
+
         if attempt < retries:
+            if not retry_budget.try_acquire_retry():
+                logger.warning(
+                    f"AI retry budget exhausted, not retrying {ai_service_url}"
+                )
+                break
             delay = min(2**attempt, 10) + random.uniform(0, 1)
             await asyncio.sleep(delay)
 
     logger.error(
-        f"AI service unavailable after {retries} retries. Last error: {last_error}"
+        f"AI service unavailable after {attempt} attempts. Last error: {last_error}"
     )
 
     raise HTTPException(
@@ -15,6 +15,7 @@ def _b64decode(data: str) -> bytes:
     return base64.b64decode(data.encode("utf-8"))
 
 
+@lru_cache(maxsize=1)
 def get_master_key() -> bytes:
     try:
         key = _b64decode(settings.app_aes_key)
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import mimetypes
+import re
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.core.config import settings
+from app.models.file import Files
+from app.utils.storage_backend import (
+    ByteRange,
+    RangeNotSatisfiable,
+    get_storage_backend,
+)
+
+logger = logging.getLogger(__name__)
+
+_SINGLE_RANGE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+def file_etag(doc: Files) -> str:
+    """Strong validator for the stored object behind ``doc``.
+
+    Every write to storage also updates the row, so id, path, updated_at and
+    size identify one version of the bytes without reading them.
+    """
+    version = f"{doc.id}:{doc.storage_path}:{doc.updated_at}:{doc.file_size}"
+    return f'"{hashlib.sha256(version.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, so ``W/`` prefixes are ignored)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def parse_range_header(header: Optional[str]) -> Optional[ByteRange]:
+    """Parse a single ``bytes=`` range; anything else means the whole file."""
+    if not header:
+        return None
+    match = _SINGLE_RANGE.match(header)
+    if not match:
+        # Multi-range and other units are legal to ignore (RFC 9110 14.2).
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        return None, int(end)
+    if end and int(end) < int(start):
+        return None
+    return int(start), int(end) if end else None
+
+
+async def storage_file_response(request: Request, doc: Files) -> Response:
+    """Stream ``doc``'s stored object in chunks, honouring Range, If-Range and
+    If-None-Match."""
+    filename = f"{doc.name}{doc.extension or ''}"
+    media_type, _ = mimetypes.guess_type(filename)
+    if not media_type:
+        media_type = "application/octet-stream"
+
+    etag = file_etag(doc)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": (
+            f'attachment; filename="{filename}"; '
+            f"filename*=UTF-8''{quote(filename)}"
+        ),
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=304, headers={"ETag": etag, "Accept-Ranges": "bytes"}
+        )
+
+    byte_range = parse_range_header(request.headers.get("range"))
+    if_range = request.headers.get("if-range")
+    if byte_range is not None and if_range and if_range.strip() != etag:
+        byte_range = None
+
+    try:
+        stream = await get_storage_backend().open_stream(
+            doc.storage_path,
+            byte_range,
+            chunk_size=settings.storage_stream_chunk_size,
+        )
+    except RangeNotSatisfiable as e:
+        return Response(
+            status_code=416,
+            headers={"Content-Range": f"bytes */{e.total_size}", "ETag": etag},
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File content not found")
+
+    headers["Content-Length"] = str(stream.content_length)
+    status_code = 200
+    if stream.is_partial:
+        status_code = 206
+        headers["Content-Range"] = (
+            f"bytes {stream.start}-{stream.end}/{stream.total_size}"
+        )
+
+    async def body():
+        try:
+            async for chunk in stream.chunks:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        body(), status_code=status_code, media_type=media_type, headers=headers
+    )
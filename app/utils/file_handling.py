@@ -3,7 +3,7 @@ import os
 from typing import List, Tuple
 import uuid
 from fastapi import UploadFile
-from app.utils.supabase_client import supabase
+from app.utils.storage_backend import get_storage_backend
 from PyPDF2 import PdfReader
 import docx
 import io
@@ -15,8 +15,6 @@ import json as json_lib
 
 logger = logging.getLogger(__name__)
 
-SUPABASE_BUCKET = "uploads"
-
 
 def sanitize_filename(filename: str) -> str:
     name, ext = os.path.splitext(filename)
@@ -39,14 +37,14 @@ async def upload_to_supabase(
         new_file_name = sanitize_filename(filename_to_use)
         file_data = await file.read()
 
-        res = supabase.storage.from_(SUPABASE_BUCKET).upload(new_file_name, file_data)
+        path = await get_storage_backend().upload(new_file_name, file_data)
 
-        if not res.path:
+        if not path:
             logger.error(f"Failed to upload {file.filename}")
             return None
 
-        logger.info(f"Uploaded {file.filename} to Supabase → {res.path}")
-        return res.path
+        logger.info(f"Uploaded {file.filename} to Supabase → {path}")
+        return path
 
     except Exception as e:
         logger.exception(f"Upload failed for {file.filename}: {e}")
@@ -57,9 +55,9 @@ async def delete_file_from_supabase(file_path: str) -> bool:
     try:
         clean_path = file_path.lstrip("/")
 
-        response = supabase.storage.from_(SUPABASE_BUCKET).remove([clean_path])
+        removed = await get_storage_backend().remove([clean_path])
 
-        if response and len(response) > 0:
+        if removed:
             logger.info(f"Deleted file from storage: {clean_path}")
             return True
 
@@ -73,9 +71,9 @@ async def delete_file_from_supabase(file_path: str) -> bool:
 
 async def delete_file_from_supabase_strict(file_path: str) -> bool:
     clean_path = file_path.lstrip("/")
-    response = supabase.storage.from_(SUPABASE_BUCKET).remove([clean_path])
+    removed = await get_storage_backend().remove([clean_path])
 
-    if response and len(response) > 0:
+    if removed:
         logger.info(f"Deleted file from storage: {clean_path}")
     else:
         logger.info(f"Storage file already absent: {clean_path}")
@@ -87,9 +85,7 @@ async def list_file_from_supabase(existing_files_db: List):
     existing_files_uploadfile = []
     for file in existing_files_db:
         try:
-            file_bytes = supabase.storage.from_(SUPABASE_BUCKET).download(
-                file.file_path
-            )
+            file_bytes = await get_storage_backend().download(file.file_path)
             existing_files_uploadfile.append(
                 UploadFile(
                     filename=file.file_path.split("/")[-1], file=io.BytesIO(file_bytes)
@@ -102,7 +98,7 @@ async def list_file_from_supabase(existing_files_db: List):
 
 async def download_file_from_supabase(file_path: str):
     try:
-        file_bytes = supabase.storage.from_(SUPABASE_BUCKET).download(file_path)
+        file_bytes = await get_storage_backend().download(file_path)
 
         return io.BytesIO(file_bytes)
 
@@ -111,12 +107,25 @@ async def download_file_from_supabase(file_path: str):
         raise
 
 
+async def download_file_to_path(file_path: str, dest_path: str) -> int:
+    """Stream a stored object to ``dest_path`` chunk by chunk; returns bytes written."""
+    stream = await get_storage_backend().open_stream(file_path)
+    written = 0
+    try:
+        with open(dest_path, "wb") as output:
+            async for chunk in stream.chunks:
+                output.write(chunk)
+                written += len(chunk)
+    finally:
+        await stream.aclose()
+    return written
+
+
 async def update_file_from_supabase(file_path: str, file: UploadFile) -> str | None:
 
     file_data = await file.read()
     try:
-        res = supabase.storage.from_(SUPABASE_BUCKET).update(file_path, file_data)
-        return res.path
+        return await get_storage_backend().update(file_path, file_data)
 
     except Exception as e:
         logger.exception(f"Error when getting file '{file_path}': {e}")
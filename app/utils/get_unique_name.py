@@ -24,6 +24,16 @@ def get_unique_diagram_name(
     
     logger.info(f"existing_documents {existing_documents}")
 
+    return pick_unique_name(base_title, [row[0] for row in existing_documents])
+
+
+def pick_unique_name(title: str, existing_names) -> str:
+    """get_unique_diagram_name over names the caller already loaded."""
+    base_title = title.strip()
+    existing_documents = [
+        name for name in existing_names if name and name.startswith(base_title)
+    ]
+
     max_suffix = 0
 
     safe_base_title = re.escape(base_title)
@@ -32,8 +42,7 @@ def get_unique_diagram_name(
 
     is_exact_match = False
 
-    for doc_name_tuple in existing_documents:
-        doc_name = doc_name_tuple[0] 
+    for doc_name in existing_documents:
 
         if doc_name == base_title:
             is_exact_match = True
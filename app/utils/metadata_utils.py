@@ -71,8 +71,6 @@ def count_lines(content: str) -> int:
 def create_ai_generated_metadata(
     doc_type: str,
     content: str,
-    message: Optional[str] = None,
-    ai_response: Optional[Dict] = None,
     step: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
@@ -86,8 +84,6 @@ def create_ai_generated_metadata(
     Args:
         doc_type: The document type identifier (e.g., 'business-case')
         content: The generated content (to count lines)
-        message: Optional user message/prompt
-        ai_response: Optional raw AI response
         step: Optional step identifier (e.g., 'planning', 'analysis')
         
     Returns:
@@ -118,10 +114,8 @@ def create_ai_generated_metadata(
     }
     
     # Add optional fields
-    if message:
-        metadata["message"] = message
-    if ai_response:
-        metadata["ai_response"] = ai_response
+    # (the raw AI response lives in ai_transcripts, see attach_ai_transcript;
+    # the prompt stays in the user Chat_Session row)
     if step:
         metadata["step"] = step
     print("done create_ai_generated_metadata")
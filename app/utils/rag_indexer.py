@@ -1,20 +1,30 @@
+import hashlib
+import json
 import logging
 import re
-from typing import Iterable, List, Optional
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from openai import OpenAI
-from sqlalchemy import text
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+from sqlalchemy import bindparam, text
 
 from app.core.config import settings
+from app.core.rag_database import rag_vector_type
 
 logger = logging.getLogger(__name__)
 
-
 def _normalize_text(text: str) -> str:
     return "\n".join(line.rstrip() for line in text.splitlines()).strip()
 
 
+@lru_cache(maxsize=1)
 def _get_token_encoder():
+    # Loaded once per process; tiktoken builds its BPE ranks on first use.
     try:
         import tiktoken
 
@@ -23,42 +33,32 @@ def _get_token_encoder():
         return None
 
 
-def _count_tokens(text: str) -> int:
+def _encode(text: str) -> List:
     if not text:
-        return 0
+        return []
 
     encoder = _get_token_encoder()
     if encoder is not None:
-        return len(encoder.encode(text))
+        return encoder.encode(text, disallowed_special=())
 
-    # Fallback approximation: 4 chars per token.
-    return max(1, len(text) // 4)
+    # Fallback approximation: 4 chars per token, kept as text slices so
+    # decoding stays exact.
+    return [text[idx : idx + 4] for idx in range(0, len(text), 4)]
 
 
-def _trim_to_tokens(text: str, max_tokens: int) -> str:
-    if max_tokens <= 0 or not text:
+def _decode(tokens: List) -> str:
+    if not tokens:
         return ""
 
     encoder = _get_token_encoder()
     if encoder is not None:
-        tokens = encoder.encode(text)
-        return encoder.decode(tokens[:max_tokens])
+        return encoder.decode(tokens)
 
-    approx_len = max_tokens * 4
-    return text[:approx_len]
+    return "".join(tokens)
 
 
-def _last_tokens(text: str, token_count: int) -> str:
-    if token_count <= 0 or not text:
-        return ""
-
-    encoder = _get_token_encoder()
-    if encoder is not None:
-        tokens = encoder.encode(text)
-        return encoder.decode(tokens[-token_count:])
-
-    words = text.split()
-    return " ".join(words[-token_count:])
+def _count_tokens(text: str) -> int:
+    return len(_encode(text))
 
 
 def _split_paragraphs(text: str) -> List[str]:
@@ -82,59 +82,84 @@ def _split_units(
     next_splitter: Optional[callable],
     next_joiner: str,
     fallback_splitter: Optional[callable],
-) -> List[str]:
-    chunks: List[str] = []
-    current: List[str] = []
+) -> List[List]:
+    """Greedily pack units into token lists of at most ``max_tokens``.
+
+    Every unit is encoded exactly once and chunks are assembled from the
+    per-unit token lists, so the cost is linear in the document length.
+    """
+    joiner_tokens = _encode(joiner)
+    chunks: List[List] = []
+    current: List = []
 
     for unit in units:
-        unit_tokens = _count_tokens(unit)
-
-        if unit_tokens > max_tokens and next_splitter is not None:
-            sub_units = next_splitter(unit)
-            sub_chunks = _split_units(
-                sub_units,
-                max_tokens=max_tokens,
-                joiner=next_joiner,
-                next_splitter=fallback_splitter,
-                next_joiner=" ",
-                fallback_splitter=None,
-            )
-            chunks.extend(sub_chunks)
+        unit_tokens = _encode(unit)
+
+        if len(unit_tokens) > max_tokens:
+            if current:
+                chunks.append(current)
+                current = []
+
+            if next_splitter is not None:
+                chunks.extend(
+                    _split_units(
+                        next_splitter(unit),
+                        max_tokens=max_tokens,
+                        joiner=next_joiner,
+                        next_splitter=fallback_splitter,
+                        next_joiner=" ",
+                        fallback_splitter=None,
+                    )
+                )
+            else:
+                chunks.append(unit_tokens[:max_tokens])
             continue
 
-        if unit_tokens > max_tokens and next_splitter is None:
-            chunks.append(_trim_to_tokens(unit, max_tokens))
+        if not current:
+            current = list(unit_tokens)
             continue
 
-        candidate = joiner.join(current + [unit]) if current else unit
-        if _count_tokens(candidate) <= max_tokens:
-            current.append(unit)
+        if len(current) + len(joiner_tokens) + len(unit_tokens) <= max_tokens:
+            current.extend(joiner_tokens)
+            current.extend(unit_tokens)
             continue
 
-        if current:
-            chunks.append(joiner.join(current).strip())
-        current = [unit]
+        chunks.append(current)
+        current = list(unit_tokens)
 
     if current:
-        chunks.append(joiner.join(current).strip())
+        chunks.append(current)
 
     return chunks
 
 
-def _apply_overlap(chunks: List[str], *, max_tokens: int, overlap_tokens: int) -> List[str]:
+def _apply_overlap(
+    chunks: List[List], *, max_tokens: int, overlap_tokens: int
+) -> List[List]:
     if overlap_tokens <= 0 or not chunks:
         return chunks
 
+    separator = _encode(" ")
     overlapped = [chunks[0]]
-    for chunk in chunks[1:]:
-        prefix = _last_tokens(overlapped[-1], overlap_tokens)
-        merged = f"{prefix} {chunk}".strip() if prefix else chunk
-        overlapped.append(_trim_to_tokens(merged, max_tokens))
+    for tokens in chunks[1:]:
+        prefix = overlapped[-1][-overlap_tokens:]
+        merged = prefix + separator + tokens if prefix else tokens
+        overlapped.append(merged[:max_tokens])
 
     return overlapped
 
 
-def _chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+@dataclass(frozen=True)
+class _Chunk:
+    content: str
+    token_count: int
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.content.encode("utf-8")).hexdigest()
+
+
+def _build_chunks(text: str, chunk_size: int, overlap: int) -> List[_Chunk]:
     if chunk_size <= 0:
         raise ValueError("chunk_size must be > 0")
     if overlap < 0:
@@ -147,7 +172,7 @@ def _chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
         return []
 
     paragraphs = _split_paragraphs(normalized)
-    chunks = _split_units(
+    token_chunks = _split_units(
         paragraphs,
         max_tokens=chunk_size,
         joiner="\n\n",
@@ -155,35 +180,459 @@ def _chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
         next_joiner=" ",
         fallback_splitter=_split_words,
     )
+    token_chunks = _apply_overlap(
+        token_chunks, max_tokens=chunk_size, overlap_tokens=overlap
+    )
 
-    return _apply_overlap(chunks, max_tokens=chunk_size, overlap_tokens=overlap)
+    chunks: List[_Chunk] = []
+    for tokens in token_chunks:
+        content = _decode(tokens).strip()
+        if content:
+            chunks.append(_Chunk(content=content, token_count=len(tokens)))
+    return chunks
 
 
-def _estimate_tokens(text: str) -> int:
-    return _count_tokens(text)
+def _chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+    return [chunk.content for chunk in _build_chunks(text, chunk_size, overlap)]
 
 
-def _batch(iterable: List[str], batch_size: int) -> Iterable[List[str]]:
+def _batch(iterable: List, batch_size: int) -> Iterable[List]:
     for idx in range(0, len(iterable), batch_size):
         yield iterable[idx : idx + batch_size]
 
 
-def _embed_texts(texts: List[str]) -> List[List[float]]:
+def _batch_by_tokens(
+    chunks: List[_Chunk], *, max_items: int, max_tokens: int
+) -> Iterable[List[_Chunk]]:
+    """Group chunks so no request exceeds the item or token budget."""
+    batch: List[_Chunk] = []
+    batch_tokens = 0
+
+    for chunk in chunks:
+        if batch and (
+            len(batch) >= max_items or batch_tokens + chunk.token_count > max_tokens
+        ):
+            yield batch
+            batch = []
+            batch_tokens = 0
+
+        batch.append(chunk)
+        batch_tokens += chunk.token_count
+
+    if batch:
+        yield batch
+
+
+@lru_cache(maxsize=1)
+def _get_embedding_client() -> OpenAI:
+    # One client per process so batches share pooled keep-alive connections.
+    pool_size = max(1, settings.rag_embed_concurrency)
+    return OpenAI(
+        base_url=settings.openai_url,
+        api_key=settings.openai_api_key or None,
+        http_client=DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            )
+        ),
+    )
+
+
+def _embed_texts(
+    texts: List[str], timeout: Optional[float] = None
+) -> List[List[float]]:
     if not texts:
         return []
 
-    client = OpenAI(
-        base_url=settings.openai_url, 
-        api_key=settings.openai_api_key or None)
-    response = client.embeddings.create(
+    options = {"timeout": timeout} if timeout is not None else {}
+    response = _get_embedding_client().embeddings.create(
         model=settings.openai_embedding_model,
         input=texts,
-        dimensions=1536
+        dimensions=settings.rag_embedding_dimensions,
+        **options,
     )
 
     return [item.embedding for item in response.data]
 
 
+def embed_query(query: str, timeout: Optional[float] = None) -> List[float]:
+    """Embed a search query with the same model and dimensions as stored chunks.
+
+    ``timeout`` (seconds) bounds the request for latency-budgeted callers.
+    """
+    return _embed_texts([_normalize_text(query)], timeout=timeout)[0]
+
+
+def _embed_chunks(chunks: List[_Chunk]) -> List[List[float]]:
+    """Embed chunks in token-bounded batches, several requests at a time.
+
+    Results are returned in the same order as ``chunks``.
+    """
+    batches = [
+        [chunk.content for chunk in batch]
+        for batch in _batch_by_tokens(
+            chunks,
+            max_items=settings.rag_embed_batch_size,
+            max_tokens=settings.rag_embed_max_batch_tokens,
+        )
+    ]
+    if not batches:
+        return []
+
+    workers = min(max(1, settings.rag_embed_concurrency), len(batches))
+    if workers == 1:
+        results = [_embed_texts(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="rag-embed"
+        ) as executor:
+            results = list(executor.map(_embed_texts, batches))
+
+    return [embedding for batch in results for embedding in batch]
+
+
+def _vector_literal(embedding: List[float]) -> str:
+    # json serialises the whole float list in C; pgvector accepts the
+    # "[x,y,...]" text form directly.
+    return json.dumps(embedding, separators=(",", ":"))
+
+
+def _embedding_cache_key(content: str) -> str:
+    digest = hashlib.sha256()
+    for part in (settings.openai_embedding_model, str(settings.rag_embedding_dimensions), content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _load_cached_embeddings(db, keys: List[str]) -> Dict[str, List[float]]:
+    found: Dict[str, List[float]] = {}
+    select_sql = text(
+        """
+        SELECT content_hash, CAST(embedding AS TEXT) AS embedding
+        FROM rag_embedding_cache
+        WHERE content_hash IN :keys
+        """
+    ).bindparams(bindparam("keys", expanding=True))
+    touch_sql = text(
+        """
+        UPDATE rag_embedding_cache
+        SET last_used_at = CURRENT_TIMESTAMP
+        WHERE content_hash IN :keys
+        """
+    ).bindparams(bindparam("keys", expanding=True))
+
+    for page in _batch(keys, settings.rag_insert_page_size):
+        rows = db.execute(select_sql, {"keys": page}).fetchall()
+        for row in rows:
+            found[row.content_hash] = json.loads(row.embedding)
+        if rows:
+            db.execute(touch_sql, {"keys": [row.content_hash for row in rows]})
+
+    return found
+
+
+def _store_cached_embeddings(db, entries: Dict[str, List[float]]) -> None:
+    items = list(entries.items())
+    for page in _batch(items, settings.rag_insert_page_size):
+        params = {
+            "model": settings.openai_embedding_model,
+            "dimensions": settings.rag_embedding_dimensions,
+        }
+        values = []
+        for idx, (key, embedding) in enumerate(page):
+            values.append(
+                f"(:key_{idx}, :model, :dimensions, "
+                f"CAST(:embedding_{idx} AS vector), "
+                "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+            )
+            params[f"key_{idx}"] = key
+            params[f"embedding_{idx}"] = _vector_literal(embedding)
+
+        db.execute(
+            text(
+                """
+                INSERT INTO rag_embedding_cache (
+                    content_hash,
+                    model,
+                    dimensions,
+                    embedding,
+                    created_at,
+                    last_used_at
+                )
+                VALUES
+                """
+                + ",\n".join(values)
+                + """
+                ON CONFLICT (content_hash)
+                DO UPDATE SET last_used_at = EXCLUDED.last_used_at
+                """
+            ),
+            params,
+        )
+
+
+def _embed_chunks_cached(db, chunks: List[_Chunk]) -> List[List[float]]:
+    """Embed chunks, reusing vectors already stored for identical text.
+
+    The cache lives in the RAG database and is keyed by a hash of
+    (model, dimensions, chunk text). Cache errors never fail indexing; the
+    affected chunks are simply embedded again.
+    """
+    if not settings.rag_embedding_cache_enabled:
+        return _embed_chunks(chunks)
+
+    keys = [_embedding_cache_key(chunk.content) for chunk in chunks]
+
+    cached: Dict[str, List[float]] = {}
+    try:
+        with db.begin_nested():
+            cached = _load_cached_embeddings(db, list(dict.fromkeys(keys)))
+    except Exception as exc:
+        logger.warning(f"RAG embedding cache lookup failed: {exc}")
+
+    missing: Dict[str, _Chunk] = {}
+    for key, chunk in zip(keys, chunks):
+        if key not in cached and key not in missing:
+            missing[key] = chunk
+
+    logger.info(
+        f"RAG embedding cache: {len(chunks) - len(missing)} hits, "
+        f"{len(missing)} misses"
+    )
+
+    if missing:
+        fresh = dict(zip(missing.keys(), _embed_chunks(list(missing.values()))))
+        try:
+            with db.begin_nested():
+                _store_cached_embeddings(db, fresh)
+        except Exception as exc:
+            logger.warning(f"RAG embedding cache store failed: {exc}")
+        cached.update(fresh)
+
+    return [cached[key] for key in keys]
+
+
+def prune_embedding_cache(
+    db,
+    *,
+    ttl_days: Optional[int] = None,
+    max_entries: Optional[int] = None,
+) -> int:
+    """Evict entries unused for ``ttl_days`` and keep the newest ``max_entries``."""
+    ttl_days = settings.rag_embedding_cache_ttl_days if ttl_days is None else ttl_days
+    max_entries = (
+        settings.rag_embedding_cache_max_entries
+        if max_entries is None
+        else max_entries
+    )
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+    expired = db.execute(
+        text("DELETE FROM rag_embedding_cache WHERE last_used_at < :cutoff"),
+        {"cutoff": cutoff},
+    )
+    overflow = db.execute(
+        text(
+            """
+            DELETE FROM rag_embedding_cache
+            WHERE content_hash IN (
+                SELECT content_hash
+                FROM rag_embedding_cache
+                ORDER BY last_used_at DESC
+                OFFSET :max_entries
+            )
+            """
+        ),
+        {"max_entries": max_entries},
+    )
+    return (expired.rowcount or 0) + (overflow.rowcount or 0)
+
+
+def bulk_insert_rag_chunks(
+    db,
+    *,
+    file_id: str,
+    project_id: int,
+    document_type: str,
+    rows: List[Tuple[int, _Chunk, List[float]]],
+    page_size: Optional[int] = None,
+) -> int:
+    """Insert ``(chunk_index, chunk, embedding)`` rows with multi-row VALUES.
+
+    Rows are written ``page_size`` at a time, so a file with thousands of
+    chunks costs a handful of round trips instead of one per chunk.
+    """
+    if not rows:
+        return 0
+
+    page_size = page_size or settings.rag_insert_page_size
+    vector_type = rag_vector_type()
+    inserted = 0
+
+    for page in _batch(rows, page_size):
+        params = {
+            "file_id": file_id,
+            "project_id": project_id,
+            "document_type": document_type,
+        }
+        values = []
+        for idx, (chunk_index, chunk, embedding) in enumerate(page):
+            values.append(
+                f"(:id_{idx}, :file_id, :project_id, :document_type, "
+                f":chunk_index_{idx}, :content_{idx}, :content_hash_{idx}, "
+                f":token_count_{idx}, CAST(:embedding_{idx} AS {vector_type}), "
+                "CURRENT_TIMESTAMP)"
+            )
+            params[f"id_{idx}"] = str(uuid.uuid4())
+            params[f"chunk_index_{idx}"] = chunk_index
+            params[f"content_{idx}"] = chunk.content
+            params[f"content_hash_{idx}"] = chunk.content_hash
+            params[f"token_count_{idx}"] = chunk.token_count
+            params[f"embedding_{idx}"] = _vector_literal(embedding)
+
+        db.execute(
+            text(
+                """
+                INSERT INTO rag_chunks (
+                    id,
+                    file_id,
+                    project_id,
+                    document_type,
+                    chunk_index,
+                    content,
+                    content_hash,
+                    token_count,
+                    embedding,
+                    created_at
+                )
+                VALUES
+                """
+                + ",\n".join(values)
+            ),
+            params,
+        )
+        inserted += len(page)
+
+    return inserted
+
+
+def _plan_incremental_update(
+    existing_rows, chunks: List[_Chunk]
+) -> Tuple[List[Tuple[str, int, str]], List[int], List[str]]:
+    """Diff stored rows against the new chunk list by content hash.
+
+    Returns ``(renumber, insert, delete)``: rows to keep under a new index
+    as ``(id, chunk_index, content_hash)``, new chunk indexes that need a
+    row, and ids of rows that no longer match any chunk.
+    """
+    available: Dict[str, List] = {}
+    for row in sorted(existing_rows, key=lambda row: row.chunk_index):
+        row_hash = row.content_hash or _Chunk(row.content or "", 0).content_hash
+        available.setdefault(row_hash, []).append(row)
+
+    renumber: List[Tuple[str, int, str]] = []
+    insert: List[int] = []
+
+    for chunk_index, chunk in enumerate(chunks):
+        candidates = available.get(chunk.content_hash)
+        if not candidates:
+            insert.append(chunk_index)
+            continue
+
+        row = candidates.pop(0)
+        if row.chunk_index != chunk_index or row.content_hash is None:
+            renumber.append((str(row.id), chunk_index, chunk.content_hash))
+
+    delete = [str(row.id) for rows in available.values() for row in rows]
+    return renumber, insert, delete
+
+
+def _apply_incremental_update(
+    db,
+    *,
+    file_id: str,
+    project_id: int,
+    document_type: str,
+    chunks: List[_Chunk],
+) -> None:
+    existing_rows = db.execute(
+        text(
+            """
+            SELECT
+                id,
+                chunk_index,
+                content_hash,
+                CASE WHEN content_hash IS NULL THEN content END AS content
+            FROM rag_chunks
+            WHERE file_id = :file_id
+            """
+        ),
+        {"file_id": file_id},
+    ).fetchall()
+
+    renumber, insert, delete = _plan_incremental_update(existing_rows, chunks)
+
+    if delete:
+        delete_sql = text("DELETE FROM rag_chunks WHERE id IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        for page in _batch(delete, settings.rag_insert_page_size):
+            db.execute(delete_sql, {"ids": page})
+
+    if renumber:
+        db.execute(
+            text(
+                """
+                UPDATE rag_chunks
+                SET chunk_index = :chunk_index, content_hash = :content_hash
+                WHERE id = :id
+                """
+            ),
+            [
+                {"id": row_id, "chunk_index": chunk_index, "content_hash": row_hash}
+                for row_id, chunk_index, row_hash in renumber
+            ],
+        )
+
+    # Kept rows follow the file if it was reclassified or moved.
+    db.execute(
+        text(
+            """
+            UPDATE rag_chunks
+            SET project_id = :project_id, document_type = :document_type
+            WHERE file_id = :file_id
+              AND (project_id != :project_id OR document_type != :document_type)
+            """
+        ),
+        {
+            "file_id": file_id,
+            "project_id": project_id,
+            "document_type": document_type,
+        },
+    )
+
+    new_chunks = [chunks[chunk_index] for chunk_index in insert]
+    embeddings = _embed_chunks_cached(db, new_chunks)
+    bulk_insert_rag_chunks(
+        db,
+        file_id=file_id,
+        project_id=project_id,
+        document_type=document_type,
+        rows=[
+            (chunk_index, chunk, embedding)
+            for chunk_index, chunk, embedding in zip(insert, new_chunks, embeddings)
+        ],
+    )
+
+    logger.info(
+        f"RAG incremental index file_id={file_id}: {len(insert)} inserted, "
+        f"{len(renumber)} renumbered, {len(delete)} deleted, "
+        f"{len(chunks) - len(insert) - len(renumber)} unchanged"
+    )
+
+
 def index_rag_chunks(
     db,
     *,
@@ -191,8 +640,19 @@ def index_rag_chunks(
     project_id: int,
     document_type: str,
     markdown_text: str,
+    incremental: Optional[bool] = None,
 ) -> int:
-    chunks = _chunk_text(
+    """Index ``markdown_text`` for a file and return its chunk count.
+
+    In incremental mode (the default, see ``RAG_INCREMENTAL_REINDEX``) only
+    chunks whose content changed are embedded and written; unchanged rows
+    are kept and renumbered if they moved. Otherwise every row of the file
+    is replaced.
+    """
+    if incremental is None:
+        incremental = settings.rag_incremental_reindex
+
+    chunks = _build_chunks(
         markdown_text,
         chunk_size=settings.rag_chunk_size,
         overlap=settings.rag_chunk_overlap,
@@ -201,67 +661,35 @@ def index_rag_chunks(
     if not chunks:
         return 0
 
+    if incremental:
+        _apply_incremental_update(
+            db,
+            file_id=file_id,
+            project_id=project_id,
+            document_type=document_type,
+            chunks=chunks,
+        )
+        return len(chunks)
+
+    # Embed before touching the table so the delete + insert stays short.
+    embeddings = _embed_chunks_cached(db, chunks)
+
     db.execute(
         text("DELETE FROM rag_chunks WHERE file_id = :file_id"),
         {"file_id": file_id},
     )
 
-    inserted = 0
-    insert_sql = text(
-        """
-        INSERT INTO rag_chunks (
-            id,
-            file_id,
-            project_id,
-            document_type,
-            chunk_index,
-            content,
-            token_count,
-            embedding,
-            created_at
-        )
-        VALUES (
-            gen_random_uuid(),
-            :file_id,
-            :project_id,
-            :document_type,
-            :chunk_index,
-            :content,
-            :token_count,
-            CAST(:embedding AS vector),
-            NOW()
-        )
-        """
+    return bulk_insert_rag_chunks(
+        db,
+        file_id=file_id,
+        project_id=project_id,
+        document_type=document_type,
+        rows=[
+            (chunk_index, chunk, embedding)
+            for chunk_index, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+        ],
     )
 
-    for batch_start, batch_texts in enumerate(
-        _batch(chunks, settings.rag_embed_batch_size)
-    ):
-        embeddings = _embed_texts(batch_texts)
-
-        for offset, (chunk_text, embedding) in enumerate(
-            zip(batch_texts, embeddings)
-        ):
-            vector_literal = "[" + ",".join(f"{x:.6f}" for x in embedding) + "]"
-            chunk_index = batch_start * settings.rag_embed_batch_size + offset
-            token_count = _estimate_tokens(chunk_text)
-
-            db.execute(
-                insert_sql,
-                {
-                    "file_id": file_id,
-                    "project_id": project_id,
-                    "document_type": document_type,
-                    "chunk_index": chunk_index,
-                    "content": chunk_text,
-                    "token_count": token_count,
-                    "embedding": vector_literal,
-                },
-            )
-            inserted += 1
-
-    return inserted
-
 
 def delete_rag_chunks_for_file(db, *, file_id: str) -> int:
     result = db.execute(
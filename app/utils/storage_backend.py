@@ -0,0 +1,431 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_BUCKET = "uploads"
+
+# (start, end) with an inclusive end; (None, n) is the last n bytes and
+# (start, None) runs to the end of the object, as in an HTTP Range header.
+ByteRange = Tuple[Optional[int], Optional[int]]
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+_UNSATISFIED_RANGE = re.compile(r"bytes \*/(\d+)")
+
+
+class RangeNotSatisfiable(Exception):
+    def __init__(self, total_size: int):
+        super().__init__(f"Range not satisfiable for {total_size} bytes")
+        self.total_size = total_size
+
+
+@dataclass
+class SignedUpload:
+    """Where a client PUTs/POSTs the bytes for ``path`` without going
+    through the API."""
+
+    url: str
+    token: str
+    path: str
+
+
+@dataclass
+class StorageStream:
+    """An open object read: ``chunks`` yields bytes ``start..end`` (inclusive)
+    of a ``total_size``-byte object. ``aclose`` must be awaited when done."""
+
+    total_size: int
+    start: int
+    end: int
+    chunks: AsyncIterator[bytes]
+    aclose: Callable[[], Awaitable[None]]
+
+    @property
+    def content_length(self) -> int:
+        return self.end - self.start + 1
+
+    @property
+    def is_partial(self) -> bool:
+        return self.content_length != self.total_size
+
+
+def resolve_byte_range(byte_range: Optional[ByteRange], total_size: int) -> Tuple[int, int]:
+    """Clamp ``byte_range`` to an object of ``total_size`` bytes."""
+    if byte_range is None:
+        return 0, total_size - 1
+    start, end = byte_range
+    if start is None:
+        if not end:
+            raise RangeNotSatisfiable(total_size)
+        return max(0, total_size - end), total_size - 1
+    if start >= total_size:
+        raise RangeNotSatisfiable(total_size)
+    if end is None or end >= total_size:
+        end = total_size - 1
+    return start, end
+
+
+class StorageBackend:
+    """Async interface over the object store holding uploaded and generated
+    files. Paths are bucket-relative, e.g. ``"<user>/<project>/user/a.pdf"``.
+    """
+
+    async def upload(self, path: str, data: bytes) -> Optional[str]:
+        """Store a new object and return its path, or ``None`` on failure."""
+        raise NotImplementedError
+
+    async def update(self, path: str, data: bytes) -> Optional[str]:
+        """Overwrite an existing object and return its path."""
+        raise NotImplementedError
+
+    async def download(self, path: str) -> bytes:
+        raise NotImplementedError
+
+    async def remove(self, paths: List[str]) -> List[str]:
+        """Delete objects and return the paths that were actually removed."""
+        raise NotImplementedError
+
+    async def open_stream(
+        self,
+        path: str,
+        byte_range: Optional[ByteRange] = None,
+        *,
+        chunk_size: int = 64 * 1024,
+    ) -> StorageStream:
+        """Open ``path`` for a chunked read of ``byte_range`` (all by default).
+
+        Raises ``FileNotFoundError`` or ``RangeNotSatisfiable``.
+        """
+        raise NotImplementedError
+
+    async def stat(self, path: str) -> Optional[int]:
+        """Size of the object in bytes, or ``None`` if it does not exist."""
+        raise NotImplementedError
+
+    async def create_signed_upload(self, path: str) -> SignedUpload:
+        """Presigned target for uploading ``path`` straight to storage."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class _ThreadedBackend(StorageBackend):
+    """Runs blocking storage calls on a bounded thread pool so uploads and
+    downloads never stall the event loop (and its WebSockets)."""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="storage"
+        )
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class SupabaseStorageBackend(_ThreadedBackend):
+    """Supabase Storage through the shared sync client; its HTTP session,
+    and so its connections, are reused across calls."""
+
+    def __init__(self, bucket: str = SUPABASE_BUCKET, *, max_workers: int = 8):
+        super().__init__(max_workers)
+        self.bucket = bucket
+        # Streaming reads use an async client of their own, one per loop.
+        self._stream_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _stream_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._stream_clients.get(loop)
+        if client is None or client.is_closed:
+            key = settings.supabase_key or ""
+            client = httpx.AsyncClient(
+                base_url=f"{(settings.supabase_url or '').rstrip('/')}/storage/v1",
+                headers={"apiKey": key, "Authorization": f"Bearer {key}"},
+                timeout=httpx.Timeout(30, read=60),
+            )
+            self._stream_clients[loop] = client
+        return client
+
+    def _bucket(self):
+        # Imported lazily: creating the client needs SUPABASE_URL/KEY, which
+        # the local backend does not.
+        from app.utils.supabase_client import supabase
+
+        return supabase.storage.from_(self.bucket)
+
+    def _upload(self, path: str, data: bytes) -> Optional[str]:
+        return self._bucket().upload(path, data).path
+
+    def _update(self, path: str, data: bytes) -> Optional[str]:
+        return self._bucket().update(path, data).path
+
+    def _download(self, path: str) -> bytes:
+        return self._bucket().download(path)
+
+    def _remove(self, paths: List[str]) -> List[str]:
+        response = self._bucket().remove(paths) or []
+        return [item.get("name", "") for item in response]
+
+    def _create_signed_upload(self, path: str) -> SignedUpload:
+        data = self._bucket().create_signed_upload_url(path)
+        return SignedUpload(url=data["signed_url"], token=data["token"], path=path)
+
+    async def upload(self, path: str, data: bytes) -> Optional[str]:
+        return await self._run(self._upload, path, data)
+
+    async def update(self, path: str, data: bytes) -> Optional[str]:
+        return await self._run(self._update, path, data)
+
+    async def download(self, path: str) -> bytes:
+        return await self._run(self._download, path)
+
+    async def remove(self, paths: List[str]) -> List[str]:
+        return await self._run(self._remove, paths)
+
+    async def create_signed_upload(self, path: str) -> SignedUpload:
+        return await self._run(self._create_signed_upload, path)
+
+    async def stat(self, path: str) -> Optional[int]:
+        response = await self._stream_client().head(
+            f"object/{self.bucket}/{quote(path, safe='/')}"
+        )
+        if response.status_code in (400, 404):
+            return None
+        response.raise_for_status()
+        return int(response.headers.get("content-length", 0))
+
+    async def open_stream(
+        self,
+        path: str,
+        byte_range: Optional[ByteRange] = None,
+        *,
+        chunk_size: int = 64 * 1024,
+    ) -> StorageStream:
+        headers = {}
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Range"] = (
+                f"bytes=-{end}" if start is None else f"bytes={start}-{'' if end is None else end}"
+            )
+
+        # Same object URL the storage client downloads from.
+        client = self._stream_client()
+        request = client.build_request(
+            "GET", f"object/{self.bucket}/{quote(path, safe='/')}", headers=headers
+        )
+        response = await client.send(request, stream=True)
+
+        if response.status_code == 416:
+            await response.aclose()
+            match = _UNSATISFIED_RANGE.match(response.headers.get("content-range", ""))
+            raise RangeNotSatisfiable(int(match.group(1)) if match else 0)
+        if response.status_code in (400, 404):
+            await response.aclose()
+            raise FileNotFoundError(path)
+        try:
+            response.raise_for_status()
+            match = _CONTENT_RANGE.match(response.headers.get("content-range", ""))
+            if response.status_code == 206 and match:
+                start, end = int(match.group(1)), int(match.group(2))
+                total = int(match.group(3)) if match.group(3) != "*" else end + 1
+            else:
+                total = int(response.headers["content-length"])
+                start, end = 0, total - 1
+        except Exception:
+            await response.aclose()
+            raise
+
+        return StorageStream(
+            total_size=total,
+            start=start,
+            end=end,
+            chunks=response.aiter_bytes(chunk_size),
+            aclose=response.aclose,
+        )
+
+    def close(self) -> None:
+        super().close()
+        self._stream_clients.clear()
+
+
+class LocalStorageBackend(_ThreadedBackend):
+    """Files under ``root``; for tests and benchmarks without the network."""
+
+    def __init__(self, root: str, *, max_workers: int = 8):
+        super().__init__(max_workers)
+        self.root = Path(root).resolve()
+
+    def _resolve(self, path: str) -> Path:
+        target = (self.root / path.lstrip("/")).resolve()
+        if target != self.root and self.root not in target.parents:
+            raise ValueError(f"Storage path escapes root: {path}")
+        return target
+
+    def _write(self, path: str, data: bytes, *, overwrite: bool) -> str:
+        target = self._resolve(path)
+        if target.exists() and not overwrite:
+            raise FileExistsError(path)
+        if not target.exists() and overwrite:
+            raise FileNotFoundError(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+        return path
+
+    def _download(self, path: str) -> bytes:
+        return self._resolve(path).read_bytes()
+
+    def _stat(self, path: str) -> Optional[int]:
+        try:
+            return self._resolve(path).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def _remove(self, paths: List[str]) -> List[str]:
+        removed = []
+        for path in paths:
+            try:
+                self._resolve(path).unlink()
+                removed.append(path)
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def open_stream(
+        self,
+        path: str,
+        byte_range: Optional[ByteRange] = None,
+        *,
+        chunk_size: int = 64 * 1024,
+    ) -> StorageStream:
+        target = self._resolve(path)
+        handle = await self._run(open, target, "rb")
+        try:
+            total = os.fstat(handle.fileno()).st_size
+            start, end = resolve_byte_range(byte_range, total)
+        except Exception:
+            handle.close()
+            raise
+
+        async def chunks():
+            await self._run(handle.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await self._run(handle.read, min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+        async def aclose():
+            handle.close()
+
+        return StorageStream(
+            total_size=total, start=start, end=end, chunks=chunks(), aclose=aclose
+        )
+
+    def upload_token(self, path: str, expires: int) -> str:
+        message = f"{path}:{expires}".encode("utf-8")
+        return hmac.new(
+            settings.secret_key.encode("utf-8"), message, hashlib.sha256
+        ).hexdigest()
+
+    def verify_upload_token(self, path: str, expires: int, token: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self.upload_token(path, expires), token)
+
+    async def create_signed_upload(self, path: str) -> SignedUpload:
+        # Served by PUT /api/v2/storage/uploads (app.api.v2.storage).
+        expires = int(time.time()) + settings.storage_signed_upload_ttl_seconds
+        token = self.upload_token(path, expires)
+        query = urlencode({"path": path, "expires": expires, "token": token})
+        return SignedUpload(url=f"/api/v2/storage/uploads?{query}", token=token, path=path)
+
+    async def write_stream(self, path: str, chunks: AsyncIterator[bytes]) -> int:
+        """Write ``chunks`` to ``path`` (replacing it) and return the size."""
+        target = self._resolve(path)
+        await self._run(partial(target.parent.mkdir, parents=True, exist_ok=True))
+        tmp = target.with_name(f".{target.name}.tmp")
+        handle = await self._run(open, tmp, "wb")
+        size = 0
+        try:
+            async for chunk in chunks:
+                await self._run(handle.write, chunk)
+                size += len(chunk)
+        except BaseException:
+            handle.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        handle.close()
+        await self._run(os.replace, tmp, target)
+        return size
+
+    async def stat(self, path: str) -> Optional[int]:
+        return await self._run(self._stat, path)
+
+    async def upload(self, path: str, data: bytes) -> Optional[str]:
+        return await self._run(partial(self._write, overwrite=False), path, data)
+
+    async def update(self, path: str, data: bytes) -> Optional[str]:
+        return await self._run(partial(self._write, overwrite=True), path, data)
+
+    async def download(self, path: str) -> bytes:
+        return await self._run(self._download, path)
+
+    async def remove(self, paths: List[str]) -> List[str]:
+        return await self._run(self._remove, paths)
+
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_storage_backend() -> StorageBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if settings.storage_backend == "local":
+                _backend = LocalStorageBackend(
+                    settings.storage_local_root,
+                    max_workers=settings.storage_max_workers,
+                )
+            else:
+                _backend = SupabaseStorageBackend(
+                    max_workers=settings.storage_max_workers
+                )
+            logger.info(f"Storage backend: {settings.storage_backend}")
+        return _backend
+
+
+def set_storage_backend(backend: Optional[StorageBackend]) -> None:
+    """Swap the process-wide backend (tests, benchmarks)."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
@@ -2,7 +2,12 @@
 CREATE EXTENSION IF NOT EXISTS pgcrypto;
 CREATE EXTENSION IF NOT EXISTS vector;
 
--- Table for RAG chunks
+-- Table for RAG chunks. The embedding column type must match the
+-- RAG_EMBEDDING_DIMENSIONS / RAG_VECTOR_STORAGE settings (checked at startup):
+--   vector  -> VECTOR(dims)   float32, HNSW up to 2000 dims
+--   halfvec -> HALFVEC(dims)  float16, half the index memory, HNSW up to 4000 dims
+--   binary  -> VECTOR(dims)   HNSW over binary_quantize(embedding)::bit(dims),
+--                             results re-ranked with the full vectors
 CREATE TABLE IF NOT EXISTS rag_chunks (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     file_id UUID NOT NULL,
@@ -10,14 +15,48 @@ CREATE TABLE IF NOT EXISTS rag_chunks (
     document_type TEXT NOT NULL,
     chunk_index INTEGER NOT NULL,
     content TEXT NOT NULL,
+    content_hash TEXT,
     token_count INTEGER,
-    embedding VECTOR(3072) NOT NULL,
+    embedding VECTOR(1536) NOT NULL,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Incremental re-indexing diffs chunks by sha256(content) per file.
+ALTER TABLE rag_chunks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+CREATE INDEX IF NOT EXISTS idx_rag_chunks_file_id ON rag_chunks (file_id);
+
+-- Existing databases created with VECTOR(3072) never matched the 1536-dim
+-- embeddings we request; re-create the column (chunks are re-indexed from files):
+--   TRUNCATE rag_chunks;
+--   ALTER TABLE rag_chunks ALTER COLUMN embedding TYPE VECTOR(1536);
+-- Switching to halfvec storage keeps the data:
+--   ALTER TABLE rag_chunks ALTER COLUMN embedding TYPE HALFVEC(1536);
+
+-- Lexical side of hybrid search (/api/v2/search/hybrid).
+ALTER TABLE rag_chunks ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+CREATE INDEX IF NOT EXISTS idx_rag_chunks_content_tsv
+    ON rag_chunks USING gin (content_tsv);
+
+-- Approximate nearest-neighbour index (vector storage shown; halfvec uses
+-- halfvec_cosine_ops, binary indexes binary_quantize(embedding)::bit(dims)
+-- with bit_hamming_ops). Build parameters come from
+-- RAG_HNSW_M / RAG_HNSW_EF_CONSTRUCTION; the ensure_rag_hnsw_index_task Celery
+-- task creates it concurrently and rebuilds it when those settings change.
+-- Queries set hnsw.ef_search (and hnsw.iterative_scan, pgvector >= 0.8) per
+-- transaction so the project filter is applied inside the index scan.
+CREATE INDEX IF NOT EXISTS idx_rag_chunks_embedding_hnsw
+    ON rag_chunks USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+-- <storage>:<dims>:<build options>; ensure_rag_hnsw_index_task rebuilds on change.
+COMMENT ON INDEX idx_rag_chunks_embedding_hnsw IS 'vector:1536:m=16,ef_construction=64';
+-- Lets the planner pick an exact scan for small projects.
+CREATE INDEX IF NOT EXISTS idx_rag_chunks_project_id
+    ON rag_chunks (project_id, document_type);
+
 -- RPC for similarity search
 CREATE OR REPLACE FUNCTION match_rag_chunks(
-    query_embedding VECTOR(3072),
+    query_embedding VECTOR(1536),
     match_count INT,
     project_id_filter INTEGER DEFAULT NULL,
     min_similarity FLOAT DEFAULT 0.0
@@ -34,20 +73,40 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql STABLE AS $$
 BEGIN
+    -- Filter by similarity outside the ORDER BY ... LIMIT so the inner query
+    -- can be served by the HNSW index instead of a sequential scan.
     RETURN QUERY
-    SELECT
-        rag_chunks.id,
-                rag_chunks.file_id,
-        rag_chunks.project_id,
+    SELECT nearest.*
+    FROM (
+        SELECT
+            rag_chunks.id,
+            rag_chunks.file_id,
+            rag_chunks.project_id,
             rag_chunks.document_type,
-        rag_chunks.chunk_index,
-        rag_chunks.content,
-        rag_chunks.token_count,
-        1 - (rag_chunks.embedding <=> query_embedding) AS similarity
-    FROM rag_chunks
+            rag_chunks.chunk_index,
+            rag_chunks.content,
+            rag_chunks.token_count,
+            1 - (rag_chunks.embedding <=> query_embedding) AS similarity
+        FROM rag_chunks
         WHERE (project_id_filter IS NULL OR rag_chunks.project_id = project_id_filter)
-      AND (1 - (rag_chunks.embedding <=> query_embedding)) >= min_similarity
-    ORDER BY rag_chunks.embedding <=> query_embedding
-    LIMIT match_count;
+        ORDER BY rag_chunks.embedding <=> query_embedding
+        LIMIT match_count
+    ) AS nearest
+    WHERE nearest.similarity >= min_similarity;
 END;
 $$;
+
+
+-- Content-addressed embedding cache. content_hash is sha256(model, dimensions,
+-- chunk text); the untyped VECTOR column lets one cache serve several models.
+CREATE TABLE IF NOT EXISTS rag_embedding_cache (
+    content_hash TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    embedding VECTOR NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    last_used_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_rag_embedding_cache_last_used
+    ON rag_embedding_cache (last_used_at);
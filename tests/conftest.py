@@ -1,6 +1,7 @@
 import pytest
 import sys
 import types
+import uuid
 
 # Provide a lightweight stub for 'mailersend' used by app.core.mailer so tests
 # can import app without installing external dependency.
@@ -37,9 +38,19 @@ def _chain_stub(*args, **kwargs):
     return _Canvas()
 
 
+class _SignalStub:
+    def connect(self, f=None, **kwargs):
+        return f if f is not None else (lambda fn: fn)
+
+
+signals_mod = types.ModuleType("celery.signals")
+signals_mod.worker_process_init = _SignalStub()
+
 celery_mod.Celery = DummyCeleryApp
 celery_mod.chain = _chain_stub
+celery_mod.signals = signals_mod
 sys.modules["celery"] = celery_mod
+sys.modules["celery.signals"] = signals_mod
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -48,6 +59,8 @@ from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.core.database import Base, get_db
+from app.models.file import Files
+from app.models.project import Project
 from app.models.user import User
 from app.models.token import Token
 
@@ -131,6 +144,46 @@ def create_test_user(db_session):
     return _create_user
 
 
+@pytest.fixture
+def create_test_project(db_session):
+    """Factory fixture để tạo project (và user sở hữu nó)"""
+
+    def _create_project(name="Shop", description=None, email="ba@example.com"):
+        user = User(name="BA", email=email, passwordhash="x")
+        db_session.add(user)
+        db_session.flush()
+        project = Project(user_id=user.id, name=name, description=description)
+        db_session.add(project)
+        db_session.commit()
+        db_session.refresh(project)
+        return project
+
+    return _create_project
+
+
+@pytest.fixture
+def create_test_file(db_session):
+    """Factory fixture để tạo file trong project (chưa commit)"""
+
+    def _create_file(project, name="business-case", **values):
+        values.setdefault("file_type", name)
+        values.setdefault("file_category", "ai gen")
+        doc = Files(
+            # Files.id defaults to a uuid.UUID, which SQLite cannot bind.
+            id=str(uuid.uuid4()),
+            project_id=project.id,
+            created_by=project.user_id,
+            updated_by=project.user_id,
+            name=name,
+            **values,
+        )
+        db_session.add(doc)
+        db_session.flush()
+        return doc
+
+    return _create_file
+
+
 @pytest.fixture
 def authenticated_client(client, create_test_user, db_session):
     """Tạo authenticated client với access token"""
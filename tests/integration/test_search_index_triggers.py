@@ -0,0 +1,205 @@
+"""
+Integration tests for the global search index triggers and repair pass.
+
+Run against the Postgres database from docker-compose (DATABASE_URL);
+skipped when it is not reachable.
+"""
+
+import time
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.file import Files
+from app.models.folder import Folder
+from app.models.project import Project
+from app.models.user import User
+from app.services.search_index import (
+    backfill_search_index,
+    install_search_index_triggers,
+    prune_search_index,
+)
+
+
+@pytest.fixture(scope="module")
+def search_engine(test_db_engine):
+    try:
+        with test_db_engine.connect():
+            pass
+    except OperationalError as exc:
+        pytest.skip(f"Postgres not reachable: {exc}")
+    Base.metadata.create_all(bind=test_db_engine)
+    install_search_index_triggers(test_db_engine)
+    return test_db_engine
+
+
+@pytest.fixture
+def db(search_engine):
+    session = sessionmaker(bind=search_engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def project(db):
+    timestamp = int(time.time() * 1000)
+    user = User(
+        name="Search Test",
+        email=f"integration_test_search_{timestamp}@example.com",
+        passwordhash="x",
+    )
+    db.add(user)
+    db.flush()
+    project = Project(
+        user_id=user.id, name="Bookshop", description="Sell books online"
+    )
+    db.add(project)
+    db.commit()
+
+    yield project
+
+    db.rollback()
+    db.query(Files).filter(Files.project_id == project.id).delete()
+    db.query(Folder).filter(Folder.project_id == project.id).delete()
+    db.execute(
+        text("DELETE FROM global_search_index WHERE project_id = :id"),
+        {"id": project.id},
+    )
+    db.query(Project).filter(Project.id == project.id).delete()
+    db.query(User).filter(User.id == user.id).delete()
+    db.commit()
+
+
+def _add_file(db, project, name, content="", status="completed"):
+    doc = Files(
+        id=uuid.uuid4(),
+        project_id=project.id,
+        created_by=project.user_id,
+        updated_by=project.user_id,
+        name=name,
+        content=content,
+        file_category="user upload",
+        file_type=".md",
+        status=status,
+    )
+    db.add(doc)
+    db.commit()
+    return doc
+
+
+def _indexed(db, project):
+    rows = db.execute(
+        text(
+            "SELECT entity_type, entity_id, title, updated_at "
+            "FROM global_search_index WHERE project_id = :id"
+        ),
+        {"id": project.id},
+    ).fetchall()
+    return {(row.entity_type, row.entity_id): row for row in rows}
+
+
+def _matches(db, project, query):
+    return [
+        row.title
+        for row in db.execute(
+            text(
+                "SELECT title FROM global_search_index "
+                "WHERE project_id = :id "
+                "AND search_vector @@ plainto_tsquery('english', :q) "
+                "ORDER BY ts_rank(search_vector, plainto_tsquery('english', :q)) DESC"
+            ),
+            {"id": project.id, "q": query},
+        )
+    ]
+
+
+def test_file_rows_follow_inserts_updates_and_deletes(db, project):
+    doc = _add_file(db, project, "pricing", content="discount rules for members")
+    key = ("file", str(doc.id))
+
+    assert _indexed(db, project)[key].title == "pricing"
+    assert _matches(db, project, "discount") == ["pricing"]
+
+    doc.name = "pricing-v2"
+    db.commit()
+    assert _indexed(db, project)[key].title == "pricing-v2"
+
+    doc.status = "deleted"
+    db.commit()
+    assert key not in _indexed(db, project)
+
+
+def test_title_matches_rank_above_content_matches(db, project):
+    _add_file(db, project, "checkout", content="payment steps")
+    _add_file(db, project, "notes", content="the checkout page needs work")
+
+    assert _matches(db, project, "checkout") == ["checkout", "notes"]
+
+
+def test_uploads_are_indexed_only_once_completed(db, project):
+    doc = _add_file(db, project, "deck", status="uploading")
+    key = ("file", str(doc.id))
+    assert key not in _indexed(db, project)
+
+    doc.status = "pending"
+    db.commit()
+    assert key in _indexed(db, project)
+
+
+def test_deleting_a_project_drops_its_folders_and_files(db, project):
+    db.add(Folder(project_id=project.id, name="specs", created_by=project.user_id))
+    db.commit()
+    _add_file(db, project, "srs")
+    assert {entity for entity, _ in _indexed(db, project)} == {
+        "project",
+        "folder",
+        "file",
+    }
+
+    project.status = "deleted"
+    db.commit()
+    assert _indexed(db, project) == {}
+
+
+def test_backfill_restores_missing_rows_and_leaves_synced_ones(db, project):
+    missing = _add_file(db, project, "glossary")
+    synced = _add_file(db, project, "roadmap")
+    db.execute(
+        text(
+            "DELETE FROM global_search_index "
+            "WHERE entity_type = 'file' AND entity_id = :id"
+        ),
+        {"id": str(missing.id)},
+    )
+    db.commit()
+    before = _indexed(db, project)[("file", str(synced.id))].updated_at
+
+    backfill_search_index(db, entity="file", batch_size=2)
+
+    after = _indexed(db, project)
+    assert ("file", str(missing.id)) in after
+    assert after[("file", str(synced.id))].updated_at == before
+
+
+def test_prune_removes_rows_without_a_live_source(db, project):
+    doc = _add_file(db, project, "draft")
+    orphan_id = str(uuid.uuid4())
+    db.execute(
+        text(
+            "INSERT INTO global_search_index "
+            "(entity_id, entity_type, project_id, title, search_vector) "
+            "VALUES (:id, 'file', :project_id, 'gone', to_tsvector('gone'))"
+        ),
+        {"id": orphan_id, "project_id": project.id},
+    )
+    db.commit()
+
+    assert prune_search_index(db, entity="file", batch_size=2) >= 1
+
+    indexed = _indexed(db, project)
+    assert ("file", orphan_id) not in indexed
+    assert ("file", str(doc.id)) in indexed
@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.utils import ai_circuit_breaker, ai_http_client
+from app.utils.ai_circuit_breaker import CircuitBreaker, RetryBudget
+from app.utils.call_ai_service import call_ai_service
+
+
+def test_breaker_opens_then_probes_half_open():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        "ai/srs", failure_threshold=2, recovery_timeout=30, clock=lambda: now[0]
+    )
+
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+
+    with pytest.raises(HTTPException) as exc:
+        breaker.before_call()
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "30"
+
+    now[0] = 31
+    breaker.before_call()  # the single half-open probe
+    with pytest.raises(HTTPException):
+        breaker.before_call()
+
+    breaker.record_success()
+    breaker.before_call()
+    assert breaker.state == ai_circuit_breaker.CLOSED
+
+
+def test_retry_budget_caps_retries_to_ratio_of_calls():
+    now = [0.0]
+    budget = RetryBudget(ratio=0.1, min_retries=1, window=60, clock=lambda: now[0])
+
+    for _ in range(20):
+        budget.record_call()
+
+    assert budget.try_acquire_retry()
+    assert budget.try_acquire_retry()
+    assert not budget.try_acquire_retry()
+
+    now[0] = 61
+    assert budget.try_acquire_retry()
+
+
+def test_call_fails_fast_while_circuit_is_open(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, json={"detail": "down"})
+
+    monkeypatch.setattr(
+        ai_http_client,
+        "_build_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(ai_circuit_breaker, "_breakers", {})
+    monkeypatch.setattr(ai_circuit_breaker.settings, "ai_circuit_failure_threshold", 1)
+    monkeypatch.setattr(ai_circuit_breaker.settings, "ai_circuit_recovery_seconds", 60)
+
+    async def scenario():
+        try:
+            for expected in (502, 503):
+                with pytest.raises(HTTPException) as exc:
+                    await call_ai_service("http://ai:8000/api/v1/srs/generate", {}, retries=1)
+                assert exc.value.status_code == expected
+        finally:
+            await ai_http_client.close_ai_http_client()
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_failing_delta_callback_frees_the_half_open_probe(monkeypatch):
+    def handler(request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content='data: {"delta": "# SRS"}\n\n',
+        )
+
+    monkeypatch.setattr(
+        ai_http_client,
+        "_build_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(ai_circuit_breaker, "_breakers", {})
+    url = "http://ai:8000/api/v1/srs/generate"
+    breaker = ai_circuit_breaker.get_circuit_breaker(url)
+    breaker.state = ai_circuit_breaker.OPEN
+    breaker.opened_at = breaker.clock() - breaker.recovery_timeout - 1
+
+    async def on_delta(delta):
+        raise RuntimeError("socket gone")
+
+    async def scenario():
+        try:
+            with pytest.raises(RuntimeError):
+                await call_ai_service(url, {}, retries=1, on_delta=on_delta)
+        finally:
+            await ai_http_client.close_ai_http_client()
+
+    asyncio.run(scenario())
+
+    assert breaker.state == ai_circuit_breaker.HALF_OPEN
+    assert breaker.probes_in_flight == 0
+    breaker.before_call()  # the slot is free for the next probe
@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock, patch
+
+from app.services import ai_credentials
+
+
+def test_headers_are_cached_until_invalidated(monkeypatch):
+    monkeypatch.setattr(ai_credentials.settings, "ai_headers_cache_ttl_seconds", 300)
+    ai_credentials.evict_ai_headers(7)
+    loader = MagicMock(
+        return_value={
+            "X-AI-Provider": "openai",
+            "X-AI-API-Key": "sk-secret",
+            "X-AI-Model": "gpt-4o-mini",
+        }
+    )
+    monkeypatch.setattr(ai_credentials, "_load_ai_headers", loader)
+
+    first = ai_credentials.resolve_ai_headers_for_user(None, 7)
+    override = ai_credentials.resolve_ai_headers_for_user(None, 7, model="gpt-4o")
+    first["X-AI-Model"] = "mutated by caller"
+    again = ai_credentials.resolve_ai_headers_for_user(None, 7)
+
+    assert loader.call_count == 1
+    assert override["X-AI-Model"] == "gpt-4o"
+    assert again["X-AI-Model"] == "gpt-4o-mini"
+
+    with patch.object(ai_credentials.emitter, "publish") as publish:
+        ai_credentials.invalidate_ai_headers_cache(7)
+    publish.assert_called_once_with(ai_credentials.AI_CREDENTIALS_CHANNEL, {"user_id": 7})
+
+    ai_credentials.resolve_ai_headers_for_user(None, 7)
+    assert loader.call_count == 2
+    ai_credentials.evict_ai_headers(7)
+
+
+def test_headers_loaded_across_an_eviction_are_not_cached(monkeypatch):
+    monkeypatch.setattr(ai_credentials.settings, "ai_headers_cache_ttl_seconds", 300)
+    monkeypatch.setattr(ai_credentials, "_headers_cache", {})
+    keys = iter(["sk-revoked", "sk-new"])
+
+    def load(db, user_id):
+        headers = {"X-AI-Provider": "openai", "X-AI-API-Key": next(keys)}
+        # The key is revoked after we read it but before we cache it.
+        ai_credentials.evict_ai_headers(user_id)
+        return headers
+
+    monkeypatch.setattr(ai_credentials, "_load_ai_headers", load)
+
+    assert ai_credentials.resolve_ai_headers_for_user(None, 7)["X-AI-API-Key"] == "sk-revoked"
+    assert 7 not in ai_credentials._headers_cache
+    assert ai_credentials.resolve_ai_headers_for_user(None, 7)["X-AI-API-Key"] == "sk-new"
+
+
+def test_invalidation_survives_redis_outage(monkeypatch):
+    monkeypatch.setattr(ai_credentials, "_headers_cache", {9: (float("inf"), {})})
+
+    with patch.object(
+        ai_credentials.emitter, "publish", side_effect=ConnectionError("redis down")
+    ):
+        ai_credentials.invalidate_ai_headers_cache(9)
+
+    assert 9 not in ai_credentials._headers_cache
+
+
+def test_worker_listener_evicts_on_credential_changes(monkeypatch):
+    monkeypatch.setattr(
+        ai_credentials,
+        "_headers_cache",
+        {7: (float("inf"), {}), 8: (float("inf"), {})},
+    )
+    redis_client = MagicMock()
+    pubsub = redis_client.pubsub.return_value
+
+    def listen():
+        # Subscribing starts from an empty cache: missed changes are lost.
+        assert ai_credentials._headers_cache == {}
+        ai_credentials._headers_cache[8] = (float("inf"), {})
+        ai_credentials._headers_cache[9] = (float("inf"), {})
+        yield {"type": "message", "data": b'{"user_id": 9}'}
+
+    pubsub.listen.side_effect = listen
+    monkeypatch.setattr(ai_credentials.emitter, "r", redis_client)
+
+    ai_credentials._listen_for_ai_credential_changes()
+
+    pubsub.subscribe.assert_called_once_with(ai_credentials.AI_CREDENTIALS_CHANNEL)
+    assert set(ai_credentials._headers_cache) == {8}
+    pubsub.close.assert_called_once()
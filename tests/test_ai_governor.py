@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.ai_governor import AIGovernor, TokenBucket
+
+
+def test_token_bucket_rejects_when_wait_exceeds_budget():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=1, clock=lambda: now[0])
+
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=1) == pytest.approx(0.5)
+
+    with pytest.raises(HTTPException) as exc:
+        bucket.reserve(max_wait=0.5)
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "1"
+
+    now[0] = 10.0
+    assert bucket.reserve(max_wait=0) == 0
+
+
+def test_per_user_limit_queues_then_rejects_fast():
+    governor = AIGovernor(
+        max_per_user=1,
+        user_queue_limit=1,
+        rate_per_second=1000,
+        burst=1000,
+        queue_timeout=0.2,
+    )
+
+    async def scenario():
+        order = []
+
+        async def call(name, hold):
+            async with governor.admit(user_id=1):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        first = asyncio.create_task(call("first", 0.05))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(call("queued", 0))
+        await asyncio.sleep(0)
+
+        # One running plus one queued: a third call is turned away at once.
+        with pytest.raises(HTTPException) as exc:
+            await call("rejected", 0)
+        assert exc.value.status_code == 429
+
+        await asyncio.gather(first, queued)
+        # Another user is not affected by user 1's queue.
+        async with governor.admit(user_id=2):
+            order.append("other-user")
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "queued", "other-user"]
+    assert governor._user_slots == {} and governor._user_load == {}
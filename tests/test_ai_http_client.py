@@ -0,0 +1,61 @@
+import httpx
+
+from app.utils import ai_http_client
+from app.utils.call_ai_service import call_ai_service
+
+
+def _mock_client_factory(seen_requests):
+    def handler(request):
+        seen_requests.append(request)
+        return httpx.Response(
+            200, json={"response": {"content": "ok", "status_code": 200}}
+        )
+
+    def build():
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    return build
+
+
+def test_worker_loop_reuses_one_client_across_calls(monkeypatch):
+    seen = []
+    built = []
+    factory = _mock_client_factory(seen)
+
+    def build():
+        client = factory()
+        built.append(client)
+        return client
+
+    monkeypatch.setattr(ai_http_client, "_build_client", build)
+
+    try:
+        for _ in range(3):
+            data = ai_http_client.run_in_worker_loop(
+                call_ai_service("http://ai:8000/api/v1/srs/generate", {"message": "hi"})
+            )
+            assert data["response"]["content"] == "ok"
+    finally:
+        ai_http_client.run_in_worker_loop(ai_http_client.close_ai_http_client())
+
+    assert len(seen) == 3
+    assert len(built) == 1
+
+
+def test_per_endpoint_read_timeout(monkeypatch):
+    monkeypatch.setattr(
+        ai_http_client.settings,
+        "ai_endpoint_read_timeouts",
+        {"/api/v1/metadata/extract": 45},
+    )
+    monkeypatch.setattr(ai_http_client.settings, "ai_read_timeout", 180)
+
+    metadata = ai_http_client.ai_timeout_for("http://ai:8000/api/v1/metadata/extract")
+    srs = ai_http_client.ai_timeout_for("http://ai:8000/api/v1/srs/generate")
+    explicit = ai_http_client.ai_timeout_for(
+        "http://ai:8000/api/v1/metadata/extract", read_timeout=5
+    )
+
+    assert metadata.read == 45
+    assert srs.read == 180
+    assert explicit.read == 5
@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+
+from app.utils import ai_circuit_breaker, ai_http_client, call_ai_service as ai_module
+from app.utils.ai_response_cache import ai_cache_key
+from app.utils.call_ai_service import call_ai_service
+
+URL = "http://ai:8000/api/v1/srs/generate"
+BODY = {"response": {"content": "# SRS", "status_code": 200}}
+
+
+def _setup(monkeypatch, handler):
+    monkeypatch.setattr(
+        ai_http_client,
+        "_build_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(ai_circuit_breaker, "_breakers", {})
+    store = {}
+
+    async def get_cached(key):
+        return store.get(key)
+
+    async def put_cached(key, data):
+        store[key] = data
+
+    monkeypatch.setattr(ai_module, "get_cached_ai_response", get_cached)
+    monkeypatch.setattr(ai_module, "store_ai_response", put_cached)
+    return store
+
+
+def test_cache_key_depends_on_payload_and_model_but_not_api_key():
+    payload = {"message": "m", "project_id": 1, "document_format": "f"}
+    base = ai_cache_key(URL, payload, {"X-AI-Model": "a", "X-AI-API-Key": "k1"})
+
+    assert base == ai_cache_key(URL, dict(payload), {"X-AI-Model": "a", "X-AI-API-Key": "k2"})
+    assert base != ai_cache_key(URL, payload, {"X-AI-Model": "b"})
+    assert base != ai_cache_key(URL, {**payload, "project_id": 2}, {"X-AI-Model": "a"})
+
+
+def test_identical_concurrent_calls_share_one_request_then_hit_cache(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=BODY)
+
+    store = _setup(monkeypatch, handler)
+    payload = {"message": "m", "project_id": 1}
+
+    async def scenario():
+        try:
+            first = await asyncio.gather(
+                call_ai_service(URL, payload, dedupe=True),
+                call_ai_service(URL, payload, dedupe=True),
+            )
+            again = await call_ai_service(URL, payload, dedupe=True)
+            other = await call_ai_service(URL, {**payload, "message": "n"}, dedupe=True)
+            return first, again, other
+        finally:
+            await ai_http_client.close_ai_http_client()
+
+    first, again, other = asyncio.run(scenario())
+
+    assert first == [BODY, BODY]
+    assert again == BODY and other == BODY
+    assert len(calls) == 2
+    assert len(store) == 2
+
+
+def test_cache_hit_is_sent_to_streaming_callback(monkeypatch):
+    store = _setup(monkeypatch, lambda request: httpx.Response(500))
+    payload = {"message": "m", "project_id": 1}
+    store[ai_cache_key(URL, payload, {})] = BODY
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    async def scenario():
+        try:
+            return await call_ai_service(URL, payload, on_delta=on_delta, dedupe=True)
+        finally:
+            await ai_http_client.close_ai_http_client()
+
+    assert asyncio.run(scenario()) == BODY
+    assert deltas == ["# SRS"]
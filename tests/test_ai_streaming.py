@@ -0,0 +1,142 @@
+import asyncio
+
+import httpx
+
+from app.utils import ai_circuit_breaker, ai_http_client, ai_streaming
+from app.utils.ai_streaming import doc_delta_sender, stream_ai_deltas
+from app.utils.call_ai_service import call_ai_service
+
+SSE_BODY = (
+    'data: {"delta": "# SRS\\n"}\n\n'
+    ": keep-alive\n\n"
+    'data: {"delta": "Scope"}\n\n'
+    "event: done\n"
+    'data: {"response": {"content": "# SRS\\nScope", "status_code": 200}}\n\n'
+)
+
+
+class _Notifier:
+    def __init__(self):
+        self.events = []
+
+    async def send(self, payload):
+        self.events.append(payload)
+
+
+def _mock_client(monkeypatch, handler):
+    monkeypatch.setattr(
+        ai_http_client,
+        "_build_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(ai_circuit_breaker, "_breakers", {})
+
+
+def test_streamed_deltas_are_forwarded_and_assembled(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=SSE_BODY
+        )
+
+    _mock_client(monkeypatch, handler)
+    monkeypatch.setattr(ai_streaming.settings, "ai_streaming_enabled", True)
+    notifier = _Notifier()
+
+    async def scenario():
+        try:
+            on_delta = doc_delta_sender(notifier, step="planning", index=0, doc_type="srs")
+            with stream_ai_deltas(on_delta):
+                return await call_ai_service(
+                    "http://ai:8000/api/v1/srs/generate",
+                    {"message": "x"},
+                    on_delta=ai_streaming.current_ai_stream_sink(),
+                )
+        finally:
+            await ai_http_client.close_ai_http_client()
+
+    data = asyncio.run(scenario())
+
+    assert data["response"]["content"] == "# SRS\nScope"
+    assert [e["delta"] for e in notifier.events] == ["# SRS\n", "Scope"]
+    assert notifier.events[0]["type"] == "doc_delta"
+    assert requests[0].headers["accept"] == "text/event-stream"
+    assert b'"stream":true' in requests[0].content.replace(b" ", b"")
+
+
+def test_plain_json_response_is_used_when_service_does_not_stream(monkeypatch):
+    def handler(request):
+        return httpx.Response(
+            200, json={"response": {"content": "whole", "status_code": 200}}
+        )
+
+    _mock_client(monkeypatch, handler)
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    async def scenario():
+        try:
+            return await call_ai_service(
+                "http://ai:8000/api/v1/srs/generate", {}, on_delta=on_delta
+            )
+        finally:
+            await ai_http_client.close_ai_http_client()
+
+    assert asyncio.run(scenario())["response"]["content"] == "whole"
+    assert deltas == []
+
+
+def _stream(body):
+    deltas = []
+
+    async def on_delta(delta):
+        deltas.append(delta)
+
+    async def scenario():
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, content=body
+            )
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await ai_streaming.stream_ai_response(
+                client, "http://ai:8000/generate", {}, {}, httpx.Timeout(5), on_delta
+            )
+
+    return asyncio.run(scenario()), deltas
+
+
+def test_stream_cut_off_before_done_is_a_bad_gateway():
+    response, deltas = _stream('data: {"delta": "# SRS\\n"}\n\n')
+
+    assert response.status_code == 502
+    assert deltas == ["# SRS\n"]
+
+
+def test_done_without_a_body_is_assembled_from_the_deltas():
+    response, _ = _stream(
+        'data: {"delta": "# SRS\\n"}\n\n'
+        'data: {"delta": "Scope"}\n\n'
+        "event: done\n"
+        'data: {"type": "srs"}\n\n'
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "type": "srs",
+        "response": {"content": "# SRS\nScope", "status_code": 200},
+    }
+
+
+def test_streaming_disabled_binds_no_sink(monkeypatch):
+    monkeypatch.setattr(ai_streaming.settings, "ai_streaming_enabled", False)
+
+    async def noop(delta):
+        return None
+
+    with stream_ai_deltas(noop):
+        assert ai_streaming.current_ai_stream_sink() is None
@@ -0,0 +1,97 @@
+import json
+import uuid
+
+import pytest
+
+from app.api.v1.session import build_session_response
+from app.models.ai_transcript import AITranscript
+from app.models.file import Files
+from app.models.session import Chat_Session
+from app.services.ai_transcripts import (
+    attach_ai_transcript,
+    compact_ai_transcripts,
+    load_ai_transcripts,
+)
+
+AI_DATA = {
+    "response": {"content": "# Business case\n" + "body " * 500, "summary": "short"},
+    "status_code": 200,
+}
+
+
+@pytest.fixture
+def ai_file(create_test_project, create_test_file):
+    project = create_test_project()
+
+    def make(metadata):
+        return create_test_file(
+            project, content=AI_DATA["response"]["content"], file_metadata=metadata
+        )
+
+    return make
+
+
+def _session(db, doc, role, message):
+    db.add(
+        Chat_Session(
+            session_id=str(uuid.uuid4()),
+            project_id=doc.project_id,
+            user_id=doc.created_by,
+            content_type=doc.file_type,
+            content_id=doc.id,
+            role=role,
+            message=message,
+        )
+    )
+
+
+def test_attach_stores_the_response_once_and_compressed(db_session, ai_file):
+    doc = ai_file({"step": "planning", "message": "old", "ai_response": {"x": 1}})
+
+    message = attach_ai_transcript(db_session, doc, AI_DATA)
+    db_session.commit()
+
+    transcript = db_session.query(AITranscript).one()
+    assert doc.file_metadata == {"step": "planning", "transcript_id": transcript.id}
+    assert json.loads(message) == {"transcript_id": transcript.id, "summary": "short"}
+    assert transcript.response_size == len(json.dumps(AI_DATA, separators=(",", ":")))
+    assert len(transcript.response_zlib) < transcript.response_size / 4
+    assert load_ai_transcripts(db_session, [transcript.id]) == {transcript.id: AI_DATA}
+
+
+def test_session_response_reads_content_from_the_transcript(db_session, ai_file):
+    doc = ai_file({})
+    _session(db_session, doc, "user", "Write a business case")
+    _session(db_session, doc, "ai", attach_ai_transcript(db_session, doc, AI_DATA))
+    db_session.commit()
+
+    sessions = db_session.query(Chat_Session).order_by(Chat_Session.role.desc()).all()
+    user, ai = build_session_response(sessions, db_session)
+
+    assert user.message == "Write a business case"
+    assert ai.message == AI_DATA["response"]["content"]
+    assert ai.summary == "short"
+
+
+def test_compaction_moves_legacy_payloads_and_is_idempotent(db_session, ai_file):
+    doc = ai_file({"step": "planning", "message": "prompt", "ai_response": AI_DATA})
+    older = {"content": "first draft", "summary": "v1"}
+    _session(db_session, doc, "ai", json.dumps(older))
+    _session(db_session, doc, "ai", json.dumps(AI_DATA["response"]))
+    _session(db_session, doc, "user", "prompt")
+    db_session.commit()
+
+    assert compact_ai_transcripts(db_session, batch_size=1) == {"files": 1, "sessions": 2}
+    assert compact_ai_transcripts(db_session) == {"files": 0, "sessions": 0}
+
+    db_session.expire_all()
+    metadata = db_session.get(Files, doc.id).file_metadata
+    assert set(metadata) == {"step", "transcript_id"}
+    # The latest response reuses the file's transcript; the older one gets its own.
+    assert db_session.query(AITranscript).count() == 2
+
+    sessions = (
+        db_session.query(Chat_Session).filter(Chat_Session.role == "ai").all()
+    )
+    contents = {item.message for item in build_session_response(sessions, db_session)}
+    assert contents == {"first draft", AI_DATA["response"]["content"]}
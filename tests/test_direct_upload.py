@@ -0,0 +1,233 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+
+from app.api.v2 import files as files_api
+from app.api.v2 import projects as projects_api
+from app.api.v2 import storage as storage_api
+from app.models.file import Files
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.file import CompleteUploadRequest, SignedUploadFile, SignedUploadRequest
+from app.tasks import file_tasks
+from app.utils.storage_backend import LocalStorageBackend, set_storage_backend
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path), max_workers=2)
+    set_storage_backend(backend)
+    yield backend
+    set_storage_backend(None)
+
+
+@pytest.fixture
+def access(db_session):
+    user = User(name="u", email="u@example.com", passwordhash="x", email_verified=True)
+    db_session.add(user)
+    db_session.commit()
+    project = Project(user_id=user.id, name="Uploads")
+    db_session.add(project)
+    db_session.commit()
+    return SimpleNamespace(user=user, project=project)
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    chain = MagicMock()
+    monkeypatch.setattr(files_api, "chain", chain)
+    for name in ("process_markdown_task", "extract_metadata_task", "index_rag_task"):
+        monkeypatch.setattr(files_api, name, MagicMock())
+    return chain
+
+
+def _storage_client():
+    app = FastAPI()
+    app.include_router(storage_api.router, prefix="/api/v2/storage")
+    return TestClient(app)
+
+
+def test_put_then_complete_enqueues_pipeline_once(local_storage, access, db_session, pipeline):
+    project_id = access.project.id
+    storage_path = f"/{access.user.id}/{project_id}/user/decks/Q3_deck.pptx"
+    record = Files(
+        id=str(uuid.uuid4()),
+        project_id=project_id,
+        created_by=access.user.id,
+        updated_by=access.user.id,
+        name="Q3_deck",
+        extension=".pptx",
+        storage_path=storage_path,
+        file_category="user upload",
+        file_type=".pptx",
+        file_size=0,
+        status=files_api.FILE_STATUS_UPLOADING,
+    )
+    db_session.add(record)
+    db_session.commit()
+
+    def complete():
+        return asyncio.run(
+            files_api.complete_file_uploads(
+                project_id,
+                CompleteUploadRequest(file_ids=[record.id]),
+                access=access,
+                db=db_session,
+            )
+        )
+
+    with pytest.raises(HTTPException) as exc:
+        complete()
+    assert exc.value.status_code == 409
+
+    signed = asyncio.run(local_storage.create_signed_upload(storage_path))
+    url = urlparse(signed.url)
+    put = _storage_client().put(f"{url.path}?{url.query}", content=b"x" * 3072)
+    assert put.status_code == 200
+
+    complete()
+    done = complete()
+
+    assert done.files[0].status == "pending"
+    assert done.files[0].size_kb == 3.0
+    assert pipeline.call_count == 1
+    files_api.process_markdown_task.s.assert_called_once_with(record.id, None, "decks")
+
+
+def _uploading_file(db, access, name="Q3_deck"):
+    record = Files(
+        id=str(uuid.uuid4()),
+        project_id=access.project.id,
+        created_by=access.user.id,
+        updated_by=access.user.id,
+        name=name,
+        extension=".pptx",
+        storage_path=f"/{access.user.id}/{access.project.id}/user/root/{name}.pptx",
+        file_category="user upload",
+        file_type=".pptx",
+        file_size=0,
+        status=files_api.FILE_STATUS_UPLOADING,
+    )
+    db.add(record)
+    db.commit()
+    return record
+
+
+def test_only_the_complete_that_claims_the_row_enqueues(
+    local_storage, access, db_session, pipeline, monkeypatch
+):
+    record = _uploading_file(db_session, access)
+
+    async def stat_while_another_request_claims(path):
+        # A concurrent complete wins the row while this one checks storage.
+        db_session.query(Files).filter(Files.id == record.id).update(
+            {"status": "pending"}, synchronize_session=False
+        )
+        return 3072
+
+    monkeypatch.setattr(local_storage, "stat", stat_while_another_request_claims)
+    done = asyncio.run(
+        files_api.complete_file_uploads(
+            access.project.id,
+            CompleteUploadRequest(file_ids=[record.id]),
+            access=access,
+            db=db_session,
+        )
+    )
+
+    assert done.files[0].status == "pending"
+    assert pipeline.call_count == 0
+
+
+def test_unconfirmed_uploads_are_not_listed(access, db_session):
+    _uploading_file(db_session, access)
+
+    tree = asyncio.run(
+        projects_api.get_project_tree(
+            access.project.id, include=None, access=access, db=db_session
+        )
+    )["tree"]
+
+    assert tree["files"] == []
+
+
+def test_cleanup_skips_uploads_completed_while_it_runs(access, db_session, monkeypatch):
+    abandoned = _uploading_file(db_session, access, name="old")
+    completed = _uploading_file(db_session, access, name="raced")
+    db_session.query(Files).update(
+        {"created_at": datetime.now(timezone.utc) - timedelta(days=1)},
+        synchronize_session=False,
+    )
+    db_session.commit()
+
+    def get_db():
+        yield db_session
+
+    deleted = []
+
+    async def delete_from_storage(path):
+        deleted.append(path)
+
+    monkeypatch.setattr(file_tasks, "get_db", get_db)
+    monkeypatch.setattr(file_tasks, "delete_file_from_supabase", delete_from_storage)
+    monkeypatch.setattr(file_tasks, "run_in_worker_loop", asyncio.run)
+
+    raced = []
+
+    def complete_before_first_claim(state):
+        # A "complete" call claims the second file after the cleanup read it.
+        if state.is_update and not raced:
+            raced.append(True)
+            state.session.execute(
+                update(Files)
+                .where(Files.id == completed.id)
+                .values(status="pending")
+                .execution_options(synchronize_session=False)
+            )
+
+    event.listen(db_session, "do_orm_execute", complete_before_first_claim)
+    try:
+        result = file_tasks.cleanup_abandoned_uploads_task()
+    finally:
+        event.remove(db_session, "do_orm_execute", complete_before_first_claim)
+
+    db_session.expire_all()
+    assert result == {"discarded": 1}
+    assert deleted == [abandoned.storage_path]
+    assert db_session.get(Files, abandoned.id).status == "deleted"
+    assert db_session.get(Files, completed.id).status == "pending"
+
+
+def test_signed_upload_token_is_bound_to_its_path(local_storage):
+    signed = asyncio.run(local_storage.create_signed_upload("/1/2/user/root/a.pdf"))
+    query = parse_qs(urlparse(signed.url).query)
+
+    response = _storage_client().put(
+        "/api/v2/storage/uploads",
+        params={"path": "/1/2/user/root/b.pdf", "expires": query["expires"][0], "token": signed.token},
+        content=b"x",
+    )
+
+    assert response.status_code == 403
+
+
+def test_sign_rejects_unsupported_types(local_storage, access, db_session):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(
+            files_api.sign_file_uploads(
+                access.project.id,
+                SignedUploadRequest(files=[SignedUploadFile(filename="run.exe")]),
+                access=access,
+                db=db_session,
+            )
+        )
+    assert exc.value.status_code == 400
+    assert db_session.query(Files).count() == 0
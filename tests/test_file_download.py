@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.file_download import (
+    etag_matches,
+    file_etag,
+    parse_range_header,
+    storage_file_response,
+)
+from app.utils.storage_backend import LocalStorageBackend, set_storage_backend
+
+DOC = SimpleNamespace(
+    id="0f3c",
+    name="deck",
+    extension=".pdf",
+    storage_path="7/3/user/deck.pdf",
+    updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    file_size=10,
+)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "7/3/user").mkdir(parents=True)
+    (tmp_path / "7/3/user/deck.pdf").write_bytes(b"0123456789")
+    set_storage_backend(LocalStorageBackend(str(tmp_path), max_workers=2))
+    monkeypatch.setattr("app.utils.file_download.settings.storage_stream_chunk_size", 4)
+
+    app = FastAPI()
+
+    @app.get("/export")
+    async def export(request: Request):
+        return await storage_file_response(request, DOC)
+
+    yield TestClient(app)
+    set_storage_backend(None)
+
+
+def test_parse_range_header():
+    assert parse_range_header("bytes=2-5") == (2, 5)
+    assert parse_range_header("bytes=7-") == (7, None)
+    assert parse_range_header("bytes=-3") == (None, 3)
+    assert parse_range_header("bytes=0-1,4-5") is None
+    assert parse_range_header("bytes=5-2") is None
+    assert parse_range_header("items=0-1") is None
+
+
+def test_etag_matches_lists_and_weak_tags():
+    etag = file_etag(DOC)
+    assert etag_matches(f'"x", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_full_download_is_streamed_with_validators(client):
+    response = client.get("/export")
+
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["content-length"] == "10"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == file_etag(DOC)
+    assert response.headers["content-type"] == "application/pdf"
+
+
+def test_range_requests(client):
+    partial = client.get("/export", headers={"Range": "bytes=2-5"})
+    assert partial.status_code == 206
+    assert partial.content == b"2345"
+    assert partial.headers["content-range"] == "bytes 2-5/10"
+
+    suffix = client.get("/export", headers={"Range": "bytes=-3"})
+    assert suffix.content == b"789"
+
+    unsatisfiable = client.get("/export", headers={"Range": "bytes=20-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */10"
+
+
+def test_stale_if_range_returns_whole_file(client):
+    response = client.get(
+        "/export", headers={"Range": "bytes=2-5", "If-Range": '"stale"'}
+    )
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+
+
+def test_if_none_match_returns_304(client):
+    response = client.get("/export", headers={"If-None-Match": file_etag(DOC)})
+    assert response.status_code == 304
+    assert response.content == b""
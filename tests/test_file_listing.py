@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v2.projects import get_project_tree
+from app.models.file import Files
+from app.models.folder import Folder
+from app.services.document_generation import list_documents
+from app.services.file_listing import defer_heavy_columns, parse_include
+from app.schemas.planning import GetPlanningResponse, PlanningListResponse
+
+
+@pytest.fixture
+def project_files(db_session, create_test_project, create_test_file):
+    project = create_test_project()
+    folder = Folder(
+        project_id=project.id, name="business-case", created_by=project.user_id
+    )
+    db_session.add(folder)
+    db_session.flush()
+    for folder_id in (None, folder.id):
+        create_test_file(
+            project,
+            folder_id=folder_id,
+            content="# Business case",
+            file_size=1,
+            file_metadata={"step": "planning"},
+        )
+    db_session.commit()
+    return project
+
+
+def test_parse_include_rejects_unknown_fields():
+    assert parse_include(None) == set()
+    assert parse_include("content, metadata") == {"content", "metadata"}
+    with pytest.raises(HTTPException) as exc:
+        parse_include("content,storage")
+    assert exc.value.status_code == 400
+
+
+def test_heavy_columns_are_left_out_of_the_select(db_session):
+    def selected(include):
+        query = defer_heavy_columns(db_session.query(Files), include)
+        return str(query.statement.compile())
+
+    assert "files.content" not in selected(set())
+    assert "files.metadata" not in selected(set())
+    assert "files.content" in selected({"content"})
+    assert "files.metadata" in selected({"metadata"})
+
+
+def test_project_tree_only_returns_content_when_asked(db_session, project_files):
+    tree = asyncio.run(
+        get_project_tree(project_files.id, include=None, access=None, db=db_session)
+    )["tree"]
+    root_file = tree["files"][0]
+    nested_file = tree["folders"][0].files[0]
+    assert root_file.content is None and root_file.file_metadata is None
+    assert nested_file.name == "business-case" and nested_file.content is None
+
+    db_session.expire_all()
+    tree = asyncio.run(
+        get_project_tree(
+            project_files.id, include="content,metadata", access=None, db=db_session
+        )
+    )["tree"]
+    assert tree["files"][0].content == "# Business case"
+    assert tree["files"][0].file_metadata == {"step": "planning"}
+
+
+def test_list_documents_defers_content_by_default(db_session, project_files):
+    def listed(include):
+        db_session.expire_all()
+        return list_documents(
+            project_id=project_files.id,
+            document_type=None,
+            valid_types=["business-case"],
+            response_cls=PlanningListResponse,
+            item_response_cls=GetPlanningResponse,
+            type_field="doc_type",
+            db=db_session,
+            include=include,
+        )["documents"]
+
+    assert [doc.content for doc in listed(set())] == [None, None]
+    assert {doc.content for doc in listed({"content"})} == {"# Business case"}
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.custom_document_format import CustomDocumentFormat
+from app.models.folder import Folder
+from app.models.project_member import ProjectMember
+from app.models.role import Role
+from app.models.user import User
+from app.services.generation_context import (
+    GenerationContext,
+    current_generation_context,
+    use_generation_context,
+)
+
+
+@pytest.fixture
+def project(db_session, create_test_project, create_test_file):
+    project = create_test_project(description="An online shop")
+    role = Role(name="editor", permissions={"file": ["read", "write"]})
+    db_session.add(role)
+    db_session.flush()
+    db_session.add(
+        ProjectMember(project_id=project.id, user_id=project.user_id, role_id=role.id)
+    )
+
+    folder = Folder(
+        project_id=project.id, name="business-case", created_by=project.user_id
+    )
+    db_session.add(folder)
+    db_session.flush()
+
+    def add_file(name, file_type, status="completed"):
+        create_test_file(
+            project, name=name, file_type=file_type, folder_id=folder.id, status=status
+        )
+
+    add_file("business-case", "business-case")
+    add_file("business-case (1)", "business-case")
+    add_file("high-level-requirements", "high-level-requirements", status="deleted")
+    db_session.add(
+        CustomDocumentFormat(
+            project_id=project.id,
+            format_name="Ours",
+            document_type="business-case",
+            content="# Format",
+            extension=".md",
+            is_activated=True,
+        )
+    )
+    db_session.commit()
+    return project, db_session.get(User, project.user_id)
+
+
+def test_load_collects_the_project_state_once(db_session, project):
+    project, user = project
+
+    context = GenerationContext.load(db_session, project.id, user.id)
+
+    assert context.access.user.id == user.id
+    assert context.describe("") == (
+        "Project Name: Shop\n\nProject Description:\nAn online shop"
+    )
+    assert context.describe(" custom ") == "custom"
+    assert context.active_format("business-case")["content"] == "# Format"
+    assert context.active_format("srs") is None
+    assert context.unique_name("business-case", "business-case") == "business-case (2)"
+    assert context.unique_name("srs", "srs") == "srs"
+
+    # A deleted file keeps its name but does not satisfy dependencies.
+    deps = context.check_dependencies("scope-statement")
+    assert deps["missing_required"] == ["high-level-requirements"]
+    assert context.unique_name(
+        "high-level-requirements", "high-level-requirements"
+    ) == "high-level-requirements (1)"
+
+
+def test_record_and_get_folder_keep_the_context_current(db_session, project):
+    project, user = project
+    context = GenerationContext.load(db_session, project.id, user.id)
+
+    context.record("high-level-requirements", "high-level-requirements (1)")
+    assert context.check_dependencies("scope-statement")["can_proceed"]
+    assert context.unique_name(
+        "high-level-requirements", "high-level-requirements"
+    ) == "high-level-requirements (2)"
+
+    existing = asyncio.run(context.get_folder("business-case", db_session))
+    created = asyncio.run(context.get_folder("srs", db_session))
+    assert existing.name == "business-case"
+    assert created.name == "srs"
+    assert asyncio.run(context.get_folder("srs", db_session)) is created
+    assert db_session.query(Folder).filter(Folder.name == "srs").count() == 1
+
+
+def test_load_checks_permission(db_session, project):
+    project, user = project
+    db_session.query(Role).update({"permissions": {"file": ["read"]}})
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        GenerationContext.load(db_session, project.id, user.id)
+    assert exc.value.status_code == 403
+
+
+def test_context_only_applies_to_its_own_project(db_session, project):
+    project, user = project
+    context = GenerationContext.load(db_session, project.id, user.id)
+
+    assert current_generation_context(project.id) is None
+    with use_generation_context(context):
+        assert current_generation_context(project.id) is context
+        assert current_generation_context(project.id + 1) is None
+    assert current_generation_context(project.id) is None
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import global_search
+
+
+def _row(row_id, rank):
+    return SimpleNamespace(
+        id=row_id,
+        entity_id=str(row_id),
+        entity_type="file",
+        project_id=1,
+        title=f"Doc {row_id}",
+        rank=rank,
+    )
+
+
+def test_cursor_round_trips_exact_rank():
+    rank = 0.060792710632085800
+    cursor = global_search.encode_cursor(rank, 42)
+
+    assert global_search.decode_cursor(cursor) == (rank, 42)
+    with pytest.raises(HTTPException):
+        global_search.decode_cursor("not-a-cursor")
+
+
+def test_fetch_search_page_uses_keyset_and_returns_next_cursor():
+    db = MagicMock()
+    db.execute.return_value.fetchall.return_value = [
+        _row(9, 0.5),
+        _row(7, 0.4),
+        _row(3, 0.4),
+    ]
+
+    rows, next_cursor = global_search.fetch_search_page(
+        db, keyword="login", project_ids=[1], limit=2, cursor=(0.6, 11), offset=40
+    )
+
+    statement, params = db.execute.call_args.args
+    assert "(rank, id) < (CAST(:cursor_rank AS real), :cursor_id)" in str(statement)
+    assert "OFFSET" not in str(statement)
+    assert params["limit"] == 3
+    assert [row.id for row in rows] == [9, 7]
+    assert global_search.decode_cursor(next_cursor) == (0.4, 7)
+
+
+def test_count_is_cached_per_query(monkeypatch):
+    store = {}
+    fake_redis = MagicMock()
+    fake_redis.get.side_effect = lambda key: store.get(key)
+    fake_redis.set.side_effect = lambda key, value, ex: store.__setitem__(key, value)
+    monkeypatch.setattr(global_search, "_get_redis", lambda: fake_redis)
+    monkeypatch.setattr(global_search.settings, "search_approximate_count_cap", 100)
+
+    db = MagicMock()
+    db.execute.return_value.scalar.return_value = 101
+
+    first = global_search.count_search_matches(
+        db, keyword="login", project_ids=[2, 1], mode="approximate"
+    )
+    second = global_search.count_search_matches(
+        db, keyword="login", project_ids=[1, 2], mode="approximate"
+    )
+
+    assert first == second == (100, True)
+    assert db.execute.call_count == 1
+    assert db.execute.call_args.args[1]["cap"] == 101
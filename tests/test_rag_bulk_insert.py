@@ -0,0 +1,139 @@
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.utils.rag_indexer import (
+    _Chunk,
+    _vector_literal,
+    bulk_insert_rag_chunks,
+    index_rag_chunks,
+)
+
+
+RAG_CHUNKS_DDL = """
+CREATE TABLE rag_chunks (
+    id TEXT PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    project_id INTEGER NOT NULL,
+    document_type TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    content_hash TEXT,
+    token_count INTEGER,
+    embedding TEXT NOT NULL,
+    created_at TEXT
+)
+"""
+
+
+def _rag_session():
+    engine = create_engine("sqlite:///:memory:")
+    session = sessionmaker(bind=engine)()
+    session.execute(text(RAG_CHUNKS_DDL))
+    return session
+
+
+def test_bulk_insert_rag_chunks_pages_rows():
+    session = _rag_session()
+    rows = [
+        (idx, _Chunk(content=f"chunk {idx}", token_count=2), [0.5, float(idx)])
+        for idx in range(5)
+    ]
+
+    with patch.object(session, "execute", wraps=session.execute) as spy:
+        inserted = bulk_insert_rag_chunks(
+            session,
+            file_id="file-1",
+            project_id=7,
+            document_type="srs",
+            rows=rows,
+            page_size=2,
+        )
+
+    assert inserted == 5
+    assert spy.call_count == 3
+
+    stored = session.execute(
+        text("SELECT chunk_index, content FROM rag_chunks ORDER BY chunk_index")
+    ).fetchall()
+    assert [row.chunk_index for row in stored] == [0, 1, 2, 3, 4]
+    assert stored[3].content == "chunk 3"
+
+
+def test_index_rag_chunks_replaces_existing_rows():
+    session = _rag_session()
+    session.execute(
+        text(
+            "INSERT INTO rag_chunks (id, file_id, project_id, document_type, chunk_index, content, token_count, embedding) "
+            "VALUES ('old', 'file-1', 7, 'srs', 0, 'stale', 1, '[0.0]')"
+        )
+    )
+
+    with patch(
+        "app.utils.rag_indexer._embed_texts",
+        side_effect=lambda texts: [[0.1, 0.2] for _ in texts],
+    ):
+        inserted = index_rag_chunks(
+            session,
+            file_id="file-1",
+            project_id=7,
+            document_type="srs",
+            markdown_text="First paragraph.\n\nSecond paragraph.",
+        )
+
+    contents = session.execute(
+        text("SELECT content FROM rag_chunks WHERE file_id = 'file-1'")
+    ).scalars().all()
+    assert inserted == len(contents) >= 1
+    assert "stale" not in contents
+
+
+def test_vector_literal_matches_pgvector_text_format():
+    assert _vector_literal([0.25, -1.0, 3.5]) == "[0.25,-1.0,3.5]"
+
+
+def test_incremental_reindex_only_touches_changed_chunks():
+    session = _rag_session()
+    embedded = []
+
+    def fake_embed(db, chunks):
+        embedded.extend(chunk.content for chunk in chunks)
+        return [[0.1] for _ in chunks]
+
+    def index(markdown_text):
+        return index_rag_chunks(
+            session,
+            file_id="file-1",
+            project_id=7,
+            document_type="srs",
+            markdown_text=markdown_text,
+            incremental=True,
+        )
+
+    with patch(
+        "app.utils.rag_indexer._embed_chunks_cached", side_effect=fake_embed
+    ), patch("app.utils.rag_indexer.settings.rag_chunk_size", 5), patch(
+        "app.utils.rag_indexer.settings.rag_chunk_overlap", 0
+    ):
+        index("Alpha para one.\n\nBravo para two.\n\nCharlie para 3.")
+        before = dict(
+            session.execute(text("SELECT content, id FROM rag_chunks")).fetchall()
+        )
+        embedded.clear()
+
+        chunk_count = index("New first para.\n\nAlpha para one.\n\nCharlie para 3.")
+
+    rows = session.execute(
+        text("SELECT id, chunk_index, content FROM rag_chunks ORDER BY chunk_index")
+    ).fetchall()
+
+    assert chunk_count == 3
+    assert embedded == ["New first para."]
+    assert [row.content for row in rows] == [
+        "New first para.",
+        "Alpha para one.",
+        "Charlie para 3.",
+    ]
+    assert rows[1].id == before["Alpha para one."]
+    assert rows[2].id == before["Charlie para 3."]
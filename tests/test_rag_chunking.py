@@ -22,3 +22,26 @@ def test_chunk_text_basic():
     assert len(second) <= 20
     # Basic textual overlap: some word from end of first should be in second
     assert any(w for w in first.split()[-3:] if w in second)
+
+
+def test_build_chunks_respects_chunk_size_and_order():
+    from app.utils.rag_indexer import _build_chunks
+
+    long_paragraph = " ".join(f"Sentence {i} of the long paragraph." for i in range(40))
+    text = f"Intro paragraph.\n\n{long_paragraph}\n\nClosing paragraph."
+
+    chunks = _build_chunks(text, chunk_size=30, overlap=5)
+
+    assert all(chunk.token_count <= 30 for chunk in chunks)
+    assert chunks[0].content.startswith("Intro paragraph.")
+    assert chunks[-1].content.endswith("Closing paragraph.")
+
+
+def test_token_encoder_is_loaded_once():
+    from app.utils import rag_indexer
+
+    rag_indexer._get_token_encoder.cache_clear()
+    rag_indexer._chunk_text("One. Two.\n\nThree.", chunk_size=20, overlap=2)
+    rag_indexer._chunk_text("Four. Five.\n\nSix.", chunk_size=20, overlap=2)
+
+    assert rag_indexer._get_token_encoder.cache_info().misses == 1
@@ -0,0 +1,103 @@
+import threading
+import time
+from unittest.mock import patch
+
+from app.utils import rag_indexer
+from app.utils.rag_indexer import _Chunk, _batch_by_tokens, _embed_chunks
+
+
+def _chunks(token_counts):
+    return [
+        _Chunk(content=f"chunk {idx}", token_count=count)
+        for idx, count in enumerate(token_counts)
+    ]
+
+
+def test_batch_by_tokens_respects_item_and_token_budget():
+    batches = list(
+        _batch_by_tokens(_chunks([40, 40, 40, 10, 10, 10]), max_items=3, max_tokens=90)
+    )
+
+    assert [[c.content for c in batch] for batch in batches] == [
+        ["chunk 0", "chunk 1"],
+        ["chunk 2", "chunk 3", "chunk 4"],
+        ["chunk 5"],
+    ]
+
+
+def test_embed_chunks_runs_batches_concurrently_and_keeps_order():
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_embed(texts):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return [[float(text.split()[-1])] for text in texts]
+
+    with patch.object(rag_indexer, "_embed_texts", side_effect=fake_embed), patch.object(
+        rag_indexer.settings, "rag_embed_batch_size", 2
+    ), patch.object(rag_indexer.settings, "rag_embed_concurrency", 3):
+        embeddings = _embed_chunks(_chunks([5] * 8))
+
+    assert embeddings == [[float(idx)] for idx in range(8)]
+    assert 1 < peak <= 3
+
+
+def test_index_rag_chunks_only_embeds_uncached_chunks():
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+
+    from app.utils.rag_indexer import _embedding_cache_key, index_rag_chunks
+
+    engine = create_engine("sqlite:///:memory:")
+    session = sessionmaker(bind=engine)()
+    session.execute(
+        text(
+            "CREATE TABLE rag_chunks (id TEXT PRIMARY KEY, file_id TEXT, project_id INTEGER, "
+            "document_type TEXT, chunk_index INTEGER, content TEXT, content_hash TEXT, "
+            "token_count INTEGER, "
+            "embedding TEXT, created_at TEXT)"
+        )
+    )
+    session.execute(
+        text(
+            "CREATE TABLE rag_embedding_cache (content_hash TEXT PRIMARY KEY, model TEXT, "
+            "dimensions INTEGER, embedding TEXT, created_at TEXT, last_used_at TEXT)"
+        )
+    )
+    session.execute(
+        text(
+            "INSERT INTO rag_embedding_cache VALUES (:key, 'm', 1536, '[0.5,0.5]', NULL, NULL)"
+        ),
+        {"key": _embedding_cache_key("Unchanged paragraph.")},
+    )
+
+    embedded = []
+
+    def fake_embed(texts):
+        embedded.extend(texts)
+        return [[0.1, 0.2] for _ in texts]
+
+    with patch.object(rag_indexer, "_embed_texts", side_effect=fake_embed), patch.object(
+        rag_indexer.settings, "rag_chunk_size", 5
+    ), patch.object(rag_indexer.settings, "rag_chunk_overlap", 0):
+        inserted = index_rag_chunks(
+            session,
+            file_id="file-1",
+            project_id=1,
+            document_type="srs",
+            markdown_text="Unchanged paragraph.\n\nEdited paragraph!",
+        )
+
+    assert inserted == 2
+    assert embedded == ["Edited paragraph!"]
+    cached_keys = session.execute(
+        text("SELECT content_hash FROM rag_embedding_cache")
+    ).scalars().all()
+    assert _embedding_cache_key("Edited paragraph!") in cached_keys
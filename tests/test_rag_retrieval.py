@@ -0,0 +1,210 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.services import rag_retrieval
+
+
+def _row(chunk_index, distance):
+    return SimpleNamespace(
+        id=f"chunk-{chunk_index}",
+        file_id="file-1",
+        project_id=7,
+        document_type="srs",
+        chunk_index=chunk_index,
+        content=f"content {chunk_index}",
+        token_count=3,
+        distance=distance,
+    )
+
+
+def test_search_sets_ef_search_per_query_and_orders_hits(monkeypatch):
+    monkeypatch.setattr(rag_retrieval.settings, "rag_hnsw_ef_search", 8)
+    monkeypatch.setattr(rag_retrieval.settings, "rag_hnsw_iterative_scan", "relaxed_order")
+    monkeypatch.setattr(rag_retrieval.settings, "rag_vector_storage", "vector")
+
+    db = MagicMock()
+    db.execute.return_value.fetchall.return_value = [
+        _row(1, 0.30),
+        _row(0, 0.10),
+        _row(2, 0.90),
+    ]
+
+    hits = rag_retrieval.search_rag_chunks(
+        db,
+        project_ids=[7],
+        query_embedding=[0.1, 0.2],
+        k=20,
+        document_types=["srs"],
+        min_similarity=0.5,
+    )
+
+    statements = [str(call.args[0]) for call in db.execute.call_args_list]
+    # ef_search is raised to k so the index can return k candidates.
+    assert statements[0] == "SET LOCAL hnsw.ef_search = 20"
+    assert statements[1] == "SET LOCAL hnsw.iterative_scan = relaxed_order"
+    assert "project_id IN" in statements[2]
+    assert db.execute.call_args_list[2].args[1]["project_ids"] == [7]
+
+    assert [hit["chunk_index"] for hit in hits] == [0, 1]
+    assert hits[0]["similarity"] > hits[1]["similarity"]
+
+
+def test_ensure_hnsw_index_skips_matching_index(monkeypatch):
+    monkeypatch.setattr(rag_retrieval.settings, "rag_hnsw_m", 16)
+    monkeypatch.setattr(rag_retrieval.settings, "rag_hnsw_ef_construction", 64)
+    monkeypatch.setattr(rag_retrieval.settings, "rag_vector_storage", "vector")
+    monkeypatch.setattr(rag_retrieval.settings, "rag_embedding_dimensions", 1536)
+
+    conn = MagicMock()
+    conn.execute.return_value.first.return_value = SimpleNamespace(
+        signature="vector:1536:m=16,ef_construction=64", indisvalid=True
+    )
+    engine = MagicMock()
+    engine.connect.return_value.execution_options.return_value.__enter__.return_value = conn
+
+    assert rag_retrieval.ensure_hnsw_index(engine) == "unchanged"
+    assert conn.execute.call_count == 1
+
+    monkeypatch.setattr(rag_retrieval.settings, "rag_hnsw_m", 32)
+    conn.execute.reset_mock()
+
+    assert rag_retrieval.ensure_hnsw_index(engine) == "rebuilt"
+    statements = [str(call.args[0]) for call in conn.execute.call_args_list]
+    assert any("WITH (m = 32, ef_construction = 64)" in s for s in statements)
+    assert statements[-1].startswith("ALTER INDEX")
+
+
+def test_binary_storage_reranks_quantized_candidates(monkeypatch):
+    monkeypatch.setattr(rag_retrieval.settings, "rag_hnsw_ef_search", 8)
+    monkeypatch.setattr(rag_retrieval.settings, "rag_hnsw_iterative_scan", "off")
+    monkeypatch.setattr(rag_retrieval.settings, "rag_vector_storage", "binary")
+    monkeypatch.setattr(rag_retrieval.settings, "rag_binary_rerank_factor", 4)
+    monkeypatch.setattr(rag_retrieval.settings, "rag_embedding_dimensions", 4)
+
+    db = MagicMock()
+    db.execute.return_value.fetchall.return_value = [_row(0, 0.2)]
+
+    rag_retrieval.search_rag_chunks(db, project_ids=[7], query_embedding=[1, 0, 0, 0], k=5)
+
+    set_ef, search = db.execute.call_args_list
+    assert str(set_ef.args[0]) == "SET LOCAL hnsw.ef_search = 20"
+    assert "binary_quantize(embedding)::bit(4) <~>" in str(search.args[0])
+    assert search.args[1]["candidates"] == 20
+    assert search.args[1]["k"] == 5
+
+
+def test_embedding_column_mismatch_fails_fast(monkeypatch):
+    import pytest
+    from app.core import rag_database
+
+    monkeypatch.setattr(rag_database.settings, "rag_embedding_dimensions", 1536)
+    monkeypatch.setattr(rag_database.settings, "rag_vector_storage", "halfvec")
+
+    conn = MagicMock()
+    engine = MagicMock()
+    engine.connect.return_value.__enter__.return_value = conn
+
+    conn.execute.return_value.scalar.return_value = "halfvec(1536)"
+    rag_database.validate_rag_embedding_column(engine)
+
+    conn.execute.return_value.scalar.return_value = "vector(3072)"
+    with pytest.raises(RuntimeError):
+        rag_database.validate_rag_embedding_column(engine)
+
+
+def test_reciprocal_rank_fusion_rewards_hits_found_by_both_sources():
+    lexical = [{"id": "a", "rank": 0.9}, {"id": "b", "rank": 0.5}]
+    semantic = [{"id": "b", "similarity": 0.8}, {"id": "c", "similarity": 0.7}]
+
+    fused = rag_retrieval.reciprocal_rank_fusion(
+        {"lexical": lexical, "semantic": semantic}, rrf_k=60
+    )
+
+    assert [hit["id"] for hit in fused] == ["b", "a", "c"]
+    assert fused[0]["lexical_rank"] == 2 and fused[0]["semantic_rank"] == 1
+    assert fused[2]["lexical_rank"] is None
+    assert "rank" not in fused[1] and "similarity" not in fused[2]
+
+
+def test_hybrid_search_returns_partial_results_within_budget(monkeypatch):
+    import asyncio
+    import time
+
+    timeouts = []
+
+    def slow_embed(query, timeout=None):
+        timeouts.append(timeout)
+        time.sleep(0.5)
+        return [0.0]
+
+    monkeypatch.setattr(rag_retrieval, "embed_query", slow_embed)
+    monkeypatch.setattr(
+        rag_retrieval,
+        "lexical_search_rag_chunks",
+        lambda db, **kwargs: [{"id": "a", "rank": 0.4}],
+    )
+    session_factory = MagicMock()
+
+    hits, missing = asyncio.run(
+        rag_retrieval.hybrid_search_rag_chunks(
+            project_ids=[1],
+            keyword="login",
+            budget_ms=200,
+            session_factory=session_factory,
+        )
+    )
+
+    assert missing == ["semantic"]
+    assert [hit["id"] for hit in hits] == ["a"]
+    # The embedding call is bounded too, and the semantic query never ran.
+    assert timeouts == [0.2]
+    assert session_factory.call_count == 1
+
+
+def test_hybrid_endpoint_runs_its_queries_off_the_event_loop(
+    monkeypatch, db_session, create_test_project, create_test_file
+):
+    import asyncio
+    import threading
+
+    from app.api.v2 import search as search_api
+
+    project = create_test_project()
+    doc = create_test_file(project, name="login-flow")
+    db_session.commit()
+    threads = []
+
+    def check_permission(**kwargs):
+        threads.append(threading.get_ident())
+
+    async def hybrid(**kwargs):
+        return [
+            {
+                "id": "c1",
+                "file_id": str(doc.id),
+                "project_id": project.id,
+                "document_type": "srs",
+                "chunk_index": 0,
+                "content": "Login",
+                "score": 0.5,
+            }
+        ], []
+
+    monkeypatch.setattr(search_api, "check_permission", check_permission)
+    monkeypatch.setattr(search_api, "hybrid_search_rag_chunks", hybrid)
+
+    async def scenario():
+        response = await search_api.hybrid_search(
+            keyword="login",
+            limit=5,
+            project_id=project.id,
+            budget_ms=None,
+            current_user=MagicMock(id=project.user_id),
+            db=db_session,
+        )
+        return response, threading.get_ident()
+
+    response, loop_thread = asyncio.run(scenario())
+
+    assert threads and threads[0] != loop_thread
+    assert [item.file_name for item in response.results] == ["login-flow"]
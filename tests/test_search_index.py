@@ -0,0 +1,20 @@
+from sqlalchemy import create_engine
+
+from app.services import search_index
+
+# Trigger, backfill and prune behaviour is covered against Postgres in
+# tests/integration/test_search_index_triggers.py.
+
+
+def test_every_entity_gets_a_sync_function_and_trigger():
+    for entity, spec in search_index.SEARCH_ENTITIES.items():
+        function_sql, drop_sql, create_sql = search_index._trigger_ddl(entity, spec)
+
+        assert f"FUNCTION gsi_sync_{entity}()" in function_sql
+        assert f"ON {spec['table']}" in drop_sql and f"ON {spec['table']}" in create_sql
+
+
+def test_install_is_skipped_outside_postgres():
+    engine = create_engine("sqlite:///:memory:")
+
+    assert search_index.install_search_index_triggers(engine) is False
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.services.step_dag import (
+    DAG_ABORTED,
+    DAG_COMPLETED,
+    DAG_STOPPED,
+    NODE_ABORT,
+    NODE_DONE,
+    build_document_graph,
+    run_document_dag,
+)
+
+PLANNING = [
+    "stakeholder-register",
+    "high-level-requirements",
+    "requirements-management-plan",
+    "business-case",
+    "scope-statement",
+    "product-roadmap",
+]
+
+
+def _docs(types):
+    return [{"type": doc_type} for doc_type in types]
+
+
+def test_graph_uses_required_dependencies_within_the_request():
+    graph = build_document_graph(PLANNING)
+
+    assert graph[0] == graph[1] == graph[2] == graph[3] == set()
+    assert graph[4] == {1, 3}  # scope-statement
+    assert graph[5] == {1, 4}  # product-roadmap
+
+    with_recommended = build_document_graph(PLANNING, include_recommended=True)
+    assert with_recommended[1] == {0}
+
+
+def test_independent_documents_run_concurrently_up_to_the_width():
+    started, in_flight, peak = [], [0], [0]
+
+    async def run_node(index, doc):
+        started.append(doc["type"])
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return NODE_DONE
+
+    outcome = asyncio.run(run_document_dag(_docs(PLANNING), run_node, max_parallel=3))
+
+    assert outcome == DAG_COMPLETED
+    assert peak[0] == 3
+    assert started.index("scope-statement") > started.index("business-case")
+    assert started[-1] == "product-roadmap"
+
+
+def test_stop_event_lets_running_nodes_finish_and_skips_the_rest():
+    stop_event = asyncio.Event()
+    finished = []
+
+    async def run_node(index, doc):
+        stop_event.set()
+        await asyncio.sleep(0.01)
+        finished.append(index)
+        return NODE_DONE
+
+    async def scenario():
+        return await run_document_dag(
+            _docs(PLANNING), run_node, stop_event=stop_event, max_parallel=2
+        )
+
+    assert asyncio.run(scenario()) == DAG_STOPPED
+    assert sorted(finished) == [0, 1]
+
+
+def test_abort_stops_scheduling_new_nodes():
+    seen = []
+
+    async def run_node(index, doc):
+        seen.append(index)
+        return NODE_ABORT
+
+    outcome = asyncio.run(run_document_dag(_docs(PLANNING), run_node, max_parallel=1))
+
+    assert outcome == DAG_ABORTED
+    assert seen == [0]
+
+
+def test_cancelling_the_step_cancels_running_nodes():
+    cancelled = []
+
+    async def run_node(index, doc):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return NODE_DONE
+
+    async def scenario():
+        task = asyncio.create_task(
+            run_document_dag(_docs(PLANNING), run_node, max_parallel=2)
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert sorted(cancelled) == [0, 1]
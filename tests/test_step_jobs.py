@@ -0,0 +1,194 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.step_job import StepJob, StepJobDocument
+from app.services import step_jobs
+from app.services.step_dag import DAG_COMPLETED
+
+INIT = {
+    "project_name": "Shop",
+    "description": "An online shop",
+    "documents": [{"type": "stakeholder-register"}, {"type": "business-case"}],
+}
+
+
+@pytest.fixture
+def jobs_db(db_session, monkeypatch):
+    monkeypatch.setattr(
+        step_jobs, "SessionLocal", sessionmaker(bind=db_session.get_bind())
+    )
+    emitter = MagicMock()
+    monkeypatch.setattr(step_jobs, "emitter", emitter)
+    return db_session, emitter
+
+
+def _job(db, **values):
+    job = db.query(StepJob).filter(StepJob.id == values.pop("id")).first()
+    for key, value in values.items():
+        setattr(job, key, value)
+    db.commit()
+    return job
+
+
+def _checkpoint(db, job_id, index, doc_type, data):
+    db.add(
+        StepJobDocument(job_id=job_id, doc_index=index, doc_type=doc_type, data=data)
+    )
+    db.commit()
+
+
+def test_new_job_cancels_the_previous_one_and_resume_reattaches(jobs_db):
+    db, emitter = jobs_db
+
+    first = step_jobs.open_step_job(1, 7, "planning", INIT)
+    assert first["status"] == step_jobs.JOB_QUEUED and not first["resumed"]
+
+    second = step_jobs.open_step_job(1, 7, "planning", INIT)
+    db.expire_all()
+    assert db.get(StepJob, first["job_id"]).status == step_jobs.JOB_CANCELLED
+    emitter.publish.assert_called_with(
+        step_jobs.STEP_JOB_CONTROL_CHANNEL,
+        {"job_id": first["job_id"], "action": step_jobs.ACTION_CANCEL},
+    )
+
+    _checkpoint(db, second["job_id"], 0, "stakeholder-register", {"id": 1})
+    resumed = step_jobs.open_step_job(1, 7, "planning", {"resume": True})
+    assert resumed["job_id"] == second["job_id"] and resumed["resumed"]
+    assert resumed["completed"] == [
+        {"index": 0, "doc_type": "stakeholder-register", "data": {"id": 1}}
+    ]
+
+
+def test_claim_is_exclusive_until_the_heartbeat_goes_stale(jobs_db):
+    db, _ = jobs_db
+    job_id = step_jobs.open_step_job(1, 7, "design", INIT)["job_id"]
+
+    assert step_jobs.claim_step_job(db, job_id).status == step_jobs.JOB_RUNNING
+    assert step_jobs.claim_step_job(db, job_id) is None
+
+    _job(db, id=job_id, heartbeat_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    assert step_jobs.claim_step_job(db, job_id).attempt_count == 2
+
+
+def test_stale_running_jobs_are_requeued_until_out_of_attempts(jobs_db, monkeypatch):
+    db, _ = jobs_db
+    monkeypatch.setattr(step_jobs.settings, "step_job_max_attempts", 2)
+    stale = datetime.now(timezone.utc) - timedelta(hours=1)
+    retry = step_jobs.open_step_job(1, 7, "planning", INIT)["job_id"]
+    give_up = step_jobs.open_step_job(2, 7, "planning", INIT)["job_id"]
+    _job(db, id=retry, status="running", heartbeat_at=stale, attempt_count=1)
+    _job(db, id=give_up, status="running", heartbeat_at=stale, attempt_count=2)
+
+    assert step_jobs.requeue_stale_step_jobs(db) == [retry]
+    db.expire_all()
+    assert db.get(StepJob, retry).status == step_jobs.JOB_QUEUED
+    assert db.get(StepJob, give_up).status == step_jobs.JOB_FAILED
+
+
+def test_queued_jobs_that_were_never_picked_up_are_resent(jobs_db):
+    db, _ = jobs_db
+    stale = datetime.now(timezone.utc) - timedelta(hours=1)
+    lost = step_jobs.open_step_job(1, 7, "planning", INIT)["job_id"]
+    fresh = step_jobs.open_step_job(2, 7, "planning", INIT)["job_id"]
+    _job(db, id=lost, queued_at=stale)
+
+    assert step_jobs.requeue_stale_step_jobs(db) == [lost]
+    # Re-sent once per stale period, not on every sweep.
+    assert step_jobs.requeue_stale_step_jobs(db) == []
+    db.expire_all()
+    assert db.get(StepJob, fresh).status == step_jobs.JOB_QUEUED
+
+
+def test_a_job_that_could_not_be_enqueued_is_not_resumable(jobs_db):
+    db, _ = jobs_db
+    job_id = step_jobs.open_step_job(1, 7, "design", INIT)["job_id"]
+
+    step_jobs.fail_queued_step_job(job_id, "Could not enqueue: broker down")
+
+    assert step_jobs.get_step_job_status(job_id) == step_jobs.JOB_FAILED
+    resumed = step_jobs.open_step_job(1, 7, "design", {**INIT, "resume": True})
+    assert resumed["job_id"] != job_id and not resumed["resumed"]
+
+
+def test_checkpoint_is_only_kept_if_the_document_commits(jobs_db):
+    db, _ = jobs_db
+    job_id = step_jobs.open_step_job(1, 7, "planning", INIT)["job_id"]
+    checkpoints = step_jobs.StepJobCheckpoints(job_id)
+
+    session = step_jobs.SessionLocal()
+    checkpoints.stage(session, 0, "stakeholder-register", {"id": 1})
+    session.rollback()
+    session.close()
+
+    assert db.query(StepJobDocument).count() == 0
+
+
+async def _no_control(job_id, apply):
+    await asyncio.Event().wait()
+
+
+def test_resumed_job_skips_checkpointed_documents(jobs_db, monkeypatch):
+    db, emitter = jobs_db
+    job_id = step_jobs.open_step_job(1, 7, "planning", INIT)["job_id"]
+    _checkpoint(db, job_id, 0, "stakeholder-register", {"id": 1})
+    generated = []
+
+    async def fake_runner(*, documents, checkpoints, notifier, **kwargs):
+        for index, doc in enumerate(documents):
+            if checkpoints.get(index, doc["type"]) is not None:
+                continue
+            generated.append(index)
+            session = step_jobs.SessionLocal()
+            checkpoints.stage(session, index, doc["type"], {"id": 2})
+            session.commit()
+            session.close()
+            await notifier.send({"type": "doc_completed", "index": index})
+        return DAG_COMPLETED
+
+    monkeypatch.setitem(step_jobs._STEP_RUNNERS, "planning", fake_runner)
+    monkeypatch.setattr(step_jobs, "_listen_for_control", _no_control)
+
+    assert asyncio.run(step_jobs.run_step_job(job_id)) == step_jobs.JOB_COMPLETED
+
+    assert generated == [1]
+    db.expire_all()
+    job = db.get(StepJob, job_id)
+    assert job.status == step_jobs.JOB_COMPLETED
+    saved = db.query(StepJobDocument).filter(StepJobDocument.job_id == job_id)
+    assert {row.doc_index for row in saved} == {0, 1}
+    event = emitter.emit.call_args_list[0].args[0]
+    assert event == {
+        "type": "doc_completed",
+        "index": 1,
+        "project_id": 1,
+        "job_id": job_id,
+        "step": "planning",
+    }
+
+
+def test_cancel_request_cancels_the_running_documents(jobs_db, monkeypatch):
+    _, _ = jobs_db
+    job_id = step_jobs.open_step_job(1, 7, "analysis", INIT)["job_id"]
+    cancelled = []
+
+    async def fake_runner(**kwargs):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def cancel_soon(job_id, apply):
+        await asyncio.sleep(0.01)
+        apply(step_jobs.ACTION_CANCEL)
+        await asyncio.Event().wait()
+
+    monkeypatch.setitem(step_jobs._STEP_RUNNERS, "analysis", fake_runner)
+    monkeypatch.setattr(step_jobs, "_listen_for_control", cancel_soon)
+
+    assert asyncio.run(step_jobs.run_step_job(job_id)) == step_jobs.JOB_CANCELLED
+    assert cancelled == [True]
@@ -0,0 +1,110 @@
+import asyncio
+import io
+import threading
+
+import httpx
+import pytest
+from fastapi import UploadFile
+
+from app.utils import file_handling
+from app.utils.storage_backend import (
+    LocalStorageBackend,
+    SupabaseStorageBackend,
+    set_storage_backend,
+)
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path), max_workers=2)
+    set_storage_backend(backend)
+    yield backend
+    set_storage_backend(None)
+
+
+def test_file_handling_round_trip_on_local_backend(local_storage, tmp_path):
+    async def scenario():
+        path = await file_handling.upload_to_supabase(
+            UploadFile(filename="x.md", file=io.BytesIO(b"v1")), "/7/3/user/a b.md"
+        )
+        stream = await file_handling.download_file_from_supabase(path)
+        updated = await file_handling.update_file_from_supabase(
+            path, UploadFile(filename="x.md", file=io.BytesIO(b"v2"))
+        )
+        after = (await file_handling.download_file_from_supabase(updated)).read()
+        deleted = await file_handling.delete_file_from_supabase(path)
+        deleted_again = await file_handling.delete_file_from_supabase(path)
+        return path, stream.read(), after, deleted, deleted_again
+
+    path, before, after, deleted, deleted_again = asyncio.run(scenario())
+
+    assert path == "/7/3/user/a_b.md"
+    assert (before, after) == (b"v1", b"v2")
+    assert deleted and not deleted_again
+    assert not (tmp_path / "7/3/user/a_b.md").exists()
+
+
+def test_duplicate_upload_fails_like_the_bucket(local_storage):
+    async def scenario():
+        first = await local_storage.upload("a.txt", b"1")
+        second = await file_handling.upload_to_supabase(
+            UploadFile(filename="a.txt", file=io.BytesIO(b"2"))
+        )
+        return first, second
+
+    assert asyncio.run(scenario()) == ("a.txt", None)
+
+
+def test_paths_cannot_escape_root(local_storage):
+    with pytest.raises(ValueError):
+        asyncio.run(local_storage.download("../secret"))
+
+
+def test_storage_calls_run_off_the_event_loop(local_storage, monkeypatch):
+    threads = []
+    original = local_storage._download
+
+    def recording_download(path):
+        threads.append(threading.current_thread())
+        return original(path)
+
+    monkeypatch.setattr(local_storage, "_download", recording_download)
+
+    async def scenario():
+        await local_storage.upload("b.txt", b"x")
+        return await local_storage.download("b.txt")
+
+    assert asyncio.run(scenario()) == b"x"
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_supabase_stream_forwards_range_and_reads_content_range(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(
+            206, headers={"content-range": "bytes 2-5/10"}, content=b"2345"
+        )
+
+    backend = SupabaseStorageBackend(max_workers=1)
+    client = httpx.AsyncClient(
+        base_url="http://sb/storage/v1", transport=httpx.MockTransport(handler)
+    )
+    monkeypatch.setattr(backend, "_stream_client", lambda: client)
+
+    async def scenario():
+        stream = await backend.open_stream("7/3/a b.pdf", (2, 5))
+        try:
+            return stream, b"".join([chunk async for chunk in stream.chunks])
+        finally:
+            await stream.aclose()
+
+    stream, body = asyncio.run(scenario())
+
+    assert body == b"2345"
+    assert (stream.start, stream.end, stream.total_size) == (2, 5, 10)
+    assert stream.is_partial
+    assert seen[0].headers["range"] == "bytes=2-5"
+    assert seen[0].url.raw_path == b"/storage/v1/object/uploads/7/3/a%20b.pdf"
+    backend.close()
@@ -0,0 +1,51 @@
+import uuid
+from types import SimpleNamespace
+
+from app.models.file import Files
+from app.models.project import Project
+from app.models.user import User
+from app.tasks import file_tasks
+
+
+def test_markdown_stage_extracts_raw_text_for_pending_uploads(db_session, tmp_path, monkeypatch):
+    user = User(name="u", email="u@example.com", passwordhash="x", email_verified=True)
+    db_session.add(user)
+    db_session.commit()
+    project = Project(user_id=user.id, name="p")
+    db_session.add(project)
+    db_session.commit()
+
+    record = Files(
+        id=str(uuid.uuid4()),
+        project_id=project.id,
+        created_by=user.id,
+        updated_by=user.id,
+        name="notes",
+        extension=".md",
+        storage_path="/1/1/user/root/notes.md",
+        content=None,
+        file_category="user upload",
+        file_type=".md",
+        file_size=1,
+        status="pending",
+    )
+    db_session.add(record)
+    db_session.commit()
+
+    temp_path = tmp_path / "notes.md"
+    temp_path.write_text("# Notes\nhello", encoding="utf-8")
+
+    def fake_get_db():
+        yield db_session
+
+    monkeypatch.setattr(file_tasks, "get_db", fake_get_db)
+    monkeypatch.setattr(file_tasks.emitter, "emit", lambda event: None)
+
+    result = file_tasks.process_markdown_task(
+        SimpleNamespace(), record.id, str(temp_path), "root"
+    )
+
+    db_session.refresh(record)
+    assert record.content == "# Notes\nhello"
+    assert result["md_text"] == "# Notes\nhello"
+    assert not temp_path.exists()